@@ -0,0 +1,259 @@
+"""
+An incremental, cross-event index of PESummary results.
+
+Building a catalog table (medians and credible intervals for every event
+and label) by reopening every event's metafile is dominated by reading
+posteriors which haven't changed since the last build. A
+:class:`CatalogIndex` keeps per-label summary statistics in a SQLite
+database keyed by event, production and label, remembers the modification
+time and size of the metafile each entry came from, and only re-reads a
+metafile when that has changed -- and then takes the statistics from its
+``summary_statistics.json`` sidecar where that is up to date, opening the
+metafile itself only if it isn't. Queries such as "every event with
+``chirp_mass`` below 10" are then an indexed lookup rather than a pass over
+the posteriors.
+
+A PESummary production adds itself to the project's catalog when it
+completes, if its ``catalog`` option is set (see the README); a whole
+ledger can be brought up to date with :func:`update_ledger`.
+"""
+
+import os
+import sqlite3
+
+from asimov import config, logger
+from asimov.pipeline import PipelineException
+
+from .results import QUANTILES, MetafileHandle, _signature, read_summary_statistics
+
+#: The catalog's location, relative to the project root, when the
+#: ``catalog`` option is simply ``True``.
+DEFAULT_PATH = os.path.join(".asimov", "pesummary_catalog.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metafiles (
+    event TEXT NOT NULL,
+    production TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (event, production)
+);
+CREATE TABLE IF NOT EXISTS statistics (
+    event TEXT NOT NULL,
+    production TEXT NOT NULL,
+    label TEXT NOT NULL,
+    parameter TEXT NOT NULL,
+    median REAL,
+    lower REAL,
+    upper REAL,
+    mean REAL,
+    std REAL,
+    PRIMARY KEY (event, production, label, parameter)
+);
+CREATE INDEX IF NOT EXISTS statistics_by_parameter
+    ON statistics (parameter, median);
+"""
+
+
+def catalog_path(setting):
+    """
+    Resolve a production's ``catalog`` option to a database path.
+
+    Parameters
+    ----------
+    setting : bool or str
+        ``True`` for the project's default catalog, or a path, which is
+        taken relative to the project root unless it is absolute.
+
+    Returns
+    -------
+    str or None
+        The path, or ``None`` if the catalog is disabled.
+    """
+    if not setting:
+        return None
+    if setting is True:
+        setting = DEFAULT_PATH
+    if not isinstance(setting, str):
+        raise PipelineException(
+            f"PESummary catalog must be true or a path, not {setting!r}"
+        )
+    return os.path.join(config.get("project", "root"), setting)
+
+
+class CatalogIndex:
+    """
+    Per-label summary statistics for many events' PESummary metafiles.
+
+    Parameters
+    ----------
+    path : str
+        The SQLite database holding the catalog; created if it doesn't
+        exist.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def is_current(self, event, production, path):
+        """Whether the catalog's entries for a metafile are up to date."""
+        signature = _signature(path)
+        row = self.connection.execute(
+            "SELECT path, mtime_ns, size FROM metafiles WHERE event = ? AND production = ?",
+            (event, production),
+        ).fetchone()
+        return (
+            row is not None
+            and signature is not None
+            and (row["path"], row["mtime_ns"], row["size"]) == (path, *signature)
+        )
+
+    def update(self, event, production, path):
+        """
+        Bring the catalog's entries for one metafile up to date.
+
+        Parameters
+        ----------
+        event : str
+            The event the metafile belongs to.
+        production : str
+            The PESummary production which wrote it.
+        path : str
+            The metafile.
+
+        Returns
+        -------
+        bool
+            ``True`` if the metafile was read, ``False`` if the catalog was
+            already up to date.
+        """
+        if self.is_current(event, production, path):
+            return False
+        signature = _signature(path)
+        if signature is None:
+            raise FileNotFoundError(path)
+        labels = read_summary_statistics(path)
+        if labels is None:
+            with MetafileHandle(path) as metafile:
+                labels = {label: metafile.summary(label) for label in metafile.labels}
+        rows = [
+            (
+                event, production, label, parameter,
+                summary["median"], summary["lower"], summary["upper"],
+                summary["mean"], summary["std"],
+            )
+            for label, summaries in labels.items()
+            for parameter, summary in summaries.items()
+        ]
+        with self.connection:
+            self._delete(event, production)
+            self.connection.executemany(
+                "INSERT INTO statistics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.connection.execute(
+                "INSERT INTO metafiles VALUES (?, ?, ?, ?, ?)",
+                (event, production, path, *signature),
+            )
+        logger.debug(f"Catalogued {len(rows)} statistics from {path}")
+        return True
+
+    def _delete(self, event, production):
+        for table in ("statistics", "metafiles"):
+            self.connection.execute(
+                f"DELETE FROM {table} WHERE event = ? AND production = ?",
+                (event, production),
+            )
+
+    def remove(self, event, production):
+        """Remove a production's entries from the catalog."""
+        with self.connection:
+            self._delete(event, production)
+
+    def query(self, parameter, minimum=None, maximum=None, statistic="median"):
+        """
+        Find the labels whose summary statistic for a parameter lies in a
+        range.
+
+        Parameters
+        ----------
+        parameter : str
+            The parameter, e.g. ``"chirp_mass"``.
+        minimum, maximum : float, optional
+            The (inclusive) bounds; either may be omitted.
+        statistic : str, optional
+            The statistic to compare: ``"median"`` (the default),
+            ``"lower"``, ``"upper"``, ``"mean"`` or ``"std"``.
+
+        Returns
+        -------
+        list of dict
+            One entry per matching label, with its event, production,
+            label and statistics.
+        """
+        if statistic not in (*QUANTILES, "mean", "std"):
+            raise ValueError(f"Unknown catalog statistic {statistic!r}")
+        clauses, values = ["parameter = ?"], [parameter]
+        if minimum is not None:
+            clauses.append(f"{statistic} >= ?")
+            values.append(minimum)
+        if maximum is not None:
+            clauses.append(f"{statistic} <= ?")
+            values.append(maximum)
+        rows = self.connection.execute(
+            f"SELECT * FROM statistics WHERE {' AND '.join(clauses)} "
+            "ORDER BY event, production, label",
+            values,
+        )
+        return [dict(row) for row in rows]
+
+
+def update_ledger(ledger, path):
+    """
+    Bring a catalog up to date with every PESummary production in a ledger.
+
+    Metafiles which are unchanged since they were last catalogued aren't
+    read, and productions without a metafile yet are skipped.
+
+    Parameters
+    ----------
+    ledger : :class:`asimov.ledger.Ledger`
+        The project ledger.
+    path : str
+        The catalog database.
+
+    Returns
+    -------
+    int
+        The number of metafiles which were (re-)read.
+    """
+    from .pesummary import PESummary
+
+    updated = 0
+    with CatalogIndex(path) as catalog:
+        for production in ledger.get_productions():
+            pipeline = getattr(production, "pipeline", None)
+            if not isinstance(pipeline, PESummary):
+                continue
+            metafile = pipeline.results()["metafile"]
+            if not os.path.exists(metafile):
+                continue
+            try:
+                updated += catalog.update(production.event.name, production.name, metafile)
+            except (OSError, KeyError) as error:
+                logger.warning(f"Could not catalogue {metafile}: {error}")
+    return updated
@@ -0,0 +1,68 @@
+"""
+asimov monitor states for PESummary productions held back by the job limit.
+
+A submission beyond ``max jobs`` or ``max jobs per event`` is held in the
+local queue of :mod:`asimov_pesummary.throttle` and reported to asimov with
+the placeholder job id ``QUEUED_JOB_ID``. asimov's ``running`` state would
+take that for a job which has vanished from the scheduler, and its
+``processing`` state (which ``asimov monitor`` gives a refreshed
+``SubjectAnalysis``) never looks for the job at all. The states here check
+the queue first: once a slot is free the job is submitted and its real job
+id saved to the ledger. Any other job is left to asimov's own states.
+
+This imports asimov's monitor machinery, so it is only imported by
+``PESummary.get_state_handlers()``, which asimov calls while monitoring.
+"""
+
+import click
+
+from asimov.monitor_states import ProcessingState, RunningState
+from asimov.pipeline import PipelineException
+
+from .throttle import QUEUED_JOB_ID
+
+
+def is_queued(job_id):
+    """Whether ``job_id`` is the placeholder for a job in the local queue."""
+    return job_id is not None and str(job_id) == str(QUEUED_JOB_ID)
+
+
+class _ReleaseQueued:
+    """Release a production's queued job before handling its state."""
+
+    def handle(self, context):
+        if not is_queued(context.job_id):
+            return super().handle(context)
+        analysis = context.analysis
+        try:
+            job_id = analysis.pipeline.release_queued()
+        except PipelineException as error:
+            analysis.status = "stuck"
+            click.echo(
+                "  \t  " + click.style("●", "red") + f" {analysis.name} is stuck: {error}"
+            )
+            context.update_ledger()
+            return False
+        if job_id is None:
+            click.echo(
+                "  \t  "
+                + click.style("●", "yellow")
+                + f" {analysis.name} is waiting for a summary page job slot"
+            )
+            return True
+        context.update_ledger()
+        click.echo(
+            "  \t  "
+            + click.style("●", "green")
+            + f" {analysis.name} has been released from the job queue"
+            + f" (condor id: {job_id})"
+        )
+        return True
+
+
+class QueuedRunningState(_ReleaseQueued, RunningState):
+    """asimov's ``running`` state, releasing a queued job first."""
+
+
+class QueuedProcessingState(_ReleaseQueued, ProcessingState):
+    """asimov's ``processing`` state, releasing a queued job first."""
@@ -1,16 +1,54 @@
 """Defines the interface with generic analysis pipelines."""
 
+import functools
 import importlib.resources
+import json
+import math
 import os
+import re
+import time
 
 from asimov import utils  # NoQA
 from asimov import config, logger, logging, LOGGER_LEVEL  # NoQA
-from asimov.scheduler_utils import create_job_from_dict  # NoQA
-
-import otter  # NoQA
-from asimov.storage import Store  # NoQA
 from asimov.pipeline import Pipeline, PipelineException, PipelineLogger  # NoQA
 
+from . import stages
+from .results import (
+    COMPLETION_MARKER,
+    MetafileHandle,
+    metafile_groups,
+    summary_statistics_path,
+    write_summary_statistics,
+)
+from .throttle import JobThrottle, LIVE_STATES, QUEUED_JOB_ID
+from .timing import NullTimer, SubmitTimer
+
+
+_OPTION = re.compile(r"(?<![\w-])--\w[\w-]*")
+
+
+@functools.lru_cache(maxsize=None)
+def _summarypages_options(executable):
+    """
+    The options ``executable`` accepts, read from its ``--help``, or
+    ``None`` if it can't be run here.
+
+    Asked in a child process, and once per process: the job runs the
+    ``summarypages`` of the pipelines environment, not whatever PESummary
+    asimov's own interpreter can import, and importing PESummary's parser
+    would load matplotlib into asimov for every submission.
+    """
+    import subprocess
+
+    try:
+        result = subprocess.run(
+            [executable, "--help"],
+            capture_output=True, text=True, timeout=120, check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return frozenset(_OPTION.findall(result.stdout)) or None
+
 
 class PESummary(Pipeline):
     """
@@ -30,11 +68,35 @@ class PESummary(Pipeline):
     so a full rebuild is triggered instead.
     """
 
-    executable = os.path.join(
-        config.get("pipelines", "environment"), "bin", "summarypages"
-    )
     name = "PESummary"
 
+    #: Scheduler priorities for each named ``priority`` level.
+    PRIORITIES = {"urgent": 20, "high": 10, "normal": 0, "low": -10}
+
+    #: How far an incremental refresh is ranked above a full rebuild at the
+    #: same priority level.
+    REFRESH_PRIORITY_BOOST = 5
+
+    #: The wall-clock time an automatically-sized job aims for, and the most
+    #: CPUs it requests unless ``max cpus`` sets another limit.
+    AUTO_TARGET_WALL_HOURS = 0.25
+    AUTO_MAX_CPUS = 8
+
+    #: The ``summarypages`` flags each named ``preset`` adds, trading the
+    #: page's richness for CPU time.
+    PRESETS = {
+        "minimal": [
+            "--disable_corner",
+            "--disable_interactive",
+            "--disable_expert",
+            "--disable_comparison",
+            "--disable_prior_sampling",
+            "--no_ligo_skymap",
+        ],
+        "standard": ["--disable_interactive", "--disable_expert"],
+        "full": ["--enable_expert"],
+    }
+
     def __init__(self, production, category=None):
         # Imported here rather than at module level: asimov's own
         # asimov/analysis.py imports asimov/pipelines/__init__.py (to build
@@ -60,6 +122,61 @@ class PESummary(Pipeline):
         # super().__init__() here since this class sets up its attributes
         # differently (e.g. category fallback, plain module logger).
         self._scheduler = None
+        self._timer = NullTimer()
+
+    @property
+    def executable(self):
+        """
+        The ``summarypages`` executable in the configured environment.
+
+        Resolved on access rather than when this class is defined: asimov
+        imports every registered pipeline plugin on every CLI invocation,
+        so reading the configuration at import time made ``import
+        asimov_pesummary`` fail outright on a host whose configuration has
+        no ``pipelines/environment`` -- even for commands which never
+        touch a PESummary production.
+        """
+        return os.path.join(
+            config.get("pipelines", "environment"), "bin", "summarypages"
+        )
+
+    def _profiler(self):
+        """
+        The profiler named by the ``profile`` option, or ``None`` if the job
+        isn't to be profiled (see :mod:`asimov_pesummary.profiling`).
+        """
+        from .profiling import PROFILERS
+
+        profiler = self.meta.get("profile")
+        if not profiler:
+            return None
+        if profiler is True:
+            return "cprofile"
+        if str(profiler).lower() not in PROFILERS:
+            raise PipelineException(
+                f"Unknown PESummary profiler {profiler!r} for "
+                f"{self.production.name}; use one of {', '.join(PROFILERS)}."
+            )
+        return str(profiler).lower()
+
+    def _launch(self, command):
+        """
+        The executable a job runs and its arguments: ``summarypages`` and
+        ``command``, or with ``profile`` set, the profiling launcher
+        wrapping them, run by the ``environment``'s own Python (the job
+        runs on an execute node, so nothing about the submit host's
+        interpreter or its ``PATH`` applies).
+        """
+        profiler = self._profiler()
+        if profiler is None:
+            return self.executable, command
+        from .profiling import launcher_arguments
+
+        python = os.path.join(config.get("pipelines", "environment"), "bin", "python")
+        return python, launcher_arguments(
+            profiler, python, self.executable, command, self.subject.work_dir,
+            f"pesummary_{self.production.name}",
+        )
 
     @property
     def config_template(self):
@@ -120,12 +237,246 @@ class PESummary(Pipeline):
 
         return dict(metafile=metafile)
 
+    def open_results(self):
+        """
+        Open this post-processing step's metafile for reading.
+
+        Unlike loading the metafile with PESummary's own reader, nothing is
+        read up front: labels, parameter names, PSDs and configs are read
+        as they are asked for, and samples a parameter at a time.
+
+        For example::
+
+            with pipeline.open_results() as metafile:
+                for label in metafile.labels:
+                    chirp_mass = metafile.samples(label, "chirp_mass")
+
+        Returns
+        -------
+        :class:`asimov_pesummary.results.MetafileHandle`
+           A lazy handle on the metafile.
+        """
+        return MetafileHandle(self.results()["metafile"])
+
     def collect_assets(self):
         """
         Advertise this pipeline's combined metafile, in case a further
-        downstream step ever needs to consume it.
+        downstream step ever needs to consume it, and the small summary
+        statistics sidecar written beside it on completion (see
+        ``after_completion``), for consumers which only need medians and
+        credible intervals. With ``profile`` set, the profile artifacts
+        written beside the job's logs are advertised as ``profile``.
         """
-        return {"samples": self.results()["metafile"]}
+        metafile = self.results()["metafile"]
+        assets = {
+            "samples": metafile,
+            "summary statistics": summary_statistics_path(metafile),
+        }
+        profiler = self._profiler()
+        if profiler is not None:
+            from .profiling import artifacts
+
+            assets["profile"] = artifacts(
+                self.subject.work_dir, profiler, f"pesummary_{self.production.name}"
+            )
+        return assets
+
+    def _expected_labels(self):
+        """The labels a finished metafile for this production must hold."""
+        if self.is_subject_analysis:
+            resolved = self.production.resolved_dependencies
+            if resolved:
+                return list(resolved)
+            return [analysis.name for analysis in self.production.analyses]
+        return [str(self.production.name)]
+
+    def detect_completion(self):
+        """
+        Check whether this production's summary pages are complete.
+
+        The pages are complete once ``home.html`` exists and the metafile
+        has been written with PESummary's ``history`` group and a group for
+        every expected label (for a ``SubjectAnalysis``, every resolved
+        source analysis -- so an ``--add_to_existing`` refresh isn't
+        complete until its new labels appear). A page left by an earlier
+        job doesn't count: once a job has been submitted, its metafile must
+        have been written since (see :meth:`_stale`). Only the metafile's
+        structure is read, never its samples, and that is cached against
+        the file's modification time, so asimov's monitor can poll this
+        cheaply for every event on every pass.
+        """
+        webdir = self._webdir()
+        if not os.path.exists(os.path.join(webdir, "home.html")):
+            return False
+        metafile = self.results()["metafile"]
+        if self._stale(metafile):
+            return False
+        groups = metafile_groups(metafile)
+        if groups is None or COMPLETION_MARKER not in groups:
+            return False
+        missing = set(self._expected_labels()) - groups
+        if missing:
+            self.logger.debug(
+                f"PESummary metafile for {self.production.name} is missing "
+                f"{sorted(missing)}"
+            )
+            return False
+        return True
+
+    def _submission_record(self):
+        """
+        The file recording when this production's latest job was
+        submitted, in the working directory.
+        """
+        return os.path.join(
+            self.subject.work_dir, f"pesummary_{self.production.name}.submitted"
+        )
+
+    def _stale(self, metafile):
+        """
+        Whether ``metafile`` predates this production's latest submission.
+
+        Both modification times are the file server's, so a submit host's
+        clock can't disagree with the execute node's; a production with no
+        submission record (e.g. submitted by an earlier version) is never
+        stale.
+        """
+        try:
+            submitted = os.stat(self._submission_record()).st_mtime_ns
+            written = os.stat(metafile).st_mtime_ns
+        except OSError:
+            return False
+        if written < submitted:
+            self.logger.debug(
+                f"PESummary metafile for {self.production.name} predates "
+                "its latest submission"
+            )
+            return True
+        return False
+
+    def detect_completion_processing(self):
+        """
+        Check whether post-processing has finished; for PESummary, that is
+        the same check as ``detect_completion``.
+        """
+        return self.detect_completion()
+
+    def after_completion(self):
+        """
+        Mark the production finished, write the summary statistics sidecar
+        beside its metafile and, if its ``catalog`` option is set, add the
+        metafile to the project's catalog.
+        """
+        super().after_completion()
+        metafile = self.results()["metafile"]
+        try:
+            write_summary_statistics(metafile)
+        except Exception as error:
+            self.logger.warning(f"Could not summarise {metafile}: {error}")
+        self._update_catalog()
+        self._store_stage_timings()
+
+    def _progress_log(self):
+        from .progress import ProgressLog
+
+        return ProgressLog(os.path.join(self.subject.work_dir, "pesummary.err"))
+
+    def progress(self):
+        """
+        Report how far through the running ``summarypages`` job is.
+
+        The job's log is read from where the previous call left off, so
+        this is cheap to call on every monitor pass.
+
+        Returns
+        -------
+        dict
+            The current ``stage`` and ``label``, the estimated ``fraction``
+            complete, and the ``elapsed`` and estimated remaining (``eta``)
+            seconds; see :meth:`asimov_pesummary.progress.ProgressLog.progress`.
+        """
+        log = self._progress_log()
+        if log.update():
+            log.save()
+        return log.progress()
+
+    def while_running(self):
+        """Log the running job's stage and estimated time to finish."""
+        try:
+            progress = self.progress()
+        except OSError as error:
+            self.logger.debug(f"Could not read PESummary progress: {error}")
+            return
+        if progress["stage"] is None:
+            return
+        stage = progress["stage"]
+        if progress["label"]:
+            stage += f" ({progress['label']})"
+        eta = ""
+        if progress["eta"] is not None:
+            eta = f", about {progress['eta'] / 60:.0f} min left"
+        self.logger.info(
+            f"PESummary {self.subject.name}/{self.production.name}: {stage}, "
+            f"{progress['fraction']:.0%} done{eta}"
+        )
+
+    def _stage_timings_file(self):
+        """
+        The file this production's ``summarypages`` stage timings are
+        written to, in the working directory.
+        """
+        return os.path.join(
+            self.subject.work_dir, f"pesummary_{self.production.name}_stages.json"
+        )
+
+    def _store_stage_timings(self):
+        """
+        Write how long each ``summarypages`` stage took, per label where it
+        ran label by label, to ``pesummary_<production>_stages.json`` in the
+        working directory.
+
+        ``after_completion`` runs on every monitor pass until the page is
+        published, so the file is only written, and the timings logged,
+        when they have changed.
+        """
+        path = self._stage_timings_file()
+        try:
+            log = self._progress_log()
+            if log.update():
+                log.save()
+            timings = log.timings()
+            if not timings:
+                return
+            try:
+                with open(path) as stage_file:
+                    if json.load(stage_file) == timings:
+                        return
+            except (OSError, ValueError):
+                pass
+            with open(path, "w") as stage_file:
+                json.dump(timings, stage_file, indent=2)
+        except OSError as error:
+            self.logger.warning(f"Could not record PESummary stage timings: {error}")
+            return
+        self.logger.info(
+            f"PESummary stage timings for {self.subject.name}/"
+            f"{self.production.name}: {json.dumps(timings)}"
+        )
+
+    def _update_catalog(self):
+        from .catalog import CatalogIndex, catalog_path
+
+        path = catalog_path(self.meta.get("catalog"))
+        if path is None:
+            return
+        metafile = self.results()["metafile"]
+        try:
+            with CatalogIndex(path) as catalog:
+                catalog.update(self.subject.name, self.production.name, metafile)
+        except Exception as error:
+            # The pages themselves are complete; a catalog which can't be
+            # updated now is brought up to date by the next update.
+            self.logger.warning(f"Could not add {metafile} to the catalog: {error}")
 
     def build_dag(self, user=None, dryrun=False):
         """
@@ -136,10 +487,11 @@ class PESummary(Pipeline):
         """
         pass
 
-    def _append_shared_options(self, command):
+    def _append_shared_options(self, command, cpus):
         """
         Append the ``postprocessing.pesummary`` meta-driven flags shared by
-        both single-analysis and subject-analysis submissions.
+        both single-analysis and subject-analysis submissions, running on
+        ``cpus`` processes (see ``_cpus``).
         """
         if "cosmology" in self.meta:
             command += ["--cosmology", self.meta["cosmology"]]
@@ -154,8 +506,10 @@ class PESummary(Pipeline):
             if "backwards" in self.meta["evolve spins"]:
                 command += ["--evolve_spins_backwards", "precession_averaged"]
 
-        if "multiprocess" in self.meta:
-            command += ["--multi_process", str(self.meta["multiprocess"])]
+        command += ["--multi_process", str(cpus)]
+        # Which label summarypages is plotting is only logged at DEBUG;
+        # the monitor follows the job through pesummary.err, so ask for it.
+        command += ["--verbose"]
 
         if self.meta.get("regenerate"):
             posteriors = self.meta.get("regenerate posteriors")
@@ -170,62 +524,437 @@ class PESummary(Pipeline):
             if "precessing snr" in self.meta["calculate"]:
                 command += ["--calculate_precessing_snr"]
 
-    def _submit(self, command, dryrun):
+        command += self._preset_options()
+
+    def _cpus(self, labels, samples):
         """
-        Write the job script, build the submit description, and submit (or,
-        if ``dryrun``, just print what would happen). Shared by both the
-        single-analysis and subject-analysis submission paths.
+        The number of CPUs to run ``summarypages`` on.
+
+        An explicit ``multiprocess`` is used as given. If it is ``auto``
+        (or unset), the job is sized from the estimated cost of its labels,
+        skymaps and input samples (see
+        :func:`asimov_pesummary.planning.estimate_cost`), aiming to finish
+        within ``AUTO_TARGET_WALL_HOURS``, and limited to ``max cpus``
+        (``AUTO_MAX_CPUS`` by default): a single label gets one CPU rather
+        than the several a twenty-label page with skymaps can use.
         """
-        with utils.set_directory(self.subject.work_dir):
-            with open("pesummary.sh", "w") as bash_file:
-                bash_file.write(f"{self.executable} " + " ".join(command))
-
-        self.logger.info(
-            f"PE summary command: {self.executable} {' '.join(command)}",
-        )
+        setting = self.meta.get("multiprocess", "auto")
+        if setting != "auto":
+            try:
+                return int(setting)
+            except (TypeError, ValueError):
+                raise PipelineException(
+                    f"PESummary multiprocess must be a number or 'auto', not {setting!r}"
+                )
+        from .planning import estimate_cost
+
+        sample_bytes = 0
+        with self._timer.phase("sizing"):
+            for path in samples:
+                try:
+                    sample_bytes += os.path.getsize(path)
+                except (OSError, TypeError):
+                    pass
+        self._timer.count("file stats", len(samples))
+        cpu_hours = estimate_cost(
+            len(labels), sample_bytes, skymap_samples=self.meta.get("skymap samples")
+        )["cpu_hours"]
+        limit = int(self.meta.get("max cpus", self.AUTO_MAX_CPUS))
+        return max(1, min(math.ceil(cpu_hours / self.AUTO_TARGET_WALL_HOURS), limit))
+
+    def _preset_options(self):
+        """
+        The flags for the production's ``preset``, less any the installed
+        ``summarypages`` doesn't know.
+        """
+        preset = self.meta.get("preset")
+        if preset is None:
+            return []
+        if preset not in self.PRESETS:
+            raise PipelineException(
+                f"Unknown PESummary preset {preset!r}; expected one of "
+                f"{', '.join(self.PRESETS)}."
+            )
+        options = self.PRESETS[preset]
+        supported = _summarypages_options(self.executable)
+        if supported is None:
+            return list(options)
+        unsupported = [option for option in options if option not in supported]
+        if unsupported:
+            self.logger.warning(
+                f"The installed summarypages does not support {unsupported}; "
+                f"leaving them out of the {preset!r} preset."
+            )
+        return [option for option in options if option in supported]
 
-        if dryrun:
-            print("PESUMMARY COMMAND")
-            print("-----------------")
-            print(" ".join(command))
+    def _submit_description(self, job):
+        """
+        Build the scheduler submit description for a job assembled by
+        ``_single_analysis_job``/``_subject_analysis_job``.
+        """
         self.subject = self.production.event
+        executable, arguments = self._launch(job["command"])
         submit_description = {
-            "executable": self.executable,
-            "arguments": " ".join(command),
+            "executable": executable,
+            "arguments": " ".join(arguments),
             "output": f"{self.subject.work_dir}/pesummary.out",
             "error": f"{self.subject.work_dir}/pesummary.err",
             "log": f"{self.subject.work_dir}/pesummary.log",
-            "request_cpus": self.meta["multiprocess"],
+            "request_cpus": job["cpus"],
             "getenv": "true",
             "batch_name": f"Summary Pages/{self.subject.name}/{self.production.name}",
             "request_memory": "8192MB",
             "should_transfer_files": "YES",
             "request_disk": "8192MB",
         }
-        if "accounting group" in self.meta:
+        level, priority = self._priority(job)
+        submit_description["priority"] = priority
+
+        accounting_group = self.meta.get("priority accounting groups", {}).get(
+            level, self.meta.get("accounting group")
+        )
+        if accounting_group:
             submit_description["accounting_group_user"] = config.get("condor", "user")
-            submit_description["accounting_group"] = self.meta["accounting group"]
+            submit_description["accounting_group"] = accounting_group
+        return submit_description
+
+    def _priority_level(self):
+        """
+        The named (or numeric) priority level for this production.
+
+        Taken from ``postprocessing.pesummary.priority`` if set; otherwise
+        from the event's own ``priority``, or ``high`` for an event marked
+        ``significant``; otherwise ``normal``.
+        """
+        if "priority" in self.meta:
+            return self.meta["priority"]
+        event_meta = getattr(self.production.event, "meta", None)
+        if isinstance(event_meta, dict):
+            if "priority" in event_meta:
+                return event_meta["priority"]
+            if event_meta.get("significant"):
+                return "high"
+        return "normal"
+
+    def _priority(self, job):
+        """
+        Map this production's priority level onto a scheduler priority.
+
+        Summary pages share one user's queue, where the scheduler runs
+        higher priority jobs first, so a rerun of hundreds of archival
+        events needn't delay the page for a new candidate. Incremental
+        refreshes only add a few labels to an existing page, so they are
+        also ranked above full rebuilds at the same level.
+
+        Returns
+        -------
+        tuple
+            The level's name (or its value, if numeric) and the scheduler
+            priority.
+        """
+        level = self._priority_level()
+        if isinstance(level, str) and level.lower() in self.PRIORITIES:
+            level = level.lower()
+            priority = self.PRIORITIES[level]
+        else:
+            try:
+                priority = int(level)
+            except (TypeError, ValueError):
+                raise PipelineException(
+                    f"Unknown PESummary priority {level!r} for "
+                    f"{self.production.name}; use one of "
+                    f"{', '.join(self.PRIORITIES)} or an integer."
+                )
+        if job.get("incremental"):
+            priority += self.REFRESH_PRIORITY_BOOST
+        return level, priority
+
+    def _submit(self, job, dryrun):
+        """
+        Write the job script, build the submit description, and submit (or,
+        if ``dryrun``, just print what would happen). Shared by both the
+        single-analysis and subject-analysis submission paths.
+        """
+        submit_description = self._submit_description(job)
+        # What the job actually runs: summarypages, or the profiling
+        # launcher wrapping it.
+        invocation = f"{submit_description['executable']} {submit_description['arguments']}"
+        with self._timer.phase("script"):
+            with utils.set_directory(self.subject.work_dir):
+                with open("pesummary.sh", "w") as bash_file:
+                    bash_file.write(invocation)
+        self._timer.count("files written")
+        if not dryrun:
+            # A resubmitted job's log is rewritten from the start.
+            self._progress_log().forget()
+
+        self.logger.info(f"PE summary command: {invocation}")
 
         if dryrun:
+            print("PESUMMARY COMMAND")
+            print("-----------------")
+            print(invocation)
             print("SUBMIT DESCRIPTION")
             print("------------------")
             print(submit_description)
+            return 0
+
+        # Recorded before submitting, so that the job's own metafile is
+        # always newer; see _stale().
+        with open(self._submission_record(), "w") as record:
+            json.dump({"production": self.production.name, "time": time.time()}, record)
+        self._timer.count("files written")
+
+        throttle = self._throttle()
+        if throttle is None:
+            return self._schedule(submit_description)
+
+        # Queue first, then release whatever fits, highest priority first,
+        # so that a new submission can't overtake one already waiting for
+        # a slot, and a slot freed since the last pass is never left idle.
+        key = throttle.key(self.subject.name, self.production.name)
+        with throttle.locked():
+            try:
+                with self._timer.phase("throttle"):
+                    self._prune(throttle)
+                    throttle.enqueue(
+                        self.subject.name, self.production.name, submit_description
+                    )
+                    self._drop_stale(throttle, keep=key)
+                self._drain(throttle, key)
+            finally:
+                with self._timer.phase("throttle"):
+                    throttle.save()
+        if key in throttle.active:
+            return throttle.active[key]["job id"]
+        self.logger.info(
+            f"PESummary job limit reached; queued {key} "
+            f"({len(throttle.queued)} waiting)"
+        )
+        return QUEUED_JOB_ID
 
-        if not dryrun:
-            job = create_job_from_dict(submit_description)
-            cluster_id = self.scheduler.submit(job)
-        else:
-            cluster_id = 0
+    def _schedule(self, submit_description):
+        """Submit a submit description to the scheduler."""
+        # Imported here rather than at module level, so that loading
+        # this plugin (which asimov does for every command) doesn't
+        # pull in the scheduler machinery until a job is submitted.
+        from asimov.scheduler_utils import create_job_from_dict
+
+        self._timer.count("scheduler calls")
+        with self._timer.phase("scheduler"):
+            return self.scheduler.submit(create_job_from_dict(submit_description))
+
+    def _throttle(self, always=False):
+        """
+        The project's :class:`~asimov_pesummary.throttle.JobThrottle`, if
+        ``max jobs`` or ``max jobs per event`` is set, otherwise ``None``
+        (or, if ``always``, one without limits, which releases whatever
+        is still queued).
+        """
+        max_jobs = int(self.meta.get("max jobs") or 0)
+        max_jobs_per_event = int(self.meta.get("max jobs per event") or 0)
+        if not (max_jobs or max_jobs_per_event or always):
+            return None
+        path = os.path.join(
+            config.get("project", "root"), ".asimov", "pesummary_jobs.json"
+        )
+        return JobThrottle(
+            path, max_jobs=max_jobs, max_jobs_per_event=max_jobs_per_event
+        )
 
+    def _prune(self, throttle):
+        """Forget the throttle's jobs which have left the scheduler."""
+        if throttle.prune(self.scheduler):
+            self._timer.count("scheduler calls")
+
+    def _release(self, throttle, key):
+        """Submit a job held in the throttle's queue, and record it."""
+        entry = throttle.queued[key]
+        cluster_id = self._schedule(entry["submit description"])
+        event, production = key.split("/", 1)
+        throttle.record(event, production, cluster_id)
         return cluster_id
 
+    def _drain(self, throttle, own):
+        """
+        Submit queued jobs, highest priority first, while slots are free.
+
+        Another production's job which can't be submitted is dropped from
+        the queue (its production is then marked stuck on its next monitor
+        pass), so that it doesn't block the rest; this production's own
+        (``own``) error is raised.
+        """
+        while True:
+            key = throttle.next_release()
+            if key is None:
+                return
+            try:
+                self._release(throttle, key)
+            except Exception as error:
+                if key == own:
+                    raise
+                self.logger.warning(
+                    f"Could not release queued PESummary job {key}: {error}"
+                )
+                throttle.discard(key)
+
+    def _drop_stale(self, throttle, keep):
+        """
+        Drop queued jobs whose production has left the ledger or is no
+        longer in one of the throttle's ``LIVE_STATES``, other than
+        ``keep``.
+        """
+        ledger = getattr(self.production.event, "ledger", None)
+        if ledger is None:
+            return
+        statuses = {}
+        for key in list(throttle.queued):
+            if key == keep:
+                continue
+            event, name = key.split("/", 1)
+            if event not in statuses:
+                try:
+                    [subject] = ledger.get_event(event)
+                    statuses[event] = {
+                        production.name: str(production.status).lower()
+                        for production in subject.productions
+                    }
+                except (KeyError, ValueError):
+                    statuses[event] = {}
+            if statuses[event].get(name) not in LIVE_STATES:
+                self.logger.info(f"Dropping queued PESummary job for {key}")
+                throttle.discard(key)
+
+    def release_queued(self):
+        """
+        Submit this production's job if it is held back by the job limit
+        and a slot is free, releasing any more urgent jobs first.
+
+        Returns
+        -------
+        int or None
+            The job's id, also set as the production's, once it has been
+            submitted; ``None`` while it is still waiting.
+
+        Raises
+        ------
+        PipelineException
+            If the job is neither waiting nor submitted, e.g. because it
+            could not be submitted when its turn came.
+        """
+        throttle = self._throttle(always=True)
+        key = throttle.key(self.subject.name, self.production.name)
+        with throttle.locked():
+            # Note a job released on an earlier pass (but perhaps not saved
+            # to the ledger) before pruning, which forgets it once it
+            # finishes.
+            released = throttle.active.get(key)
+            try:
+                with self._timer.phase("throttle"):
+                    self._prune(throttle)
+                    self._drop_stale(throttle, keep=key)
+                self._drain(throttle, key)
+            finally:
+                throttle.save()
+        released = released or throttle.active.get(key)
+        if released:
+            self.production.job_id = released["job id"]
+            self.logger.info(f"Released queued PESummary job for {key}")
+            return self.production.job_id
+        if key in throttle.queued:
+            return None
+        raise PipelineException(
+            f"The queued PESummary job for {key} is no longer in the job queue."
+        )
+
+    def resurrect(self):
+        """
+        Submit this production's job if it was held back by the job limit
+        and a slot has since become free (see :meth:`release_queued`).
+
+        PESummary's own monitor states (see :meth:`get_state_handlers`)
+        release held jobs before asimov would call this; it remains for
+        a job asimov finds missing from the scheduler by other routes.
+        """
+        throttle = self._throttle(always=True)
+        key = throttle.key(self.subject.name, self.production.name)
+        if key in throttle.active or key in throttle.queued:
+            self.release_queued()
+
+    def get_state_handlers(self):
+        """
+        asimov's monitor states for PESummary productions: ``running`` and
+        ``processing`` release jobs held back by the job limit, and save
+        their job ids, before deferring to asimov's own states (see
+        :mod:`asimov_pesummary.monitor`).
+        """
+        from .monitor import QueuedProcessingState, QueuedRunningState
+
+        return {
+            "running": QueuedRunningState(),
+            "processing": QueuedProcessingState(),
+        }
+
     def submit_dag(self, dryrun=False):
         """
         Run PESummary on the results of this job.
+
+        With ``timing`` set, the time spent in each phase of the submission
+        is logged (see :mod:`asimov_pesummary.timing`).
+        """
+        if self.meta.get("timing"):
+            self._timer = SubmitTimer(self.subject.name, self.production.name)
+        try:
+            if self.is_subject_analysis:
+                return self._submit_subject_analysis(dryrun=dryrun)
+            return self._submit_single_analysis(dryrun=dryrun)
+        finally:
+            self._report_timing()
+
+    def _report_timing(self):
+        """Log, and optionally append to a report, the submission's timings."""
+        record = self._timer.record()
+        self._timer = NullTimer()
+        if record is None:
+            return
+        self.logger.info(
+            f"PESummary timing {json.dumps(record)}",
+            extra={"pesummary_timing": record},
+        )
+        report = self.meta.get("timing report")
+        if report:
+            from .timing import append
+
+            try:
+                append(os.path.join(config.get("project", "root"), report), record)
+            except OSError as error:
+                self.logger.warning(f"Could not write PESummary timing report: {error}")
+
+    def _job(self):
+        """
+        Assemble what ``submit_dag`` would run now, without side effects.
         """
         if self.is_subject_analysis:
-            return self._submit_subject_analysis(dryrun=dryrun)
-        return self._submit_single_analysis(dryrun=dryrun)
+            return self._subject_analysis_job()
+        return self._single_analysis_job()
+
+    def plan(self):
+        """
+        Describe what ``submit_dag`` would do now, without doing it.
+
+        Unlike ``submit_dag(dryrun=True)``, this writes no job script,
+        prints nothing, does not touch the scheduler and does not record
+        the analyses it would combine as resolved, so it is safe to call
+        for every production in a ledger.
+
+        Returns
+        -------
+        :class:`asimov_pesummary.planning.SubmissionPlan`
+        """
+        from .planning import SubmissionPlan
+
+        job = self._job()
+        return SubmissionPlan.from_job(self, job, self._submit_description(job))
 
     @staticmethod
     def _single_sample_path(samples):
@@ -246,9 +975,24 @@ class PESummary(Pipeline):
         return samples
 
     def _submit_single_analysis(self, dryrun=False):
-        configfile = self.production.event.repository.find_prods(
-            self.production.name, self.category
-        )[0]
+        return self._submit(self._single_analysis_job(), dryrun)
+
+    def _single_analysis_job(self):
+        """
+        Assemble the ``summarypages`` command for a single analysis.
+
+        Returns a dictionary holding the ``command`` arguments, the
+        ``labels`` it summarises, the number of ``cpus`` it runs on,
+        whether it is ``incremental`` (never, for
+        a single analysis), the expensive stages each label already on the
+        page has been through and so ``reused`` (none, for the same reason)
+        and the ``inputs`` it reads.
+        """
+        with self._timer.phase("config lookup"):
+            configfile = self.production.event.repository.find_prods(
+                self.production.name, self.category
+            )[0]
+        self._timer.count("config lookups")
         label = str(self.production.name)
 
         command = ["--webdir", self._webdir(), "--labels", label]
@@ -266,33 +1010,33 @@ class PESummary(Pipeline):
             str(self.production.meta["waveform"]["reference frequency"]),
         ]
 
-        self._append_shared_options(command)
+        with self._timer.phase("assets"):
+            assets = self.production._previous_assets()
+        self._timer.count("asset lookups")
+        sample_path = self._single_sample_path(assets.get("samples"))
+        if not sample_path:
+            raise PipelineException(
+                f"PESummary production {self.production.name} has no samples "
+                "available from its upstream analysis."
+            )
+
+        cpus = self._cpus([label], [sample_path])
+        self._append_shared_options(command, cpus)
 
         if "nrsur" in self.production.meta["waveform"]["approximant"].lower():
             command += ["--NRSur_fits"]
 
         # Config file
-        command += [
-            "--config",
-            os.path.join(
-                self.production.event.repository.directory, self.category, configfile
-            ),
-        ]
-        # Samples
-        sample_path = self._single_sample_path(
-            self.production._previous_assets().get("samples")
+        configfile = os.path.join(
+            self.production.event.repository.directory, self.category, configfile
         )
-        if not sample_path:
-            raise PipelineException(
-                f"PESummary production {self.production.name} has no samples "
-                "available from its upstream analysis."
-            )
+        command += ["--config", configfile]
+        # Samples
         command += ["--samples", sample_path]
 
         # PSDs
         psds = {
-            ifo: os.path.abspath(psd)
-            for ifo, psd in self.production._previous_assets().get("psds", {}).items()
+            ifo: os.path.abspath(psd) for ifo, psd in assets.get("psds", {}).items()
         }
         if len(psds) > 0:
             command += ["--psds"]
@@ -302,16 +1046,26 @@ class PESummary(Pipeline):
         # Calibration envelopes
         cals = {
             ifo: os.path.abspath(psd)
-            for ifo, psd in self.production._previous_assets()
-            .get("calibration", {})
-            .items()
+            for ifo, psd in assets.get("calibration", {}).items()
         }
         if len(cals) > 0:
             command += ["--calibration"]
             for key, value in cals.items():
                 command += [f"{key}:{value}"]
 
-        return self._submit(command, dryrun)
+        return {
+            "command": command,
+            "labels": [label],
+            "cpus": cpus,
+            "incremental": False,
+            "reused": {},
+            "inputs": {
+                "samples": [sample_path],
+                "config": [configfile],
+                "psds": psds,
+                "calibration": cals,
+            },
+        }
 
     def _submit_subject_analysis(self, dryrun=False):
         """
@@ -324,6 +1078,30 @@ class PESummary(Pipeline):
         using ``summarypages --add_to_existing`` to append them in place
         rather than recombining everything from scratch.
         """
+        job = self._subject_analysis_job()
+
+        # Set before submitting (matching the single-analysis convention of
+        # treating "submitted" as "resolved"), so a later refresh's
+        # staleness check compares against what this run is about to
+        # process, and detect_completion_processing() knows which HDF5
+        # groups to expect once it finishes. Use what was actually
+        # submitted (previously-resolved names plus this round's labels),
+        # not current_names -- an analysis skipped in
+        # _subject_analysis_job (no samples yet) must stay unresolved, or
+        # it would never be considered "new" on a later refresh once its
+        # samples do appear, and detect_completion_processing() would
+        # expect an HDF5 group for it that will never exist.
+        self.production.resolved_dependencies = job["resolved"]
+
+        return self._submit(job, dryrun)
+
+    def _subject_analysis_job(self):
+        """
+        Assemble the ``summarypages`` command combining several analyses.
+
+        Returns the same dictionary as ``_single_analysis_job``, plus the
+        ``resolved`` analysis names to record once it is submitted.
+        """
         source_analyses = list(self.production.analyses)
         if not source_analyses:
             raise PipelineException(
@@ -335,28 +1113,68 @@ class PESummary(Pipeline):
         previous_names = self.production.resolved_dependencies
         webdir = self._webdir()
 
+        # The labels already on the page, and the expensive stages each has
+        # been through. The page's own metafile is the authority where it
+        # can be read: resolved_dependencies is recorded at submission, so
+        # it also lists the labels of a refresh which failed before writing
+        # its metafile (which would then never be added), and it is missing
+        # altogether for a page whose ledger entry lost it (which would then
+        # be rebuilt from scratch, rerunning every label's stages).
+        published, reused = previous_names, {}
+        options = self._preset_options()
+        if os.path.exists(os.path.join(webdir, "home.html")):
+            with self._timer.phase("page inventory"):
+                reused = stages.inventory(
+                    self.results()["metafile"], webdir, self.meta, options
+                )
+            if reused:
+                published = sorted(reused)
+        else:
+            published = None
+
+        # summarypages --add_to_existing refuses a label the page already
+        # holds, so a published label which hasn't been through a stage
+        # requested since can only be given it by rebuilding the page.
+        requested = set(stages.requested_stages(self.meta, options))
+        lacking = sorted(
+            label for label, done in (reused or {}).items()
+            if label in current_names and requested - set(done)
+        )
+        if lacking:
+            self.logger.info(
+                f"PESummary {self.production.name}: rebuilding the page, as "
+                f"{', '.join(lacking)} lack newly requested stages"
+            )
+
         incremental = bool(
-            previous_names is not None
-            and set(previous_names) <= set(current_names)
-            and set(current_names) - set(previous_names)
-            and os.path.exists(os.path.join(webdir, "home.html"))
+            published is not None
+            and not lacking
+            and set(published) <= set(current_names)
+            and set(current_names) - set(published)
         )
 
         if incremental:
+            # --add_to_existing carries the published labels' samples and
+            # derived products over from the existing metafile, and runs
+            # the per-label stages (spin evolution, precessing SNR,
+            # skymaps, ...) only for the labels passed to it.
             analyses_to_submit = [
                 analysis
                 for analysis in source_analyses
-                if analysis.name not in previous_names
+                if analysis.name not in published
             ]
         else:
             analyses_to_submit = source_analyses
+            reused = {}
 
         labels, approximants, f_lows, f_refs = [], [], [], []
         samples_list, config_list = [], []
         psds, cals = {}, {}
 
         for analysis in analyses_to_submit:
-            assets = analysis.pipeline.collect_assets()
+            with self._timer.phase("assets"):
+                assets = analysis.pipeline.collect_assets()
+            self._timer.count("asset lookups")
             samples = self._single_sample_path(assets.get("samples"))
             if not samples:
                 self.logger.warning(
@@ -381,9 +1199,11 @@ class PESummary(Pipeline):
             f_lows.append(str(min(waveform["minimum frequency"].values())))
             f_refs.append(str(waveform["reference frequency"]))
 
-            configfile = analysis.event.repository.find_prods(
-                analysis.name, analysis.category
-            )[0]
+            with self._timer.phase("config lookup"):
+                configfile = analysis.event.repository.find_prods(
+                    analysis.name, analysis.category
+                )[0]
+            self._timer.count("config lookups")
             config_list.append(
                 os.path.join(
                     analysis.event.repository.directory, analysis.category, configfile
@@ -413,7 +1233,8 @@ class PESummary(Pipeline):
         command += ["--f_low"] + f_lows
         command += ["--f_ref"] + f_refs
 
-        self._append_shared_options(command)
+        cpus = self._cpus(labels, samples_list)
+        self._append_shared_options(command, cpus)
 
         if any("nrsur" in approximant.lower() for approximant in approximants):
             command += ["--NRSur_fits"]
@@ -434,19 +1255,17 @@ class PESummary(Pipeline):
             for key, value in cals.items():
                 command += [f"{key}:{value}"]
 
-        # Set before submitting (matching the single-analysis convention of
-        # treating "submitted" as "resolved"), so a later refresh's
-        # staleness check compares against what this run is about to
-        # process, and detect_completion_processing() knows which HDF5
-        # groups to expect once it finishes. Use what was actually
-        # submitted (previously-resolved names plus this round's labels),
-        # not current_names -- an analysis skipped above (no samples yet)
-        # must stay unresolved, or it would never be considered "new" on a
-        # later refresh once its samples do appear, and
-        # detect_completion_processing() would expect an HDF5 group for it
-        # that will never exist.
-        self.production.resolved_dependencies = sorted(
-            set(previous_names or []) | set(labels)
-        )
-
-        return self._submit(command, dryrun)
+        return {
+            "command": command,
+            "labels": labels,
+            "cpus": cpus,
+            "incremental": incremental,
+            "inputs": {
+                "samples": samples_list,
+                "config": config_list,
+                "psds": psds,
+                "calibration": cals,
+            },
+            "reused": reused or {},
+            "resolved": sorted(set(published or []) | set(labels)),
+        }
@@ -0,0 +1,298 @@
+"""
+Plan PESummary submissions without making them.
+
+``submit_dag(dryrun=True)`` prints what a single production would run, but
+still writes its job script and (for a ``SubjectAnalysis``) records the
+analyses it combined as resolved. Forecasting a campaign-wide rerun needs
+the same information for every PESummary production in a ledger, in a
+form which can be totalled and exported. :meth:`PESummary.plan` returns a
+:class:`SubmissionPlan` for one production, and :func:`plan_ledger` collects
+them for a whole project, e.g.::
+
+    from asimov import current_ledger
+    from asimov_pesummary.planning import plan_ledger, to_json
+
+    print(to_json(plan_ledger(current_ledger)))
+"""
+
+import json
+import os
+
+
+class SubmissionPlan:
+    """
+    What submitting one PESummary production would do.
+
+    Parameters
+    ----------
+    event : str
+        The name of the production's event.
+    production : str
+        The name of the production.
+    command : list, optional
+        The full command line, executable first.
+    resources : dict, optional
+        The resources which would be requested from the scheduler.
+    inputs : dict, optional
+        The files which would be read, with their sizes in bytes (``None``
+        for a file which doesn't exist yet).
+    labels : list, optional
+        The labels which would be summarised.
+    incremental : bool, optional
+        Whether this would add to an existing page rather than build it
+        from scratch.
+    reused : dict, optional
+        For an incremental refresh, the expensive stages (e.g. spin
+        evolution, skymaps) each label already on the page has been
+        through, which aren't rerun.
+    estimated_cost : dict, optional
+        The estimated cost of the job (see :func:`estimate_cost`).
+    error : str, optional
+        Why this production can't be submitted, if it can't.
+    """
+
+    def __init__(
+        self,
+        event,
+        production,
+        command=None,
+        resources=None,
+        inputs=None,
+        labels=None,
+        incremental=False,
+        reused=None,
+        estimated_cost=None,
+        error=None,
+    ):
+        self.event = event
+        self.production = production
+        self.command = command or []
+        self.resources = resources or {}
+        self.inputs = inputs or {}
+        self.labels = labels or []
+        self.incremental = incremental
+        self.reused = reused or {}
+        self.estimated_cost = estimated_cost or {}
+        self.error = error
+
+    def __repr__(self):
+        return f"<SubmissionPlan {self.event}/{self.production}>"
+
+    @classmethod
+    def from_job(cls, pipeline, job, submit_description, sizes=None):
+        """
+        Build a plan from an assembled PESummary job.
+
+        Parameters
+        ----------
+        pipeline : :class:`asimov_pesummary.pesummary.PESummary`
+            The pipeline the job was assembled by.
+        job : dict
+            The job, as returned by ``PESummary._job()``.
+        submit_description : dict
+            The submit description the job would be submitted with.
+        sizes : dict, optional
+            A cache of file sizes, shared between plans so that files used
+            by several productions (e.g. PSDs) are only looked up once.
+        """
+        sizes = {} if sizes is None else sizes
+        inputs = {}
+        for kind, paths in job["inputs"].items():
+            if isinstance(paths, dict):
+                inputs[kind] = {
+                    key: _sized(path, sizes) for key, path in paths.items()
+                }
+            else:
+                inputs[kind] = [_sized(path, sizes) for path in paths]
+
+        resources = {
+            key: value
+            for key, value in submit_description.items()
+            if key.startswith(("request_", "accounting_group")) or key == "priority"
+        }
+        sample_bytes = sum(entry["bytes"] or 0 for entry in inputs.get("samples", []))
+        return cls(
+            event=pipeline.production.event.name,
+            production=pipeline.production.name,
+            # As the scheduler splits them: the profiling launcher's
+            # arguments too, when the job is profiled.
+            command=[
+                submit_description["executable"],
+                *submit_description["arguments"].split(),
+            ],
+            resources=resources,
+            inputs=inputs,
+            labels=list(job["labels"]),
+            incremental=job["incremental"],
+            reused=dict(job.get("reused", {})),
+            estimated_cost=estimate_cost(
+                len(job["labels"]),
+                sample_bytes,
+                cpus=submit_description.get("request_cpus", 1),
+                skymap_samples=pipeline.meta.get("skymap samples"),
+            ),
+        )
+
+    def to_dict(self):
+        """Return this plan as a JSON-serialisable dictionary."""
+        return {
+            "event": self.event,
+            "production": self.production,
+            "command": self.command,
+            "resources": self.resources,
+            "inputs": self.inputs,
+            "labels": self.labels,
+            "incremental": self.incremental,
+            "reused": self.reused,
+            "estimated_cost": self.estimated_cost,
+            "error": self.error,
+        }
+
+
+def _sized(path, sizes):
+    if path not in sizes:
+        try:
+            sizes[path] = os.stat(path).st_size
+        except (OSError, TypeError):
+            sizes[path] = None
+    return {"path": path, "bytes": sizes[path]}
+
+
+#: Rough CPU-hours per label summarised (conversions, plots, pages).
+CPU_HOURS_PER_LABEL = 0.25
+#: Rough additional CPU-hours per GiB of input samples.
+CPU_HOURS_PER_GIB = 0.5
+#: Rough additional CPU-hours per label per 1000 skymap samples.
+CPU_HOURS_PER_1000_SKYMAP_SAMPLES = 0.1
+
+
+def estimate_cost(labels, sample_bytes, cpus=1, skymap_samples=None):
+    """
+    Estimate the cost of a summarypages job.
+
+    This is a deliberately simple linear model, intended for comparing
+    and totalling many jobs rather than predicting any one of them; its
+    coefficients are the module-level ``CPU_HOURS_*`` constants.
+
+    Parameters
+    ----------
+    labels : int
+        The number of labels the job summarises.
+    sample_bytes : int
+        The total size of the input sample files.
+    cpus : int, optional
+        The number of CPUs the job would request.
+    skymap_samples : int, optional
+        The number of samples used to build each skymap.
+
+    Returns
+    -------
+    dict
+        The estimated ``cpu_hours`` and ``wall_hours``.
+    """
+    cpu_hours = labels * CPU_HOURS_PER_LABEL
+    cpu_hours += sample_bytes / 2**30 * CPU_HOURS_PER_GIB
+    if skymap_samples:
+        cpu_hours += (
+            labels * int(skymap_samples) / 1000 * CPU_HOURS_PER_1000_SKYMAP_SAMPLES
+        )
+    try:
+        cpus = max(int(cpus), 1)
+    except (TypeError, ValueError):
+        cpus = 1
+    return {
+        "cpu_hours": round(cpu_hours, 4),
+        "wall_hours": round(cpu_hours / cpus, 4),
+    }
+
+
+def plan_productions(productions):
+    """
+    Plan every PESummary production in an iterable of productions.
+
+    Productions using other pipelines are skipped. A production which
+    can't currently be submitted (e.g. its upstream samples don't exist
+    yet, or its configuration is missing a section or holds a bad value)
+    gets a plan with its ``error`` set, rather than stopping the whole
+    plan.
+
+    Parameters
+    ----------
+    productions : iterable of :class:`asimov.analysis.Analysis`
+
+    Returns
+    -------
+    list of :class:`SubmissionPlan`
+    """
+    import configparser
+
+    from .pesummary import PESummary
+    from asimov.pipeline import PipelineException
+
+    sizes = {}
+    plans = []
+    for production in productions:
+        pipeline = getattr(production, "pipeline", None)
+        if not isinstance(pipeline, PESummary):
+            continue
+        try:
+            job = pipeline._job()
+            plans.append(
+                SubmissionPlan.from_job(
+                    pipeline, job, pipeline._submit_description(job), sizes=sizes
+                )
+            )
+        except (PipelineException, KeyError, ValueError, configparser.Error) as error:
+            plans.append(
+                SubmissionPlan(
+                    event=production.event.name,
+                    production=production.name,
+                    error=str(error),
+                )
+            )
+    return plans
+
+
+def plan_ledger(ledger):
+    """
+    Plan every PESummary production in a project's ledger.
+
+    Parameters
+    ----------
+    ledger : :class:`asimov.ledger.Ledger`
+
+    Returns
+    -------
+    list of :class:`SubmissionPlan`
+    """
+    return plan_productions(ledger.get_productions())
+
+
+def to_json(plans, indent=2):
+    """
+    Serialise plans, with their totals, to JSON.
+
+    Parameters
+    ----------
+    plans : list of :class:`SubmissionPlan`
+    indent : int, optional
+        Passed to :func:`json.dumps`.
+
+    Returns
+    -------
+    str
+    """
+    plannable = [plan for plan in plans if not plan.error]
+    totals = {
+        "productions": len(plans),
+        "errors": len(plans) - len(plannable),
+        "labels": sum(len(plan.labels) for plan in plannable),
+        "cpu_hours": round(
+            sum(plan.estimated_cost.get("cpu_hours", 0) for plan in plannable), 4
+        ),
+    }
+    return json.dumps(
+        {"totals": totals, "plans": [plan.to_dict() for plan in plans]},
+        indent=indent,
+        default=str,
+    )
@@ -0,0 +1,233 @@
+"""
+Run a ``summarypages`` job under a profiler.
+
+Setting ``profile`` in a production's ``postprocessing.pesummary`` block
+makes its job run this launcher rather than ``summarypages`` itself, so a
+slow page can be investigated on the inputs it was actually built from::
+
+    python -m asimov_pesummary.profiling --profiler cprofile \\
+        --python <environment>/bin/python --output-dir <working directory> \\
+        --prefix pesummary_<production> \\
+        -- <environment>/bin/summarypages --webdir ... --samples ...
+
+The launcher runs ``summarypages`` in a child process and writes, beside
+the job's logs (each name starting with ``--prefix``, which for a
+production's job names the production, as the productions of an event
+share its working directory):
+
+``pesummary_<production>_profile.prof``
+    With ``profile: cprofile`` (or ``true``), the ``cProfile`` statistics
+    of the main ``summarypages`` process, for ``pstats`` or ``snakeviz``.
+    Plotting worker processes started for ``--multi_process`` are not
+    included.
+``pesummary_<production>_profile.speedscope.json``
+    With ``profile: py-spy``, a sampling profile of ``summarypages`` and
+    all of its worker processes, for https://www.speedscope.app. ``py-spy``
+    must be installed where the job runs: in the environment beside
+    ``--python``, or on the ``PATH``.
+``pesummary_<production>_profile.json``
+    The wall-clock and CPU time, the peak resident memory of the largest
+    process, the exit code and, for ``cProfile``, the functions with the
+    most cumulative time.
+
+The launcher exits with ``summarypages``' own exit code.
+"""
+
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import time
+
+PROFILERS = ("cprofile", "py-spy")
+
+#: The number of functions listed in the summary.
+TOP_FUNCTIONS = 25
+
+
+def artifacts(directory, profiler, prefix="pesummary"):
+    """
+    The files a job profiled with ``profiler`` writes into ``directory``,
+    their names starting with ``prefix``.
+
+    Returns
+    -------
+    dict
+        The path of the ``summary``, and of the profiler's own output under
+        the profiler's name.
+    """
+    paths = {"summary": os.path.join(directory, f"{prefix}_profile.json")}
+    if profiler == "cprofile":
+        paths["cprofile"] = os.path.join(directory, f"{prefix}_profile.prof")
+    else:
+        paths["py-spy"] = os.path.join(
+            directory, f"{prefix}_profile.speedscope.json"
+        )
+    return paths
+
+
+def launcher_arguments(
+    profiler, python, executable, arguments, directory, prefix="pesummary"
+):
+    """
+    The arguments which run this launcher on a ``summarypages`` command.
+
+    Parameters
+    ----------
+    profiler : str
+        One of :data:`PROFILERS`.
+    python : str
+        The Python interpreter of the environment ``summarypages`` is
+        installed in.
+    executable : str
+        The ``summarypages`` executable.
+    arguments : list
+        Its arguments.
+    directory : str
+        Where to write the profile.
+    prefix : str, optional
+        What the profile's file names start with (see :func:`artifacts`).
+
+    Returns
+    -------
+    list
+        Arguments for the Python interpreter this plugin is installed in.
+    """
+    return [
+        "-m", "asimov_pesummary.profiling",
+        "--profiler", profiler,
+        "--python", python,
+        "--output-dir", directory,
+        "--prefix", prefix,
+        "--", executable, *arguments,
+    ]
+
+
+#: Runs a script under ``cProfile``. ``python -m cProfile`` is not used as
+#: it swallows the script's exit code, and with it the job's failure.
+_CPROFILE = """
+import cProfile, runpy, sys
+output, sys.argv = sys.argv[1], sys.argv[2:]
+profiler, code = cProfile.Profile(), 0
+try:
+    profiler.runcall(runpy.run_path, sys.argv[0], run_name="__main__")
+except SystemExit as exit:
+    code = exit.code
+finally:
+    profiler.dump_stats(output)
+sys.exit(code)
+"""
+
+
+def _py_spy(python):
+    """The ``py-spy`` in ``python``'s environment or on the ``PATH``, if any."""
+    beside = os.path.join(os.path.dirname(python), "py-spy")
+    if os.access(beside, os.X_OK):
+        return beside
+    return shutil.which("py-spy")
+
+
+def _command(profiler, python, executable, arguments, paths):
+    if profiler == "cprofile":
+        return [python, "-c", _CPROFILE, paths["cprofile"], executable, *arguments]
+    return [
+        _py_spy(python), "record", "--subprocesses",
+        "--format", "speedscope", "--output", paths["py-spy"],
+        "--", python, executable, *arguments,
+    ]
+
+
+def top_functions(path, limit=TOP_FUNCTIONS):
+    """
+    The functions with the most cumulative time in a ``cProfile`` file.
+
+    Returns
+    -------
+    list
+        ``{"function", "calls", "total", "cumulative"}`` dictionaries, most
+        cumulative time first.
+    """
+    import pstats
+
+    stats = pstats.Stats(path).stats
+    rows = sorted(stats.items(), key=lambda item: -item[1][3])[:limit]
+    return [
+        {
+            "function": f"{filename}:{line}({name})",
+            "calls": calls,
+            "total": round(total, 6),
+            "cumulative": round(cumulative, 6),
+        }
+        for (filename, line, name), (_, calls, total, cumulative, _) in rows
+    ]
+
+
+def run(profiler, python, executable, arguments, directory, prefix="pesummary"):
+    """
+    Run ``summarypages`` under ``profiler`` and write the summary.
+
+    Returns
+    -------
+    int
+        The exit code of ``summarypages``, or 127 if the profiler isn't
+        installed.
+    """
+    if profiler == "py-spy" and _py_spy(python) is None:
+        print(
+            f"py-spy is not installed beside {python} or on the PATH; "
+            "summarypages was not run.",
+            file=sys.stderr,
+        )
+        return 127
+    os.makedirs(directory, exist_ok=True)
+    paths = artifacts(directory, profiler, prefix)
+    start = time.perf_counter()
+    returncode = subprocess.call(
+        _command(profiler, python, executable, arguments, paths)
+    )
+    wall = time.perf_counter() - start
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    summary = {
+        "profiler": profiler,
+        "command": [executable, *arguments],
+        "returncode": returncode,
+        "wall": round(wall, 3),
+        "user cpu": round(usage.ru_utime, 3),
+        "system cpu": round(usage.ru_stime, 3),
+        # Kilobytes on Linux, bytes on macOS.
+        "peak memory": usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024),
+        "artifacts": paths,
+    }
+    if profiler == "cprofile" and os.path.exists(paths["cprofile"]):
+        try:
+            summary["top"] = top_functions(paths["cprofile"])
+        except Exception as error:
+            summary["top"] = f"Could not read the profile: {error}"
+    with open(paths["summary"], "w") as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    return returncode
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Run summarypages under a profiler."
+    )
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile")
+    parser.add_argument("--python", default=sys.executable)
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--prefix", default="pesummary")
+    parser.add_argument("executable")
+    parser.add_argument("arguments", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    return run(
+        args.profiler, args.python, args.executable, args.arguments,
+        args.output_dir, args.prefix,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
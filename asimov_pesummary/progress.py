@@ -0,0 +1,251 @@
+"""
+Follow a running ``summarypages`` job through its log.
+
+``summarypages`` logs each of its stages as it reaches it -- converting
+each label's samples, making plots, writing the web pages and then the
+metafile -- to its standard error, which PESummary's jobs write to
+``pesummary.err`` in the event's working directory. A
+:class:`ProgressLog` reads that log incrementally: it remembers how far it
+has read (in a small JSON file beside the log), so each monitor pass reads
+only what was written since the last, and turns the stage transitions it
+finds into per-stage, per-label timings, an estimate of how far through
+the job is, and when it will finish.
+
+The log's timestamps are to the second, and so are the timings.
+"""
+
+import datetime
+import json
+import os
+import re
+
+_LINE = re.compile(
+    r"^(?P<time>\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}) PESummary \w+\s*: (?P<message>.*)$"
+)
+
+#: The messages which begin (or, for ``None``, end) each stage. A stage
+#: also ends when the next begins. ``label`` groups name the label the
+#: stage is working on. ``summarypages`` logs the per-label plot markers,
+#: and the comparison plots, at DEBUG, so only with ``--verbose``; without
+#: it the plots are timed as one stage.
+_MARKERS = [
+    (re.compile(r"^Command line arguments: "), "setup"),
+    (re.compile(r"^Assigning (?P<label>\S+) to "), "conversion"),
+    (re.compile(r"^Starting to generate plots for (?P<label>\S+)"), "plots"),
+    (re.compile(r"^Starting to generate plots"), "plots"),
+    (re.compile(r"^Starting to generate comparison plots"), "comparison plots"),
+    (re.compile(r"^Finished generating plots"), None),
+    (re.compile(r"^Starting to generate webpages"), "webpages"),
+    (re.compile(r"^Finished generating webpages"), None),
+    (re.compile(r"^Starting to generate the meta file"), "metafile"),
+    (re.compile(r"^Finish(ed|ing) generating the meta file"), None),
+]
+
+_COMPLETE = re.compile(r"^Complete\. ")
+_LABELS = re.compile(r"labels=\[(?P<labels>[^\]]*)\]")
+
+#: Roughly what share of a job each stage takes, used to estimate
+#: progress. Plotting dominates; see ``benchmarks/incremental_refresh.py``.
+STAGE_WEIGHTS = {
+    "setup": 0.02,
+    "conversion": 0.08,
+    "plots": 0.8,
+    "comparison plots": 0.0,
+    "webpages": 0.04,
+    "metafile": 0.06,
+}
+
+
+def _timestamp(text):
+    return datetime.datetime.strptime(
+        " ".join(text.split()), "%Y-%m-%d %H:%M:%S"
+    ).timestamp()
+
+
+class ProgressLog:
+    """
+    The progress of one ``summarypages`` job, read from its log.
+
+    Parameters
+    ----------
+    path : str
+        The job's log (``pesummary.err``).
+    state_path : str, optional
+        Where to keep the read offset and parsed stages between calls; by
+        default beside the log, as ``<log>.progress.json``.
+    """
+
+    def __init__(self, path, state_path=None):
+        self.path = path
+        self.state_path = state_path or f"{path}.progress.json"
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.offset = 0
+        self.partial = ""
+        self.labels = []
+        self.stages = []
+        self.current = None
+        self.started = None
+        self.last = None
+        self.complete = False
+
+    def _load(self):
+        try:
+            with open(self.state_path) as state_file:
+                state = json.load(state_file)
+        except (OSError, ValueError):
+            return
+        for key in ("offset", "partial", "labels", "stages", "current",
+                    "started", "last", "complete"):
+            if key in state:
+                setattr(self, key, state[key])
+
+    def forget(self):
+        """Discard everything read so far, e.g. when the job is resubmitted."""
+        self._reset()
+        try:
+            os.remove(self.state_path)
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        """Write the read offset and parsed stages, atomically."""
+        temporary = f"{self.state_path}.tmp"
+        with open(temporary, "w") as state_file:
+            json.dump(
+                {
+                    "offset": self.offset,
+                    "partial": self.partial,
+                    "labels": self.labels,
+                    "stages": self.stages,
+                    "current": self.current,
+                    "started": self.started,
+                    "last": self.last,
+                    "complete": self.complete,
+                },
+                state_file,
+            )
+        os.replace(temporary, self.state_path)
+
+    def update(self):
+        """
+        Read whatever has been written to the log since the last update.
+
+        Returns
+        -------
+        int
+            The number of bytes read.
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0
+        if size < self.offset:
+            # The log was truncated or replaced -- the job was resubmitted.
+            self._reset()
+        if size == self.offset:
+            return 0
+        with open(self.path, "rb") as log:
+            log.seek(self.offset)
+            data = log.read(size - self.offset)
+        self.offset = size
+        lines = (self.partial + data.decode(errors="replace")).split("\n")
+        self.partial = lines.pop()
+        for line in lines:
+            self._parse(line)
+        return len(data)
+
+    def _begin(self, stage, label, time):
+        self._end(time)
+        self.current = {"stage": stage, "label": label, "start": time}
+
+    def _end(self, time):
+        if self.current is not None:
+            self.stages.append(
+                dict(self.current, end=time, seconds=time - self.current["start"])
+            )
+            self.current = None
+
+    def _parse(self, line):
+        match = _LINE.match(line.rstrip("\r"))
+        if not match:
+            return
+        time, message = _timestamp(match["time"]), match["message"]
+        if self.started is None:
+            self.started = time
+        self.last = time
+        if not self.labels:
+            labels = _LABELS.search(message)
+            if labels:
+                self.labels = re.findall(r"'([^']*)'", labels["labels"])
+        if _COMPLETE.match(message):
+            self._end(time)
+            self.complete = True
+            return
+        for pattern, stage in _MARKERS:
+            marker = pattern.match(message)
+            if marker:
+                if stage is None:
+                    self._end(time)
+                else:
+                    self._begin(stage, marker.groupdict().get("label"), time)
+                return
+
+    def timings(self):
+        """
+        Return the time spent in each finished stage.
+
+        Returns
+        -------
+        dict
+            Seconds per stage, and for stages run label by label, a
+            ``"labels"`` dictionary of seconds per label.
+        """
+        timings = {}
+        for entry in self.stages:
+            stage = timings.setdefault(entry["stage"], {"seconds": 0})
+            stage["seconds"] += entry["seconds"]
+            if entry["label"]:
+                labels = stage.setdefault("labels", {})
+                labels[entry["label"]] = labels.get(entry["label"], 0) + entry["seconds"]
+        return timings
+
+    def progress(self, now=None):
+        """
+        Estimate how far through the job is.
+
+        Parameters
+        ----------
+        now : float, optional
+            The current time, as a UNIX timestamp; by default, now.
+
+        Returns
+        -------
+        dict
+            The current ``stage`` (and ``label``, if any), the estimated
+            ``fraction`` complete, the ``elapsed`` seconds and the
+            estimated seconds remaining (``eta``; ``None`` until there is
+            enough to go on).
+        """
+        now = datetime.datetime.now().timestamp() if now is None else now
+        if self.complete:
+            return {"stage": "complete", "label": None, "fraction": 1.0,
+                    "elapsed": (self.last or now) - (self.started or now), "eta": 0}
+        stage = label = None
+        if self.current is not None:
+            stage, label = self.current["stage"], self.current["label"]
+        done = {entry["stage"] for entry in self.stages} - {stage}
+        fraction = sum(STAGE_WEIGHTS.get(name, 0) for name in done)
+        if label in self.labels:
+            # Per-label stages run in label order, so the labels before
+            # this one are done.
+            fraction += (
+                STAGE_WEIGHTS.get(stage, 0) * self.labels.index(label) / len(self.labels)
+            )
+        fraction = min(fraction, 0.99)
+        elapsed = now - self.started if self.started is not None else 0
+        eta = elapsed * (1 - fraction) / fraction if fraction > 0 and elapsed else None
+        return {"stage": stage, "label": label, "fraction": fraction,
+                "elapsed": elapsed, "eta": eta}
@@ -0,0 +1,363 @@
+"""
+Cheap access to PESummary's output metafile.
+
+The metafile (``samples/posterior_samples.h5``) holds every label's full
+posterior, and is routinely hundreds of megabytes. Most of what asimov
+needs from it -- whether a job has finished, which labels a page holds --
+is in the file's structure rather than its data, and can be read from the
+HDF5 metadata alone; what it does need from the samples can be read a
+parameter at a time through a :class:`MetafileHandle`.
+"""
+
+import json
+import os
+
+from asimov import logger
+
+#: A top-level group PESummary writes into every metafile it completes.
+COMPLETION_MARKER = "history"
+
+#: The quantiles reported by :meth:`MetafileHandle.summary`: the median and
+#: the bounds of the 90% credible interval.
+QUANTILES = {"lower": 0.05, "median": 0.5, "upper": 0.95}
+
+#: The summary statistics sidecar's file name, beside the metafile.
+SUMMARY_FILENAME = "summary_statistics.json"
+
+_GROUPS = {}
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def metafile_groups(path):
+    """
+    Return the names of the top-level groups in a metafile.
+
+    Only the file's metadata is read; no samples are loaded. The result is
+    cached against the file's modification time and size, so polling an
+    unchanged metafile doesn't reopen it.
+
+    Parameters
+    ----------
+    path : str
+        The path to the metafile.
+
+    Returns
+    -------
+    frozenset or None
+        The group names, or ``None`` if the file doesn't exist or can't
+        (yet) be read as HDF5 -- e.g. while PESummary is still writing it.
+    """
+    signature = _signature(path)
+    if signature is None:
+        _GROUPS.pop(path, None)
+        return None
+    cached = _GROUPS.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    import h5py
+
+    try:
+        with h5py.File(path, "r") as metafile:
+            groups = frozenset(metafile.keys())
+    except (OSError, KeyError) as error:
+        logger.debug(f"Could not read metafile {path}: {error}")
+        return None
+    _GROUPS[path] = (signature, groups)
+    return groups
+
+
+def _decode(value):
+    """Turn a small metadata dataset's contents into plain Python values."""
+    if isinstance(value, bytes):
+        return value.decode()
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+    if isinstance(value, list):
+        value = [_decode(item) for item in value]
+        return value[0] if len(value) == 1 else value
+    return value
+
+
+class MetafileHandle:
+    """
+    A lazy, read-only view of a PESummary metafile.
+
+    Opening a handle reads nothing; the file itself is only opened on first
+    use, and each accessor reads just what it returns. In particular
+    :meth:`samples` reads one parameter's column rather than every label's
+    full posterior, so a catalog job which needs, say, ``chirp_mass`` for
+    every event reads kilobytes per event rather than the whole file.
+
+    Can be used as a context manager, which closes the file on exit.
+
+    Parameters
+    ----------
+    path : str
+        The path to the metafile.
+    """
+
+    #: Top-level groups which hold provenance rather than a label's results.
+    RESERVED_GROUPS = frozenset({COMPLETION_MARKER, "version"})
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"<MetafileHandle {self.path}>"
+
+    @property
+    def file(self):
+        """The underlying ``h5py.File``, opened on first access."""
+        if self._file is None:
+            import h5py
+
+            self._file = h5py.File(self.path, "r")
+        return self._file
+
+    def close(self):
+        """Close the file and release any memory maps."""
+        self._maps.clear()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def labels(self):
+        """The labels (analyses) whose results the metafile holds."""
+        return [
+            name
+            for name, group in self.file.items()
+            if name not in self.RESERVED_GROUPS and "posterior_samples" in group
+        ]
+
+    def _posterior(self, label):
+        try:
+            return self.file[label]["posterior_samples"]
+        except KeyError:
+            raise KeyError(f"{self.path} has no posterior samples for {label!r}")
+
+    def parameters(self, label):
+        """The names of the parameters sampled for ``label``."""
+        return list(self._posterior(label).dtype.names)
+
+    def num_samples(self, label):
+        """The number of posterior samples held for ``label``."""
+        return self._posterior(label).shape[0]
+
+    def _map(self, label):
+        """
+        Return a memory map of ``label``'s posterior samples, or ``None``
+        if they are stored chunked or compressed and so can't be mapped.
+        """
+        if label not in self._maps:
+            dataset = self._posterior(label)
+            offset = dataset.id.get_offset()
+            mapped = None
+            if dataset.chunks is None and offset is not None:
+                import numpy
+
+                mapped = numpy.memmap(
+                    self.path,
+                    dtype=dataset.dtype,
+                    mode="r",
+                    offset=offset,
+                    shape=dataset.shape,
+                )
+            self._maps[label] = mapped
+        return self._maps[label]
+
+    def samples(self, label, parameter, rows=None):
+        """
+        Read one parameter's posterior samples.
+
+        PESummary stores each label's posterior as a single compound
+        dataset. Where that is contiguous (PESummary's default) it is
+        memory-mapped, so only the pages holding the requested rows are
+        read; otherwise only the requested field is read, via HDF5's
+        partial compound I/O.
+
+        Parameters
+        ----------
+        label : str
+            The label to read.
+        parameter : str
+            The parameter to read.
+        rows : slice or array-like, optional
+            The samples to read; all of them by default.
+
+        Returns
+        -------
+        numpy.ndarray
+            The samples.
+        """
+        if parameter not in self.parameters(label):
+            raise KeyError(f"{label!r} in {self.path} has no parameter {parameter!r}")
+        rows = slice(None) if rows is None else rows
+        mapped = self._map(label)
+        if mapped is not None:
+            return mapped[parameter][rows]
+        return self._posterior(label).fields(parameter)[rows]
+
+    def statistics(self, label, quantiles=(0.05, 0.5, 0.95)):
+        """
+        Summarise every parameter of ``label``'s posterior.
+
+        The whole posterior is read once and summarised with a single
+        vectorised pass, rather than one read and one pass per parameter.
+
+        Parameters
+        ----------
+        label : str
+            The label to summarise.
+        quantiles : tuple of float, optional
+            The quantiles to compute; by default the median and the bounds
+            of the 90% credible interval.
+
+        Returns
+        -------
+        dict
+            A dictionary keyed by parameter, each holding ``"mean"``,
+            ``"std"`` and ``"quantiles"`` (in the order requested).
+        """
+        import numpy
+        from numpy.lib.recfunctions import structured_to_unstructured
+
+        mapped = self._map(label)
+        posterior = mapped if mapped is not None else self._posterior(label)[()]
+        names = list(posterior.dtype.names)
+        samples = structured_to_unstructured(posterior, dtype=float, copy=False)
+        if samples.shape[0] == 0:
+            return {}
+        values = numpy.quantile(samples, quantiles, axis=0)
+        means = samples.mean(axis=0)
+        stds = samples.std(axis=0)
+        return {
+            name: {
+                "mean": float(means[column]),
+                "std": float(stds[column]),
+                "quantiles": [float(value) for value in values[:, column]],
+            }
+            for column, name in enumerate(names)
+        }
+
+    def summary(self, label):
+        """
+        Return the median, 90% credible interval, mean and standard
+        deviation of each of ``label``'s parameters, as a dictionary keyed
+        by parameter.
+        """
+        return {
+            parameter: {
+                **dict(zip(QUANTILES, statistics["quantiles"])),
+                "mean": statistics["mean"],
+                "std": statistics["std"],
+            }
+            for parameter, statistics in self.statistics(
+                label, tuple(QUANTILES.values())
+            ).items()
+        }
+
+    def psds(self, label):
+        """
+        Return the PSDs used for ``label``, as a dictionary of
+        ``(frequency, psd)`` arrays keyed by interferometer.
+        """
+        group = self.file[label].get("psds", {})
+        return {ifo: group[ifo][()] for ifo in group}
+
+    def config(self, label):
+        """
+        Return the configuration ``label`` was run with, as a dictionary of
+        sections, each a dictionary of options.
+        """
+        group = self.file[label].get("config_file", {})
+        return {
+            section: {key: _decode(group[section][key][()]) for key in group[section]}
+            for section in group
+        }
+
+
+def summary_statistics_path(metafile):
+    """The summary statistics sidecar written beside ``metafile``."""
+    return os.path.join(os.path.dirname(metafile), SUMMARY_FILENAME)
+
+
+def read_summary_statistics(metafile):
+    """
+    Read each label's summary statistics from a metafile's sidecar.
+
+    Parameters
+    ----------
+    metafile : str
+        The path to the metafile.
+
+    Returns
+    -------
+    dict or None
+        Each label's :meth:`MetafileHandle.summary`, keyed by label, or
+        ``None`` if there is no sidecar, or it was computed from an earlier
+        version of the metafile.
+    """
+    signature = _signature(metafile)
+    if signature is None:
+        return None
+    try:
+        with open(summary_statistics_path(metafile)) as sidecar:
+            contents = json.load(sidecar)
+    except (OSError, ValueError):
+        return None
+    if contents.get("metafile") != {"mtime_ns": signature[0], "size": signature[1]}:
+        return None
+    return contents.get("labels")
+
+
+def write_summary_statistics(metafile):
+    """
+    Write a small JSON summary of every label in a metafile beside it.
+
+    The sidecar holds each label's :meth:`MetafileHandle.summary`, and the
+    modification time and size of the metafile it was computed from; it
+    is only rewritten when the metafile has changed since. It is written
+    atomically, so anything polling it never sees a partial file.
+
+    Parameters
+    ----------
+    metafile : str
+        The path to the metafile.
+
+    Returns
+    -------
+    str
+        The path to the sidecar.
+    """
+    path = summary_statistics_path(metafile)
+    signature = _signature(metafile)
+    if signature is None:
+        raise FileNotFoundError(metafile)
+    if read_summary_statistics(metafile) is not None:
+        return path
+    source = {"mtime_ns": signature[0], "size": signature[1]}
+
+    with MetafileHandle(metafile) as handle:
+        labels = {label: handle.summary(label) for label in handle.labels}
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as sidecar:
+        json.dump({"metafile": source, "labels": labels}, sidecar)
+    os.replace(temporary, path)
+    return path
@@ -0,0 +1,125 @@
+"""
+The expensive derived products a summary page holds for each label.
+
+Beyond plotting, the costly parts of a ``summarypages`` run are the
+optional per-label stages switched on from ``postprocessing.pesummary``:
+spin evolution, precessing SNR, regenerated posteriors and skymaps. Each
+leaves a recognisable product behind -- new parameters in the label's
+posterior, or a skymap beside the metafile -- so which stages a published
+label has already been through can be read from the page itself.
+
+``summarypages --add_to_existing`` carries an existing label's samples,
+PSDs and skymap over from the existing metafile, and runs the per-label
+stages only for the labels it is given. ``PESummary`` uses this inventory
+to decide which labels a refresh must pass (see
+``PESummary._subject_analysis_job``), and reports which stages each
+existing label reuses.
+"""
+
+import os
+
+from .results import MetafileHandle, metafile_groups
+
+#: The posterior parameters each spin evolution and SNR stage adds.
+_PARAMETERS = {
+    "evolve spins forwards": {"tilt_1_evolved", "tilt_2_evolved"},
+    "evolve spins backwards": {
+        "tilt_1_infinity_only_prec_avg",
+        "tilt_2_infinity_only_prec_avg",
+    },
+    "precessing snr": {"network_precessing_snr"},
+}
+
+
+def requested_stages(meta, options=()):
+    """
+    Return the expensive stages a ``postprocessing.pesummary`` block asks
+    for.
+
+    Parameters
+    ----------
+    meta : dict
+        The production's ``postprocessing.pesummary`` settings.
+    options : list, optional
+        Further ``summarypages`` flags the job is run with (e.g. a
+        preset's); ``--no_ligo_skymap`` means no skymap is made, whatever
+        ``skymap samples`` says.
+
+    Returns
+    -------
+    dict
+        The requested stages, each mapped to the posterior parameters it
+        produces (empty for stages whose product is a file).
+    """
+    stages = {}
+    evolve = meta.get("evolve spins", [])
+    if "forwards" in evolve:
+        stages["evolve spins forwards"] = _PARAMETERS["evolve spins forwards"]
+    if "backwards" in evolve:
+        stages["evolve spins backwards"] = _PARAMETERS["evolve spins backwards"]
+    if "precessing snr" in meta.get("calculate", []):
+        stages["precessing snr"] = _PARAMETERS["precessing snr"]
+    if meta.get("regenerate") and meta.get("regenerate posteriors"):
+        stages["regenerate"] = set(meta["regenerate posteriors"])
+    if "skymap samples" in meta and "--no_ligo_skymap" not in options:
+        stages["skymap"] = set()
+    return stages
+
+
+def skymap_path(webdir, label):
+    """The skymap ``summarypages`` writes for ``label``."""
+    return os.path.join(webdir, "samples", f"{label}_skymap.fits")
+
+
+def published_labels(metafile):
+    """
+    Return the labels an existing page's metafile holds, or ``None`` if
+    there is no readable metafile. Only the file's structure is read.
+    """
+    groups = metafile_groups(metafile)
+    if groups is None:
+        return None
+    return sorted(groups - MetafileHandle.RESERVED_GROUPS)
+
+
+def inventory(metafile, webdir, meta, options=()):
+    """
+    Find which requested stages each published label has been through.
+
+    Parameters
+    ----------
+    metafile : str
+        The page's metafile.
+    webdir : str
+        The page's web directory.
+    meta : dict
+        The production's ``postprocessing.pesummary`` settings.
+    options : list, optional
+        Further ``summarypages`` flags; see :func:`requested_stages`.
+
+    Returns
+    -------
+    dict or None
+        The completed stages for each label in the metafile, or ``None``
+        if there is no readable metafile.
+    """
+    labels = published_labels(metafile)
+    if labels is None:
+        return None
+    stages = requested_stages(meta, options)
+    if not stages:
+        return {label: [] for label in labels}
+    completed = {}
+    with MetafileHandle(metafile) as handle:
+        for label in labels:
+            try:
+                parameters = set(handle.parameters(label))
+            except KeyError:
+                parameters = set()
+            completed[label] = sorted(
+                stage
+                for stage, products in stages.items()
+                if (products <= parameters if products
+                    else os.path.exists(skymap_path(webdir, label)))
+            )
+    return completed
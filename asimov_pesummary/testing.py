@@ -2,12 +2,14 @@
 A minimal fake upstream PE pipeline, for testing asimov-pesummary end-to-end.
 
 ``FakeCBCPipeline`` stands in for a real sampler (bilby, RIFT, ...). It does
-not run any inference: it synthesises a small but genuinely parseable
-posterior samples file and tiny PSD files, then marks itself complete
-immediately. A downstream ``pesummary`` production that ``needs:`` this one
-can then run the real ``summarypages`` executable against these fixtures,
-exercising the full asimov-pesummary integration without the cost of a real
-parameter estimation run.
+not run any inference: it synthesises a genuinely parseable posterior
+samples file, in any of the formats real upstreams deliver, and PSDs and
+calibration envelopes at the resolution real runs use, then marks itself
+complete immediately (or, optionally, once a simulated runtime has
+passed). A downstream ``pesummary`` production that
+``needs:`` this one can then run the real ``summarypages`` executable
+against these fixtures, exercising the full asimov-pesummary integration
+without the cost of a real parameter estimation run.
 
 Note that the ``pesummary`` production's own ``--config`` ini is *not*
 sourced from here: ``PESummary.submit_dag`` resolves it from its own
@@ -15,16 +17,874 @@ production's name/category via ``repository.find_prods(...)``, independent
 of ``_previous_assets()``. That ini must be seeded separately as its own
 test fixture (see the e2e test blueprints).
 
+``FakeScheduler`` likewise stands in for an HTCondor schedd, so that
+submission throughput, throttling and retries can be exercised offline.
+
 This module is only useful for testing and is not registered for use in
-production ledgers.
+production ledgers. Its entry point is still loaded by asimov on every
+command, though, so heavy dependencies (NumPy) are only imported once
+fixtures are actually built.
 """
 
+import datetime
+import functools
+import hashlib
 import importlib.resources
+import json
 import os
+import shutil
+import tempfile
+import time
+
+from asimov.pipeline import Pipeline, PipelineException
+
+#: GW parameters synthesised into the fake samples file by default. Kept
+#: non-precessing (zero in-plane/aligned spin) so that the default
+#: non-precessing approximants used in tests don't trip waveform
+#: generation errors in PESummary's plotting stage.
+PARAMETERS = [
+    "mass_1", "mass_2", "a_1", "a_2", "tilt_1", "tilt_2",
+    "phi_jl", "phi_12", "psi", "theta_jn", "ra", "dec",
+    "luminosity_distance", "geocent_time", "redshift",
+    "mass_1_source", "mass_2_source", "log_likelihood",
+]
+
+#: The number of samples generated, and written, at a time; this bounds
+#: the memory a fixture of any size takes to build.
+CHUNK_SIZE = 100_000
+
+
+def _draw(rng, n_samples, parameters):
+    """
+    Draw ``n_samples`` samples of ``parameters`` as columns. Parameters
+    without a recipe here are drawn uniformly from [0, 1).
+    """
+    import numpy as np
+
+    mass_1 = rng.random(n_samples) * 60 + 10
+    mass_2 = mass_1 * rng.uniform(0.5, 1.0, n_samples)
+    redshift = np.full(n_samples, 0.1)
+    columns = {
+        "mass_1": mass_1,
+        "mass_2": mass_2,
+        "a_1": np.zeros(n_samples),
+        "a_2": np.zeros(n_samples),
+        "luminosity_distance": rng.uniform(100, 600, n_samples),
+        "geocent_time": np.full(n_samples, 1126259462.4),
+        "redshift": redshift,
+        "mass_1_source": mass_1 / (1 + redshift),
+        "mass_2_source": mass_2 / (1 + redshift),
+    }
+    return np.column_stack([
+        columns[parameter] if parameter in columns else rng.random(n_samples)
+        for parameter in parameters
+    ])
+
+
+#: The signal a structured posterior (see :func:`generate_samples`) is
+#: centred on, loosely GW150914: detector-frame chirp mass and mass ratio,
+#: luminosity distance (Mpc), sky position (radians), the sky
+#: localisation's angular spread (radians) and the merger time.
+SOURCE = {
+    "chirp mass": 30.0,
+    "mass ratio": 0.8,
+    "luminosity distance": 440.0,
+    "ra": 1.95,
+    "dec": -1.27,
+    "sky spread": 0.15,
+    "geocent time": 1126259462.4,
+}
+
+#: The flat Lambda-CDM cosmology (Planck 2015) used to give structured
+#: posteriors consistent redshifts and source-frame masses.
+_HUBBLE, _OMEGA_M = 67.74, 0.3075
+
+
+def _redshift(distance):
+    """The redshift at a luminosity distance (Mpc), interpolated."""
+    import numpy as np
+
+    distances, redshifts = _redshift_grid()
+    return np.interp(distance, distances, redshifts)
+
+
+@functools.lru_cache(maxsize=None)
+def _redshift_grid():
+    """Luminosity distances (Mpc) tabulated against redshift, up to z = 3."""
+    import numpy as np
+
+    redshift = np.linspace(0, 3, 3001)
+    inverse_hubble = 1 / np.sqrt(_OMEGA_M * (1 + redshift) ** 3 + 1 - _OMEGA_M)
+    comoving = np.concatenate([[0], np.cumsum(
+        (inverse_hubble[1:] + inverse_hubble[:-1]) / 2 * np.diff(redshift)
+    )]) * 299792.458 / _HUBBLE
+    return (1 + redshift) * comoving, redshift
+
+
+def _sky(rng, n_samples, ra, dec, spread):
+    """
+    Draw sky positions from a von Mises-Fisher distribution about
+    (``ra``, ``dec``) with an angular spread of about ``spread`` radians.
+    """
+    import numpy as np
+
+    kappa = 1 / spread ** 2
+    # The cosine of each sample's angle from the centre...
+    uniform = rng.random(n_samples)
+    cosine = 1 + np.log(uniform + (1 - uniform) * np.exp(-2 * kappa)) / kappa
+    sine = np.sqrt(np.clip(1 - cosine ** 2, 0, None))
+    angle = rng.uniform(0, 2 * np.pi, n_samples)
+    # ...about the z axis, then rotated onto the centre.
+    local = np.stack([sine * np.cos(angle), sine * np.sin(angle), cosine])
+    theta, phi = np.pi / 2 - dec, ra
+    rotation = np.array([
+        [np.cos(theta) * np.cos(phi), -np.sin(phi), np.sin(theta) * np.cos(phi)],
+        [np.cos(theta) * np.sin(phi), np.cos(phi), np.sin(theta) * np.sin(phi)],
+        [-np.sin(theta), 0, np.cos(theta)],
+    ])
+    x, y, z = rotation @ local
+    return np.mod(np.arctan2(y, x), 2 * np.pi), np.arcsin(np.clip(z, -1, 1))
+
+
+def _draw_structured(rng, n_samples, parameters, source):
+    """
+    Draw ``n_samples`` samples of ``parameters`` from a posterior shaped
+    like a real detection's (see :func:`generate_samples`).
+    """
+    import numpy as np
+
+    source = {**SOURCE, **(source or {})}
+    # Chirp mass is measured tightly and is correlated with the broader
+    # mass ratio, which is reflected back below one.
+    latent = rng.multivariate_normal([0, 0], [[1, -0.6], [-0.6, 1]], n_samples)
+    chirp_mass = source["chirp mass"] * np.exp(0.03 * latent[:, 0])
+    mass_ratio = np.clip(
+        1 - np.abs(1 - source["mass ratio"] + 0.15 * latent[:, 1]), 0.05, 1
+    )
+    mass_1 = chirp_mass * (1 + mass_ratio) ** 0.2 / mass_ratio ** 0.6
+    mass_2 = mass_ratio * mass_1
+
+    # Face-on and face-off modes, with the distance growing as the
+    # binary is seen more face-on.
+    cos_theta_jn = rng.choice([-1, 1], n_samples) * rng.beta(6, 2, n_samples)
+    distance = source["luminosity distance"] * np.exp(
+        0.2 * rng.standard_normal(n_samples) + 0.4 * (np.abs(cos_theta_jn) - 0.75)
+    )
+    redshift = _redshift(distance)
+    ra, dec = _sky(rng, n_samples, source["ra"], source["dec"], source["sky spread"])
+
+    columns = {
+        "mass_1": mass_1,
+        "mass_2": mass_2,
+        "chirp_mass": chirp_mass,
+        "mass_ratio": mass_ratio,
+        "a_1": 0.99 * rng.beta(2, 5, n_samples),
+        "a_2": 0.99 * rng.beta(2, 5, n_samples),
+        # Preferentially, but not exactly, aligned.
+        "tilt_1": np.arccos(2 * rng.beta(3, 2, n_samples) - 1),
+        "tilt_2": np.arccos(2 * rng.beta(3, 2, n_samples) - 1),
+        "phi_jl": rng.uniform(0, 2 * np.pi, n_samples),
+        "phi_12": rng.uniform(0, 2 * np.pi, n_samples),
+        "psi": rng.uniform(0, np.pi, n_samples),
+        "phase": rng.uniform(0, 2 * np.pi, n_samples),
+        "theta_jn": np.arccos(cos_theta_jn),
+        "ra": ra,
+        "dec": dec,
+        "luminosity_distance": distance,
+        "geocent_time": source["geocent time"] + 0.005 * rng.standard_normal(n_samples),
+        "redshift": redshift,
+        "mass_1_source": mass_1 / (1 + redshift),
+        "mass_2_source": mass_2 / (1 + redshift),
+        "log_likelihood": 300 - 0.5 * rng.chisquare(len(parameters), n_samples),
+    }
+    return np.column_stack([
+        columns[parameter] if parameter in columns else rng.random(n_samples)
+        for parameter in parameters
+    ])
+
+
+def generate_samples(n_samples, parameters=None, seed=1234, chunk_size=CHUNK_SIZE,
+                     structured=False, source=None):
+    """
+    Generate fake posterior samples, a chunk at a time.
+
+    By default the samples are unstructured noise with zero spins, which
+    is all most tests need and which any approximant can plot. With
+    ``structured``, they are shaped like a real detection's posterior --
+    correlated chirp mass and mass ratio, a localised sky position,
+    precessing spins, the distance-inclination degeneracy, and redshifts
+    and source-frame masses consistent with the distances -- so that
+    skymap, spin evolution and precessing SNR stages do realistic work.
+    Plotting such samples needs a precessing approximant.
+
+    Parameters
+    ----------
+    n_samples : int
+        The total number of samples.
+    parameters : list, optional
+        The parameters to generate, in column order; :data:`PARAMETERS` by
+        default.
+    seed : int, optional
+        The random seed. The same seed and chunk size give the same samples.
+    chunk_size : int, optional
+        The most samples in each chunk.
+    structured : bool, optional
+        Whether to generate a structured posterior.
+    source : dict, optional
+        For a structured posterior, overrides for the :data:`SOURCE` it is
+        centred on.
+
+    Yields
+    ------
+    numpy.ndarray
+        Arrays of shape ``(chunk, len(parameters))``.
+    """
+    import numpy as np
+
+    parameters = list(parameters or PARAMETERS)
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_samples, chunk_size):
+        size = min(chunk_size, n_samples - start)
+        if structured:
+            yield _draw_structured(rng, size, parameters, source)
+        else:
+            yield _draw(rng, size, parameters)
+
+
+#: The sample file formats :func:`write_samples` can write, and the file
+#: name each is written to. PESummary picks its reader from the file's
+#: extension (and, for bilby result files, their ``version``):
+#:
+#: ``dat``, ``csv``
+#:     Delimited text with a header row, PESummary's default format.
+#: ``hdf5``, ``hdf5-gzip``
+#:     A ``posterior`` group holding a chunked dataset per parameter,
+#:     uncompressed or gzip-compressed.
+#: ``json``
+#:     ``{"posterior": {"content": {parameter: [samples]}}}``.
+#: ``bilby-json``, ``bilby-hdf5``
+#:     bilby result files, which PESummary reads with bilby (so bilby must
+#:     be installed where ``summarypages`` runs).
+SAMPLE_FORMATS = {
+    "dat": "posterior_samples.dat",
+    "csv": "posterior_samples.csv",
+    "hdf5": "posterior_samples.h5",
+    "hdf5-gzip": "posterior_samples.h5",
+    "json": "posterior_samples.json",
+    "bilby-json": "fake_result.json",
+    "bilby-hdf5": "fake_result.hdf5",
+}
+
+#: The version bilby result files claim to be written by.
+BILBY_VERSION = "bilby=2.3.0"
+
+
+def _bilby_metadata(parameters):
+    """The parts of a bilby result file other than its posterior."""
+    return {
+        "label": "fake",
+        "outdir": ".",
+        "sampler": "fake",
+        "log_evidence": 0.0,
+        "log_evidence_err": 0.0,
+        "log_noise_evidence": 0.0,
+        "log_bayes_factor": 0.0,
+        "search_parameter_keys": [p for p in parameters if p != "log_likelihood"],
+        "fixed_parameter_keys": [],
+        "constraint_parameter_keys": [],
+        "meta_data": {"likelihood": {"time_marginalization": False}},
+        "version": BILBY_VERSION,
+    }
+
+
+def _write_text(path, chunks, parameters, delimiter):
+    import numpy as np
+
+    with open(path, "w") as samples_file:
+        samples_file.write(delimiter.join(parameters) + "\n")
+        for chunk in chunks:
+            np.savetxt(samples_file, chunk, delimiter=delimiter, fmt="%.12g")
+
+
+def _write_hdf5(path, chunks, parameters, n_samples, chunk_size,
+                compression=None, bilby=False):
+    import h5py
+
+    with h5py.File(path, "w") as samples_file:
+        posterior = samples_file.create_group("posterior")
+        columns = [
+            posterior.create_dataset(
+                parameter, shape=(n_samples,), dtype="f8",
+                chunks=(max(min(chunk_size, n_samples), 1),),
+                compression=compression,
+            )
+            for parameter in parameters
+        ]
+        start = 0
+        for chunk in chunks:
+            for column, values in zip(columns, chunk.T):
+                column[start:start + len(chunk)] = values
+            start += len(chunk)
+        if bilby:
+            _write_hdf5_dict(samples_file, _bilby_metadata(parameters))
+
+
+def _write_hdf5_dict(group, dictionary):
+    """Write a dictionary as nested groups of datasets, as bilby does."""
+    import numpy as np
+
+    for key, value in dictionary.items():
+        if isinstance(value, dict):
+            _write_hdf5_dict(group.create_group(key), value)
+        elif isinstance(value, list):
+            group[key] = np.array([str(item).encode() for item in value], dtype="S")
+        else:
+            group[key] = value
+
+
+def _write_json(path, chunks, parameters, n_samples, bilby=False):
+    """
+    Write a JSON posterior a column at a time. The chunks are rows, so
+    they are first spooled to a memory-mapped scratch file beside
+    ``path``, keeping memory bounded.
+    """
+    import numpy as np
+
+    scratch = f"{path}.scratch"
+    try:
+        spool = np.lib.format.open_memmap(
+            scratch, mode="w+", dtype="f8", shape=(n_samples, len(parameters))
+        )
+        start = 0
+        for chunk in chunks:
+            spool[start:start + len(chunk)] = chunk
+            start += len(chunk)
+        spool.flush()
+
+        document = _bilby_metadata(parameters) if bilby else {}
+        with open(path, "w") as samples_file:
+            samples_file.write("{")
+            for key, value in document.items():
+                samples_file.write(f"{json.dumps(key)}: {json.dumps(value)}, ")
+            samples_file.write('"posterior": {')
+            if bilby:
+                samples_file.write('"__dataframe__": true, ')
+            samples_file.write('"content": {')
+            for number, parameter in enumerate(parameters):
+                if number:
+                    samples_file.write(", ")
+                samples_file.write(f"{json.dumps(parameter)}: [")
+                for row in range(0, n_samples, CHUNK_SIZE):
+                    if row:
+                        samples_file.write(", ")
+                    values = spool[row:row + CHUNK_SIZE, number].tolist()
+                    samples_file.write(", ".join(map(repr, values)))
+                samples_file.write("]")
+            samples_file.write("}}}")
+        del spool
+    finally:
+        if os.path.exists(scratch):
+            os.remove(scratch)
+
+
+def write_samples(path, n_samples, parameters=None, seed=1234,
+                  chunk_size=CHUNK_SIZE, file_format="dat", structured=False,
+                  source=None):
+    """
+    Write fake posterior samples, streaming them a chunk at a time (see
+    :func:`generate_samples`).
+
+    Parameters
+    ----------
+    path : str
+        The file to write.
+    n_samples : int
+        The number of samples.
+    parameters : list, optional
+        The parameters to write; :data:`PARAMETERS` by default.
+    seed : int, optional
+        The random seed.
+    chunk_size : int, optional
+        The most samples generated, and written, at a time.
+    file_format : str, optional
+        One of :data:`SAMPLE_FORMATS`; ``dat`` by default.
+    structured : bool, optional
+        Whether to generate a structured posterior.
+    source : dict, optional
+        For a structured posterior, overrides for the :data:`SOURCE` it is
+        centred on.
+
+    Returns
+    -------
+    str
+        ``path``.
+    """
+    if file_format not in SAMPLE_FORMATS:
+        raise ValueError(
+            f"Unknown sample format {file_format!r}; use one of "
+            f"{', '.join(SAMPLE_FORMATS)}."
+        )
+    parameters = list(parameters or PARAMETERS)
+    chunks = generate_samples(
+        n_samples, parameters, seed, chunk_size, structured=structured, source=source
+    )
+    if file_format in ("dat", "csv"):
+        _write_text(path, chunks, parameters, "," if file_format == "csv" else " ")
+    elif file_format in ("hdf5", "hdf5-gzip", "bilby-hdf5"):
+        _write_hdf5(
+            path, chunks, parameters, n_samples, chunk_size,
+            compression="gzip" if file_format == "hdf5-gzip" else None,
+            bilby=file_format == "bilby-hdf5",
+        )
+    else:
+        _write_json(
+            path, chunks, parameters, n_samples, bilby=file_format == "bilby-json"
+        )
+    return path
+
+
+#: The analytic noise curve each interferometer's fake PSD follows: the
+#: knee frequency (Hz) and scale (1/Hz) of the Advanced LIGO design fit
+#: (Ajith 2011), loosely rescaled per detector. Others get ``H1``'s.
+NOISE_CURVES = {
+    "H1": (215.0, 1.0e-49),
+    "L1": (215.0, 0.8e-49),
+    "V1": (180.0, 4.0e-49),
+    "K1": (200.0, 1.6e-48),
+}
+
+#: How many periodograms a fake PSD is the Welch average of, which sets
+#: the scatter of its bins about the analytic curve.
+PSD_AVERAGES = 32
+
+
+def _noise_rng(seed, ifo, stream):
+    import numpy as np
+
+    return np.random.default_rng([int(seed), stream, *ifo.encode()])
+
+
+@functools.lru_cache(maxsize=32)
+def fake_psd(ifo, seed=4321, minimum_frequency=10.0, maximum_frequency=2048.0,
+             resolution=1 / 16):
+    """
+    A detector-like power spectral density, as a real PE run estimates one.
+
+    It follows the interferometer's :data:`NOISE_CURVES` shape, with power
+    line harmonics (50 Hz for Virgo and KAGRA, 60 Hz otherwise) and violin
+    modes, and the scatter of a Welch average. The arrays are cached, by
+    all the arguments, and read-only.
+
+    Parameters
+    ----------
+    ifo : str
+        The interferometer.
+    seed : int, optional
+        The random seed.
+    minimum_frequency, maximum_frequency : float, optional
+        The frequency range, in Hz.
+    resolution : float, optional
+        The frequency spacing, in Hz; the defaults give 32,609 bins.
+
+    Returns
+    -------
+    tuple
+        The frequencies and the PSD (1/Hz).
+    """
+    import numpy as np
+
+    rng = _noise_rng(seed, ifo, 0)
+    frequencies = np.arange(minimum_frequency, maximum_frequency + resolution / 2, resolution)
+    knee, scale = NOISE_CURVES.get(ifo, NOISE_CURVES["H1"])
+    x = frequencies / knee
+    psd = scale * (
+        x ** -4.14 - 5 * x ** -2 + 111 * (1 - x ** 2 + x ** 4 / 2) / (1 + x ** 2 / 2)
+    )
+    mains = 50.0 if ifo in ("V1", "K1") else 60.0
+    centres = np.concatenate([
+        mains * np.arange(1, 4),
+        rng.normal([500.0, 1000.0, 1500.0], 5.0),
+    ])
+    heights = 10 ** rng.uniform(1, 3, len(centres))
+    widths = rng.uniform(0.05, 0.5, len(centres))
+    lines = heights[:, None] / (
+        1 + ((frequencies[None, :] - centres[:, None]) / widths[:, None]) ** 2
+    )
+    psd *= 1 + lines.sum(axis=0)
+    psd *= rng.gamma(PSD_AVERAGES, 1 / PSD_AVERAGES, len(frequencies))
+    frequencies.flags.writeable = psd.flags.writeable = False
+    return frequencies, psd
+
+
+@functools.lru_cache(maxsize=32)
+def fake_calibration(ifo, seed=4321, minimum_frequency=10.0,
+                     maximum_frequency=2048.0, points=1000):
+    """
+    A calibration uncertainty envelope, as calibration groups publish them.
+
+    The median amplitude and phase corrections wander smoothly (in log
+    frequency) about 1 and 0, by about a percent and 0.01 radians, and
+    the one-sigma widths grow towards either end of the band. The array
+    is cached, by all the arguments, and read-only.
+
+    Parameters
+    ----------
+    ifo : str
+        The interferometer.
+    seed : int, optional
+        The random seed.
+    minimum_frequency, maximum_frequency : float, optional
+        The frequency range, in Hz.
+    points : int, optional
+        The number of (log-spaced) frequencies.
+
+    Returns
+    -------
+    numpy.ndarray
+        Columns of frequency, median amplitude, median phase (radians),
+        then the amplitude and phase at minus and plus one sigma, the
+        layout PESummary's ``--calibration`` reads.
+    """
+    import numpy as np
+
+    rng = _noise_rng(seed, ifo, 1)
+    frequencies = np.geomspace(minimum_frequency, maximum_frequency, points)
+    # The position across the band in log frequency, from -1 to 1.
+    band = np.linspace(-1, 1, points)
+    harmonics = np.arange(1, 5)[:, None]
+
+    def wander(size):
+        amplitudes = rng.normal(0, size, (len(harmonics), 1)) / harmonics
+        phases = rng.uniform(0, 2 * np.pi, (len(harmonics), 1))
+        return (amplitudes * np.sin(np.pi * harmonics * band + phases)).sum(axis=0)
+
+    amplitude, phase = 1 + wander(0.01), wander(0.01)
+    amplitude_sigma = 0.02 + 0.06 * band ** 4
+    phase_sigma = 0.015 + 0.05 * band ** 4
+    envelope = np.column_stack([
+        frequencies, amplitude, phase,
+        amplitude - amplitude_sigma, phase - phase_sigma,
+        amplitude + amplitude_sigma, phase + phase_sigma,
+    ])
+    envelope.flags.writeable = False
+    return envelope
+
+
+@functools.lru_cache(maxsize=16)
+def _noise_text(generator, *arguments):
+    """The text file ``generator(*arguments)`` is written as, cached."""
+    import io
+
+    import numpy as np
+
+    data = generator(*arguments)
+    buffer = io.StringIO()
+    np.savetxt(
+        buffer, np.column_stack(data) if isinstance(data, tuple) else data,
+        delimiter="\t",
+    )
+    return buffer.getvalue()
+
+
+def write_psd(path, ifo, seed=4321, minimum_frequency=10.0,
+              maximum_frequency=2048.0, resolution=1 / 16):
+    """
+    Write :func:`fake_psd` as the two-column text file PESummary's
+    ``--psds`` reads, returning ``path``.
+    """
+    text = _noise_text(
+        fake_psd, ifo, int(seed), float(minimum_frequency),
+        float(maximum_frequency), float(resolution),
+    )
+    with open(path, "w") as psd_file:
+        psd_file.write(text)
+    return path
 
-import numpy as np
 
-from asimov.pipeline import Pipeline
+def write_calibration(path, ifo, seed=4321, minimum_frequency=10.0,
+                      maximum_frequency=2048.0, points=1000):
+    """
+    Write :func:`fake_calibration` as the seven-column text file
+    PESummary's ``--calibration`` reads, returning ``path``.
+    """
+    text = _noise_text(
+        fake_calibration, ifo, int(seed), float(minimum_frequency),
+        float(maximum_frequency), int(points),
+    )
+    with open(path, "w") as calibration_file:
+        calibration_file.write(text)
+    return path
+
+
+#: The environment variable naming the fixture cache directory (see
+#: :func:`cached_fixture`); set it empty to disable the cache.
+CACHE_ENV = "ASIMOV_FAKE_CACHE"
+
+#: The environment variable capping the fixture cache's size, in bytes
+#: (:data:`CACHE_SIZE` by default); beyond it the least recently used
+#: fixtures are evicted.
+CACHE_SIZE_ENV = "ASIMOV_FAKE_CACHE_SIZE"
+CACHE_SIZE = 10 * 2**30
+
+#: The version of the fixtures this module generates, part of every cache
+#: key. Bump it whenever a change here alters the fixture generated from
+#: the same parameters, so that cached ones are regenerated.
+FIXTURE_VERSION = 1
+
+
+def fixture_cache():
+    """
+    The fixture cache directory: :data:`CACHE_ENV` if set, otherwise
+    ``asimov-pesummary/fixtures`` under the user's cache directory, or
+    None if the cache is disabled.
+    """
+    path = os.environ.get(CACHE_ENV)
+    if path is None:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        path = os.path.join(base, "asimov-pesummary", "fixtures")
+    return path or None
+
+
+def fixture_key(kind, **parameters):
+    """
+    The cache key of a fixture: a digest of its ``kind``, the parameters
+    it is generated from, :data:`FIXTURE_VERSION` and NumPy's version
+    (whose random streams the fixtures are drawn from).
+    """
+    import numpy as np
+
+    document = json.dumps(
+        {"kind": kind, "version": FIXTURE_VERSION, "numpy": np.__version__,
+         **parameters},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(document.encode()).hexdigest()
+
+
+def _place(entry, path):
+    """
+    Hard-link ``entry`` to ``path``, or copy it across filesystems,
+    replacing rather than overwriting any file already there (which may
+    itself be a link into the cache).
+    """
+    # Renaming a link over another link to the same file does nothing.
+    if os.path.exists(path) and os.path.samefile(entry, path):
+        return
+    staging = f"{path}.{os.getpid()}.staging"
+    if os.path.lexists(staging):
+        os.remove(staging)
+    try:
+        os.link(entry, staging)
+    except OSError:
+        shutil.copyfile(entry, staging)
+    os.replace(staging, path)
+
+
+def cached_fixture(path, write, kind, **parameters):
+    """
+    Materialise a fixture at ``path`` from the fixture cache, generating
+    it into the cache first if it is not there.
+
+    The cache is content-addressed by :func:`fixture_key`, so a fixture
+    costs its generation time once per machine, however many runs and
+    processes use it. Entries are written to a temporary file and renamed
+    into place, so concurrent builds never see a partial fixture, and are
+    made read-only, as the run directories they are linked into share
+    them. Each use marks an entry as recently used; adding one evicts the
+    least recently used beyond :data:`CACHE_SIZE_ENV` (see
+    :func:`evict_fixtures`).
+
+    Parameters
+    ----------
+    path : str
+        Where the fixture is wanted.
+    write : callable
+        Writes the fixture to the path it is given.
+    kind : str
+        The kind of fixture (``samples``, ``psd``, ...).
+    **parameters
+        Everything the fixture is generated from.
+
+    Returns
+    -------
+    str
+        ``path``.
+    """
+    cache = fixture_cache()
+    if cache is None:
+        write(path)
+        return path
+    os.makedirs(cache, exist_ok=True)
+    extension = os.path.splitext(path)[1]
+    entry = os.path.join(cache, fixture_key(kind, **parameters) + extension)
+    try:
+        os.utime(entry)
+    except FileNotFoundError:
+        handle, scratch = tempfile.mkstemp(dir=cache, prefix="tmp", suffix=extension)
+        os.close(handle)
+        try:
+            write(scratch)
+            os.chmod(scratch, 0o444)
+            os.replace(scratch, entry)
+        finally:
+            if os.path.exists(scratch):
+                os.remove(scratch)
+        limit = os.environ.get(CACHE_SIZE_ENV)
+        evict_fixtures(int(limit) if limit else CACHE_SIZE, keep=entry)
+    _place(entry, path)
+    return path
+
+
+def evict_fixtures(size, keep=None):
+    """
+    Remove the least recently used cached fixtures until the cache holds
+    at most ``size`` bytes. Fixtures already linked into run directories
+    stay there.
+
+    Parameters
+    ----------
+    size : int
+        The most bytes to keep.
+    keep : str, optional
+        A fixture never to evict, e.g. the one just added.
+
+    Returns
+    -------
+    int
+        The number of fixtures removed.
+    """
+    cache = fixture_cache()
+    if not cache or not os.path.isdir(cache):
+        return 0
+    entries = []
+    for entry in os.scandir(cache):
+        # Fixtures still being written are temporary files.
+        if entry.name.startswith("tmp") or entry.path == keep:
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, entry.path, stat.st_size))
+    total = sum(entry[2] for entry in entries)
+    if keep and os.path.exists(keep):
+        total += os.path.getsize(keep)
+    removed = 0
+    for _, path, bytes_ in sorted(entries):
+        if total <= size:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= bytes_
+    return removed
+
+
+def clear_fixture_cache():
+    """Remove every cached fixture."""
+    cache = fixture_cache()
+    if cache and os.path.isdir(cache):
+        shutil.rmtree(cache)
+
+
+#: The environment variable naming a :class:`SimulatedClock` file, which
+#: then times every simulated run in place of the wall clock.
+CLOCK_ENV = "ASIMOV_FAKE_CLOCK"
+
+
+class WallClock:
+    """The real time, in seconds since the epoch."""
+
+    def now(self):
+        return time.time()
+
+
+class SimulatedClock:
+    """
+    A clock which only moves when it is told to.
+
+    Its time lives in a file, so a benchmark can drive simulated runs in
+    other processes (``asimov monitor``) by pointing :data:`CLOCK_ENV` at
+    the file and advancing the clock between passes.
+
+    Parameters
+    ----------
+    path : str
+        The file holding the time; it is created, at ``start``, if missing.
+    start : float, optional
+        The time the clock starts at.
+    """
+
+    def __init__(self, path, start=0.0):
+        self.path = path
+        if not os.path.exists(path):
+            self.set(start)
+
+    def now(self):
+        with open(self.path) as clock_file:
+            return float(clock_file.read())
+
+    def set(self, now):
+        with open(self.path, "w") as clock_file:
+            clock_file.write(repr(float(now)))
+
+    def advance(self, seconds):
+        """Move the clock on by ``seconds``, returning the new time."""
+        now = self.now() + seconds
+        self.set(now)
+        return now
+
+
+def default_clock():
+    """The clock named by :data:`CLOCK_ENV`, or the wall clock if unset."""
+    path = os.environ.get(CLOCK_ENV)
+    return SimulatedClock(path) if path else WallClock()
+
+
+def draw_runtime(rng, runtime):
+    """
+    Draw a simulated run's duration, in seconds.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        The generator to draw from.
+    runtime : float or dict
+        A fixed number of seconds, or a distribution: ``{"distribution":
+        "uniform", "low": ..., "high": ...}``, ``{"distribution":
+        "lognormal", "median": ..., "sigma": ...}`` or ``{"distribution":
+        "exponential", "mean": ...}``.
+
+    Raises
+    ------
+    ValueError
+        If the distribution is not one of these, or gives a negative time.
+    """
+    import numpy as np
+
+    if not isinstance(runtime, dict):
+        runtime = {"value": runtime}
+    distribution = runtime.get("distribution", "fixed")
+    if distribution == "fixed":
+        value = float(runtime["value"])
+    elif distribution == "uniform":
+        value = float(rng.uniform(runtime["low"], runtime["high"]))
+    elif distribution == "lognormal":
+        value = float(rng.lognormal(np.log(runtime["median"]), runtime.get("sigma", 0.5)))
+    elif distribution == "exponential":
+        value = float(rng.exponential(runtime["mean"]))
+    else:
+        raise ValueError(
+            f"Unknown runtime distribution {distribution!r}; use fixed, uniform, "
+            "lognormal or exponential"
+        )
+    if value < 0:
+        raise ValueError(f"A simulated time can't be negative, not {value}")
+    return value
 
 
 class FakeCBCPipeline(Pipeline):
@@ -32,11 +892,19 @@ class FakeCBCPipeline(Pipeline):
     A minimal testing pipeline which stands in for a real CBC PE pipeline.
 
     Rather than running any sampler, this pipeline synthesises a small,
-    genuinely-parseable set of posterior samples and PSDs (using the same
-    recipe PESummary's own test suite uses to exercise ``summarypages``),
+    genuinely-parseable set of posterior samples (using the same recipe
+    PESummary's own test suite uses to exercise ``summarypages``), PSDs and
+    calibration envelopes (see :meth:`_noise_options`),
     for a downstream ``PESummary`` production to consume via
     ``_previous_assets()``. It completes as soon as these fixtures are
-    written, so it never needs its own HTCondor job.
+    written, so it never needs its own HTCondor job. Each fixture is
+    generated once per machine and linked into the run directory from
+    the fixture cache (see :func:`cached_fixture`).
+
+    With a ``fake run`` meta block, it instead simulates an upstream job's
+    timing against a local clock (see :meth:`_run_options`): its samples
+    only appear once a drawn runtime has passed, smaller checkpoint
+    samples appear before them, and the run can fail and be retried.
 
     Parameters
     ----------
@@ -49,16 +917,29 @@ class FakeCBCPipeline(Pipeline):
     name = "FakeCBCPipeline"
     STATUS = {"wait", "stuck", "stopped", "running", "finished"}
 
-    #: GW parameters synthesised into the fake samples file. Kept
-    #: non-precessing (zero in-plane/aligned spin) so that the default
-    #: non-precessing approximants used in tests don't trip waveform
-    #: generation errors in PESummary's plotting stage.
-    PARAMETERS = [
-        "mass_1", "mass_2", "a_1", "a_2", "tilt_1", "tilt_2",
-        "phi_jl", "phi_12", "psi", "theta_jn", "ra", "dec",
-        "luminosity_distance", "geocent_time", "redshift",
-        "mass_1_source", "mass_2_source", "log_likelihood",
-    ]
+    PARAMETERS = PARAMETERS
+
+    #: The defaults for the production's ``fake samples`` meta block.
+    SAMPLE_DEFAULTS = {
+        "number": 50, "parameters": None, "seed": 1234, "format": "dat",
+        "structured": False, "source": None,
+    }
+
+    #: The defaults for the production's ``fake run`` meta block.
+    RUN_DEFAULTS = {
+        "runtime": 3600, "checkpoints": 0, "failure probability": 0,
+        "retries": 0, "seed": None,
+    }
+
+    #: The defaults for the production's ``fake noise`` meta block.
+    NOISE_DEFAULTS = {
+        "minimum frequency": 10.0, "maximum frequency": 2048.0,
+        "resolution": 1 / 16, "seed": 4321, "calibration": True,
+        "calibration points": 1000,
+    }
+
+    #: The clock simulated runs are timed by; :func:`default_clock` if None.
+    clock = None
 
     def __init__(self, production, category=None):
         super().__init__(production, category)
@@ -89,35 +970,166 @@ class FakeCBCPipeline(Pipeline):
         return True
 
     def _samples_path(self):
-        return os.path.join(self.production.rundir, "posterior_samples.dat")
-
-    def _make_samples(self, n_samples=50, seed=1234):
-        """Write a small, genuinely-parseable posterior samples file."""
-        rng = np.random.default_rng(seed)
-        parameters = self.PARAMETERS
-        data = np.array([rng.random(len(parameters)) for _ in range(n_samples)])
-
-        mass_1 = rng.random(n_samples) * 60 + 10
-        q = rng.uniform(0.5, 1.0, n_samples)
-        distance = rng.uniform(100, 600, n_samples)
-        redshift = np.full(n_samples, 0.1)
-        for num in range(n_samples):
-            data[num][0] = mass_1[num]
-            data[num][1] = mass_1[num] * q[num]
-            data[num][2] = 0.0  # a_1
-            data[num][3] = 0.0  # a_2
-            data[num][12] = distance[num]
-            data[num][13] = 1126259462.4  # geocent_time
-            data[num][14] = redshift[num]
-            data[num][15] = mass_1[num] / (1 + redshift[num])
-            data[num][16] = (mass_1[num] * q[num]) / (1 + redshift[num])
-
-        samples_path = self._samples_path()
-        np.savetxt(
-            samples_path, data, delimiter=" ", header=" ".join(parameters),
-            comments="",
-        )
-        return samples_path
+        return os.path.join(
+            self.production.rundir, SAMPLE_FORMATS[self._sample_options()["format"]]
+        )
+
+    def _sample_options(self):
+        """
+        The production's ``fake samples`` meta block over the defaults:
+        ``number`` of samples, ``parameters``, ``seed``, file ``format``
+        (one of :data:`SAMPLE_FORMATS`), whether the posterior is
+        ``structured`` and the ``source`` it is then centred on (see
+        :func:`generate_samples`), e.g.::
+
+            fake samples:
+              number: 1000000
+              seed: 7
+              format: hdf5-gzip
+              structured: true
+              source:
+                chirp mass: 12
+                sky spread: 0.05
+        """
+        options = dict(self.SAMPLE_DEFAULTS)
+        options.update(self.production.meta.get("fake samples", {}) or {})
+        return options
+
+    def _make_samples(self, path=None, n_samples=None):
+        """
+        Write a genuinely-parseable posterior samples file, to the samples
+        path and with the configured number of samples unless given.
+        """
+        options = self._sample_options()
+        arguments = {
+            "n_samples": int(options["number"] if n_samples is None else n_samples),
+            "parameters": list(options["parameters"] or self.PARAMETERS),
+            "seed": int(options["seed"]),
+            "chunk_size": CHUNK_SIZE,
+            "file_format": options["format"],
+            "structured": bool(options["structured"]),
+            "source": options["source"],
+        }
+        return cached_fixture(
+            path or self._samples_path(),
+            lambda target: write_samples(target, **arguments),
+            "samples", **arguments,
+        )
+
+    def _run_options(self):
+        """
+        The production's ``fake run`` meta block over the defaults, or None
+        if it has none (and so completes as soon as it is submitted): the
+        ``runtime`` (seconds, or a distribution; see :func:`draw_runtime`),
+        how many ``checkpoints`` to write before the final samples, the
+        ``failure probability`` of each attempt, how many ``retries``
+        :meth:`resurrect` makes and the ``seed`` (the ``fake samples`` seed
+        by default), e.g.::
+
+            fake run:
+              runtime:
+                distribution: lognormal
+                median: 7200
+                sigma: 0.3
+              checkpoints: 3
+              failure probability: 0.2
+              retries: 1
+        """
+        if not self.production.meta.get("fake run"):
+            return None
+        options = dict(self.RUN_DEFAULTS)
+        block = self.production.meta["fake run"]
+        options.update(block if isinstance(block, dict) else {})
+        if options["seed"] is None:
+            options["seed"] = self._sample_options()["seed"]
+        return options
+
+    def _now(self):
+        return (self.clock or default_clock()).now()
+
+    def _run_path(self):
+        return os.path.join(self.production.rundir, "fake_run.json")
+
+    def _checkpoint_path(self):
+        return os.path.join(
+            self.production.rundir, "checkpoint",
+            SAMPLE_FORMATS[self._sample_options()["format"]],
+        )
+
+    def _load_run(self):
+        if not self.production.rundir or not os.path.exists(self._run_path()):
+            return None
+        with open(self._run_path()) as run_file:
+            return json.load(run_file)
+
+    def _save_run(self, state):
+        with open(self._run_path(), "w") as run_file:
+            json.dump(state, run_file, indent=2)
+
+    def _start_run(self, attempt=1):
+        """
+        Start attempt ``attempt`` of a simulated run now, drawing its
+        runtime and whether (and when) it fails.
+        """
+        import numpy as np
+
+        options = self._run_options()
+        rng = np.random.default_rng([int(options["seed"]), attempt])
+        runtime = draw_runtime(rng, options["runtime"])
+        fails = rng.random() < float(options["failure probability"])
+        for path in (self._samples_path(), self._checkpoint_path()):
+            if os.path.exists(path):
+                os.remove(path)
+        state = {
+            "attempt": attempt,
+            "submitted": self._now(),
+            "runtime": runtime,
+            "fails at": float(rng.uniform(0, runtime)) if fails else None,
+            "checkpoints": int(options["checkpoints"]),
+            "checkpoint": 0,
+            "status": "running",
+        }
+        self._save_run(state)
+        return state
+
+    def _advance(self):
+        """
+        Bring a simulated run up to the clock's time: write any checkpoint
+        that has come due, then fail the run or write its final samples if
+        their time has come. Returns the run's state, or None if no
+        simulated run has been started.
+        """
+        state = self._load_run()
+        if state is None or state["status"] != "running":
+            return state
+        elapsed = self._now() - state["submitted"]
+        runtime, fails_at = state["runtime"], state["fails at"]
+        end = runtime if fails_at is None else fails_at
+        # Checkpoints are evenly spaced over the runtime; only the latest
+        # one due is written, over the previous one, as samplers do. A run
+        # with no runtime is over as soon as it starts.
+        slots = state["checkpoints"] + 1
+        done = min(elapsed, end) / runtime if runtime > 0 else 1
+        due = min(state["checkpoints"], int(done * slots))
+        if due > state["checkpoint"]:
+            os.makedirs(os.path.dirname(self._checkpoint_path()), exist_ok=True)
+            self._make_samples(
+                self._checkpoint_path(),
+                max(1, int(self._sample_options()["number"]) * due // slots),
+            )
+            state["checkpoint"] = due
+        if fails_at is not None and elapsed >= fails_at:
+            state["status"] = "failed"
+            with open(os.path.join(self.production.rundir, "fake_run.err"), "a") as log:
+                log.write(
+                    f"Simulated failure of attempt {state['attempt']} "
+                    f"after {fails_at:.0f} s\n"
+                )
+        elif elapsed >= runtime:
+            self._make_samples()
+            state["status"] = "complete"
+        self._save_run(state)
+        return state
 
     # Note: this pipeline does not need to write a ``.ini`` for itself.
     # ``PESummary.submit_dag`` resolves ``--config`` from *its own*
@@ -125,49 +1137,139 @@ class FakeCBCPipeline(Pipeline):
     # from ``_previous_assets()`` — so that ini is a separate fixture,
     # seeded directly under the downstream ``pesummary`` production's name.
 
+    def _noise_options(self):
+        """
+        The production's ``fake noise`` meta block over the defaults: the
+        PSDs' ``minimum frequency``, ``maximum frequency`` and
+        ``resolution`` (Hz), the ``seed`` (shared by every production by
+        default, so their PSDs are generated once per process), and
+        whether to write ``calibration`` envelopes, at how many
+        ``calibration points``, e.g.::
+
+            fake noise:
+              resolution: 0.25
+              seed: 7
+              calibration: false
+        """
+        options = dict(self.NOISE_DEFAULTS)
+        options.update(self.production.meta.get("fake noise", {}) or {})
+        return options
+
+    def _ifos(self):
+        return self.production.meta.get("interferometers", ["H1", "L1"])
+
     def _psd_paths(self):
-        ifos = self.production.meta.get("interferometers", ["H1", "L1"])
         return {
             ifo: os.path.join(self.production.rundir, f"{ifo}_psd.dat")
-            for ifo in ifos
+            for ifo in self._ifos()
+        }
+
+    def _calibration_paths(self):
+        if not self._noise_options()["calibration"]:
+            return {}
+        return {
+            ifo: os.path.join(self.production.rundir, f"{ifo}_calibration.dat")
+            for ifo in self._ifos()
         }
 
     def _make_psds(self):
-        """Write a tiny flat-ish PSD file for each configured interferometer."""
-        rng = np.random.default_rng(4321)
-        frequencies = np.linspace(1, 1024, 200)
+        """
+        Write a realistic-resolution PSD (see :func:`fake_psd`) and, unless
+        disabled, a calibration envelope (see :func:`fake_calibration`) for
+        each configured interferometer.
+        """
+        options = self._noise_options()
+        band = {
+            "seed": int(options["seed"]),
+            "minimum_frequency": float(options["minimum frequency"]),
+            "maximum_frequency": float(options["maximum frequency"]),
+        }
         psds = self._psd_paths()
-        for path in psds.values():
-            strains = rng.uniform(1e-24, 1e-23, len(frequencies))
-            np.savetxt(path, np.vstack([frequencies, strains]).T, delimiter="\t")
+        for ifo, path in psds.items():
+            arguments = {"ifo": ifo, **band, "resolution": float(options["resolution"])}
+            cached_fixture(
+                path, lambda target: write_psd(target, **arguments), "psd", **arguments
+            )
+        for ifo, path in self._calibration_paths().items():
+            arguments = {"ifo": ifo, **band, "points": int(options["calibration points"])}
+            cached_fixture(
+                path, lambda target: write_calibration(target, **arguments),
+                "calibration", **arguments,
+            )
         return psds
 
     def build_dag(self, user=None, dryrun=False):
-        """Materialise the fake samples and PSD files."""
+        """
+        Materialise the fake samples, PSDs and calibration envelopes; for
+        a simulated run, only the PSDs and envelopes, its samples being
+        written as it progresses.
+        """
         if dryrun:
             self.logger.info("Dry run: would build fake PE fixtures")
             return
         if not self._ensure_rundir():
             self.logger.warning("No run directory specified, cannot build fixtures")
             return
-        self._make_samples()
+        if self._run_options() is None:
+            self._make_samples()
         self._make_psds()
         self.logger.info(f"Built fake PE fixtures in {self.production.rundir}")
 
     def submit_dag(self, dryrun=False):
-        """Build the fixtures and mark this production complete."""
+        """
+        Build the fixtures and mark this production complete, or for a
+        simulated run, start it.
+        """
         self.build_dag(dryrun=dryrun)
         if dryrun:
             self.logger.info("Dry run: would submit fake PE job")
             return 12345
+        if self._run_options() is not None and self.production.rundir:
+            state = self._start_run()
+            self.logger.info(
+                f"Started a simulated run of {state['runtime']:.0f} s"
+            )
+            return 12345
         self.production.status = "complete"
         return 12345
 
     def detect_completion(self):
         if not self.production.rundir:
             return False
+        if self._run_options() is not None:
+            self._advance()
         return os.path.exists(self._samples_path())
 
+    def while_running(self):
+        """Advance a simulated run, writing any checkpoints which are due."""
+        state = self._advance()
+        if state is not None:
+            elapsed = self._now() - state["submitted"]
+            self.logger.info(
+                f"Simulated run attempt {state['attempt']}: {state['status']}, "
+                f"{min(elapsed, state['runtime']):.0f} of {state['runtime']:.0f} s"
+            )
+
+    def resurrect(self):
+        """
+        Retry a failed simulated run, until its ``retries`` are used up.
+
+        Raises
+        ------
+        PipelineException
+            If the run has failed with no retries left; the monitor then
+            marks the production stuck.
+        """
+        state = self._advance()
+        if state is None or state["status"] != "failed":
+            return
+        if state["attempt"] > int(self._run_options()["retries"]):
+            raise PipelineException(
+                f"The simulated run of {self.production.name} failed "
+                f"{state['attempt']} times."
+            )
+        self._start_run(state["attempt"] + 1)
+
     def after_completion(self):
         super().after_completion()
         self.production.status = "complete"
@@ -180,15 +1282,663 @@ class FakeCBCPipeline(Pipeline):
 
     def collect_assets(self):
         """
-        Advertise the fake samples and PSDs to downstream productions.
+        Advertise the fake samples, PSDs and calibration envelopes to
+        downstream productions.
 
         This is the key piece of wiring: a downstream analysis's
         ``_previous_assets()`` merges whatever ``collect_assets()`` returns
-        here, so the ``"samples"``/``"psds"`` keys are what a ``PESummary``
-        production (via ``needs:``) will pick up.
+        here, so the ``"samples"``/``"psds"``/``"calibration"`` keys are
+        what a ``PESummary`` production (via ``needs:``) will pick up.
         """
         samples = self.samples()
         assets = {"samples": samples[0] if samples else None}
         if self.production.rundir:
             assets["psds"] = self._psd_paths()
+            calibration = self._calibration_paths()
+            if calibration:
+                assets["calibration"] = calibration
         return assets
+
+
+#: HTCondor's job status codes, as the schedd reports them.
+IDLE, RUNNING, REMOVED, COMPLETED = 1, 2, 3, 4
+
+
+class FakeScheduler:
+    """
+    A local stand-in for an HTCondor schedd, for offline throughput tests.
+
+    It takes the same submit descriptions as asimov's schedulers (a
+    :class:`asimov.scheduler.JobDescription` or an HTCondor-style dict) and
+    implements the rest of the :class:`asimov.scheduler.Scheduler`
+    interface, without importing it so that this module stays light. Jobs
+    wait out a queue latency, then run when one of ``slots`` is free,
+    highest ``priority`` first, then in order of submission. Each job's
+    ``log`` gets HTCondor-style job events (submitted, executing,
+    terminated, aborted).
+
+    DAGs are run as DAGMan would (see :meth:`submit_dag`): each node is
+    queued once its parents have succeeded, and is never run if any of
+    them fails.
+
+    Time is kept by a clock (see :func:`default_clock`); the queue is
+    brought up to the clock's time whenever the scheduler is used, so with
+    a :class:`SimulatedClock` a whole batch can be run deterministically
+    in no time. Use it in place of a pipeline's configured scheduler with,
+    e.g., ``pipeline._scheduler = FakeScheduler(slots=10)``.
+
+    Parameters
+    ----------
+    slots : int, optional
+        How many jobs may run at once; unlimited by default.
+    latency : float or dict, optional
+        The seconds from submission until a job may start, or a
+        distribution of them (see :func:`draw_runtime`).
+    runtime : float or dict, optional
+        How long a job runs for, unless ``execute`` is set.
+    failure_probability : float, optional
+        The chance a job (unless executed) exits with return value 1.
+    busy_probability : float, optional
+        The chance a submission is refused with a :class:`TimeoutError`,
+        as a busy schedd's is.
+    execute : bool, optional
+        Run each job's command locally when it starts, finishing it when
+        the command exits, rather than simulating its runtime.
+    clock : optional
+        The clock; :func:`default_clock` by default.
+    seed : int, optional
+        The seed for the latencies, runtimes and failures drawn.
+    """
+
+    def __init__(self, slots=None, latency=0, runtime=0, failure_probability=0,
+                 busy_probability=0, execute=False, clock=None, seed=1234):
+        import numpy as np
+
+        self.slots = slots
+        self.latency = latency
+        self.runtime = runtime
+        self.failure_probability = failure_probability
+        self.busy_probability = busy_probability
+        self.execute = execute
+        self.clock = clock or default_clock()
+        self.jobs = {}
+        self._rng = np.random.default_rng(seed)
+        self._next_id = 1
+        self._time = self.clock.now()
+
+    @staticmethod
+    def _description(job_description):
+        if hasattr(job_description, "to_htcondor"):
+            return job_description.to_htcondor()
+        return dict(job_description)
+
+    def _log(self, job, code, time_, message):
+        path = job["description"].get("log")
+        if not path:
+            return
+        stamp = datetime.datetime.fromtimestamp(
+            time_, datetime.timezone.utc
+        ).strftime("%Y-%m-%d %H:%M:%S")
+        with open(path, "a") as log:
+            log.write(f"{code:03d} ({job['id']:03d}.000.000) {stamp} {message}\n...\n")
+
+    def submit(self, job_description):
+        """
+        Queue a job.
+
+        Returns
+        -------
+        int
+            The job's cluster id.
+
+        Raises
+        ------
+        TimeoutError
+            If the (simulated) schedd is busy.
+        RuntimeError
+            If the description has no executable.
+        """
+        self._update()
+        description = self._description(job_description)
+        if not description.get("executable"):
+            raise RuntimeError("No executable specified in job description")
+        if self._rng.random() < self.busy_probability:
+            raise TimeoutError("Timed out talking to the fake schedd; try again")
+        job = self._queue(description, self.clock.now())
+        self._update()
+        return job["id"]
+
+    def _queue(self, description, now, parents=(), dag=None):
+        """
+        Add a job to the queue; one with ``parents`` only becomes eligible
+        to run (after its latency) once they have all succeeded.
+        """
+        latency = draw_runtime(self._rng, self.latency)
+        job = {
+            "id": self._next_id,
+            "description": description,
+            "name": description.get("batch_name", "asimov job"),
+            "priority": int(description.get("priority", 0)),
+            "status": IDLE,
+            "submitted": now,
+            "latency": latency,
+            "eligible": None if parents else now + latency,
+            "started": None,
+            "end": None,
+            "returncode": None,
+            "process": None,
+            "parents": list(parents),
+            "dag": dag,
+            "nodes": None,
+        }
+        self._next_id += 1
+        self.jobs[job["id"]] = job
+        self._log(job, 0, now, "Job submitted from host: <127.0.0.1:0?fake>")
+        return job
+
+    @staticmethod
+    def _read_submit_file(path, macros, directory):
+        """
+        Read an HTCondor submit file's ``key = value`` commands, expanding
+        ``$(macro)`` references to a DAG node's ``VARS``.
+        """
+        import re
+
+        description = {}
+        with open(path) as submit_file:
+            for line in submit_file:
+                line = line.strip()
+                if not line or line.startswith("#") or line.lower().startswith("queue"):
+                    continue
+                key, _, value = line.partition("=")
+                description[key.strip().lower()] = re.sub(
+                    r"\$\((\w+)\)",
+                    lambda match: macros.get(match.group(1), match.group(0)),
+                    value.strip(),
+                )
+        description.setdefault("initialdir", directory)
+        for key in ("output", "error", "log"):
+            if description.get(key):
+                description[key] = os.path.join(description["initialdir"], description[key])
+        return description
+
+    def submit_dag(self, dag_file, batch_name=None, **kwargs):
+        """
+        Queue an HTCondor DAG's nodes as jobs, as DAGMan would.
+
+        The DAG's ``JOB`` (with an optional ``DIR``), ``PARENT ... CHILD``
+        and ``VARS`` lines are followed; any other DAG commands (``RETRY``,
+        ``SCRIPT``, ...) are ignored. Each node's submit file is read for
+        its ``key = value`` commands. The DAG itself is listed as a job,
+        which runs (without taking a slot) until every node has finished
+        or been cancelled, and fails if any node did.
+
+        Returns
+        -------
+        int
+            The DAG's cluster id.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the DAG file, or one of its submit files, does not exist.
+        ValueError
+            If a ``PARENT ... CHILD`` line names a node which doesn't exist.
+        TimeoutError
+            If the (simulated) schedd is busy.
+        """
+        import shlex
+
+        self._update()
+        directory = os.path.dirname(os.path.abspath(dag_file))
+        nodes, edges, macros = {}, [], {}
+        with open(dag_file) as dag:
+            for line in dag:
+                words = shlex.split(line, comments=True)
+                if not words:
+                    continue
+                keyword = words[0].upper()
+                if keyword == "JOB":
+                    node_directory = directory
+                    if len(words) > 4 and words[3].upper() == "DIR":
+                        node_directory = os.path.join(directory, words[4])
+                    nodes[words[1]] = (
+                        os.path.join(node_directory, words[2]), node_directory
+                    )
+                elif keyword == "PARENT":
+                    split = [word.upper() for word in words].index("CHILD")
+                    edges += [
+                        (parent, child)
+                        for parent in words[1:split] for child in words[split + 1:]
+                    ]
+                elif keyword == "VARS":
+                    macros.setdefault(words[1], {}).update(
+                        word.split("=", 1) for word in words[2:]
+                    )
+        for edge in edges:
+            unknown = set(edge) - set(nodes)
+            if unknown:
+                raise ValueError(f"DAG {dag_file} has no node {sorted(unknown)[0]}")
+        batch_name = batch_name or os.path.basename(dag_file)
+        descriptions = {}
+        for name, (submit_file, node_directory) in nodes.items():
+            description = self._read_submit_file(
+                submit_file, macros.get(name, {}), node_directory
+            )
+            description.setdefault("batch_name", batch_name)
+            descriptions[name] = description
+        if self._rng.random() < self.busy_probability:
+            raise TimeoutError("Timed out talking to the fake schedd; try again")
+
+        now = self.clock.now()
+        dag = self._queue(
+            {"executable": "condor_dagman", "arguments": dag_file,
+             "batch_name": batch_name, **kwargs},
+            now,
+        )
+        dag["status"], dag["started"], dag["nodes"] = RUNNING, now, []
+        # The nodes are queued in order, so their ids follow the DAG's.
+        ids = {name: dag["id"] + 1 + number for number, name in enumerate(descriptions)}
+        for name, description in descriptions.items():
+            parents = [ids[parent] for parent, child in edges if child == name]
+            job = self._queue(description, now, parents=parents, dag=dag["id"])
+            dag["nodes"].append(job["id"])
+        self._update()
+        return dag["id"]
+
+    def _command(self, description):
+        import shlex
+
+        arguments = description.get("arguments") or ""
+        if isinstance(arguments, str):
+            arguments = shlex.split(arguments)
+        return [description["executable"], *arguments]
+
+    def _start(self, job, time_):
+        job["status"], job["started"] = RUNNING, time_
+        description = job["description"]
+        self._log(job, 1, time_, "Job executing on host: <127.0.0.1:0?fake>")
+        if not self.execute:
+            job["end"] = time_ + draw_runtime(self._rng, self.runtime)
+            job["returncode"] = int(self._rng.random() < self.failure_probability)
+            return
+        import subprocess
+
+        outputs = [
+            open(description[key], "w") if description.get(key) else subprocess.DEVNULL
+            for key in ("output", "error")
+        ]
+        try:
+            job["process"] = subprocess.Popen(
+                self._command(description), cwd=description.get("initialdir"),
+                stdout=outputs[0], stderr=outputs[1],
+            )
+        finally:
+            for output in outputs:
+                if output is not subprocess.DEVNULL:
+                    output.close()
+
+    def _finish(self, job, time_):
+        job["status"], job["end"] = COMPLETED, time_
+        self._log(
+            job, 5, time_,
+            f"Job terminated.\n\t(1) Normal termination (return value {job['returncode']})",
+        )
+
+    def _update(self):
+        """
+        Bring the queue up to the clock's time, starting and finishing
+        jobs in the order their events fall.
+        """
+        now = self.clock.now()
+        for job in self.jobs.values():
+            if job["status"] == RUNNING and job["process"] is not None:
+                returncode = job["process"].poll()
+                if returncode is not None:
+                    job["returncode"], job["end"] = returncode, max(now, job["started"])
+                    job["process"] = None
+        self._settle(self._time)
+        while True:
+            running = [
+                j for j in self.jobs.values()
+                if j["status"] == RUNNING and j["nodes"] is None
+            ]
+            waiting = [
+                j for j in self.jobs.values()
+                if j["status"] == IDLE and j["eligible"] is not None
+            ]
+            events = []
+            ending = [j for j in running if j["end"] is not None]
+            if ending:
+                job = min(ending, key=lambda j: (j["end"], j["id"]))
+                events.append((job["end"], 0, self._finish, job))
+            if waiting and (self.slots is None or len(running) < self.slots):
+                start = max(self._time, min(j["eligible"] for j in waiting))
+                job = min(
+                    (j for j in waiting if j["eligible"] <= start),
+                    key=lambda j: (-j["priority"], j["id"]),
+                )
+                events.append((start, 1, self._start, job))
+            if not events:
+                break
+            time_, _, action, job = min(events, key=lambda e: e[:2])
+            if time_ > now:
+                break
+            self._time = max(self._time, time_)
+            action(job, time_)
+            self._settle(time_)
+        self._time = max(self._time, now)
+
+    @staticmethod
+    def _failed(job):
+        return job["status"] == REMOVED or (
+            job["status"] == COMPLETED and job["returncode"]
+        )
+
+    def _settle(self, time_):
+        """
+        Follow DAG dependencies at ``time_``: a node becomes eligible (after
+        its latency) once its parents have all succeeded, and is cancelled
+        if any of them failed; a DAG finishes once none of its nodes can
+        still run.
+        """
+        cancelled = True
+        while cancelled:
+            cancelled = False
+            for job in self.jobs.values():
+                if job["status"] != IDLE or job["eligible"] is not None:
+                    continue
+                parents = [self.jobs[parent] for parent in job["parents"]]
+                if any(self._failed(parent) for parent in parents):
+                    job["status"], job["end"] = REMOVED, time_
+                    self._log(job, 9, time_, "Job was aborted.")
+                    cancelled = True
+                elif all(parent["status"] == COMPLETED for parent in parents):
+                    job["eligible"] = max(p["end"] for p in parents) + job["latency"]
+        for dag in self.jobs.values():
+            if dag["nodes"] is None or dag["status"] != RUNNING:
+                continue
+            nodes = [self.jobs[node] for node in dag["nodes"]]
+            if all(node["status"] in (COMPLETED, REMOVED) for node in nodes):
+                dag["returncode"] = int(any(self._failed(node) for node in nodes))
+                self._finish(dag, time_)
+
+    def delete(self, job_id):
+        """Remove a job from the queue, stopping its command if running."""
+        self._update()
+        job = self.jobs.get(int(job_id))
+        if job is None or job["status"] not in (IDLE, RUNNING):
+            return
+        for node in job["nodes"] or ():
+            self.delete(node)
+        if job["process"] is not None:
+            job["process"].terminate()
+            job["process"].wait()
+            job["process"] = None
+        job["status"], job["end"] = REMOVED, self.clock.now()
+        self._log(job, 9, job["end"], "Job was aborted.")
+
+    def _record(self, job):
+        record = {
+            "id": job["id"],
+            "command": " ".join(self._command(job["description"])),
+            "hosts": int(job["status"] == RUNNING),
+            "status": job["status"],
+            "name": job["name"],
+        }
+        if job["dag"] is not None:
+            record["dag id"] = job["dag"]
+        return record
+
+    def query(self, job_id=None):
+        """The queued jobs, or just ``job_id`` if it is queued."""
+        self._update()
+        return [
+            self._record(job) for job in self.jobs.values()
+            if job["status"] in (IDLE, RUNNING)
+            and (job_id is None or job["id"] == int(job_id))
+        ]
+
+    def query_all_jobs(self):
+        return self.query()
+
+    def collect_history(self, cluster_id):
+        """
+        The history of a finished job, as :meth:`HTCondor.collect_history`
+        gives it.
+
+        Raises
+        ------
+        ValueError
+            If no job ``cluster_id`` has finished.
+        """
+        self._update()
+        job = self.jobs.get(int(cluster_id))
+        if job is None or job["status"] != COMPLETED:
+            raise ValueError(f"No history found for fake job {cluster_id}")
+        end = datetime.datetime.fromtimestamp(job["end"], datetime.timezone.utc)
+        return {
+            "end": end.strftime("%Y-%m-%d"),
+            "cpus": float(job["description"].get("request_cpus", 1)),
+            "gpus": float(job["description"].get("request_gpus", 0)),
+            "runtime": job["end"] - job["started"],
+        }
+
+
+#: The approximants ``subject_blueprints`` gives its fake analyses, in turn.
+APPROXIMANTS = ["IMRPhenomXPHM", "IMRPhenomD", "IMRPhenomPv2", "SEOBNRv4_ROM"]
+
+#: The minimum frequencies ``subject_blueprints`` draws from, per detector.
+MINIMUM_FREQUENCIES = [15, 20, 25]
+
+
+def subject_blueprints(n_analyses, event="FAKE_PE_SCALE_EVENT",
+                       interferometers=("H1", "L1"), samples=(1000, 10000),
+                       seed=0, prefix="fake-pe", subject="pesummary-subject",
+                       **fake_samples):
+    """
+    Blueprints for an event with ``n_analyses`` fake upstream analyses and
+    a refreshable PESummary ``SubjectAnalysis`` combining them all.
+
+    The analyses vary as real ones do: their approximants cycle through
+    :data:`APPROXIMANTS`, and each detector's minimum frequency and the
+    number of samples (log-uniformly between the ``samples`` bounds) are
+    drawn at random, reproducibly for a given ``seed``. Each analysis has
+    its own sample ``seed``.
+
+    Parameters
+    ----------
+    n_analyses : int
+        The number of fake upstream analyses.
+    event : str, optional
+        The event's name.
+    interferometers : list, optional
+        The event's detectors.
+    samples : tuple, optional
+        The fewest and most samples an analysis has.
+    seed : int, optional
+        The random seed.
+    prefix : str, optional
+        The analyses are named ``<prefix>-1``, ``<prefix>-2``, ...
+    subject : str, optional
+        The ``SubjectAnalysis``' name.
+    **fake_samples
+        Further ``fake samples`` options for every analysis, e.g.
+        ``format="hdf5"`` or ``structured=True``.
+
+    Returns
+    -------
+    list
+        The event's blueprint, each analysis' and then the
+        ``SubjectAnalysis``', ready for ``asimov apply``.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    fewest, most = samples
+    counts = np.exp(rng.uniform(np.log(fewest), np.log(most), n_analyses))
+    documents = [
+        {"kind": "event", "name": event, "interferometers": list(interferometers)}
+    ]
+    for number in range(n_analyses):
+        documents.append({
+            "kind": "analysis",
+            "event": event,
+            "name": f"{prefix}-{number + 1}",
+            "pipeline": "fakecbcpipeline",
+            "status": "ready",
+            "waveform": {
+                "approximant": APPROXIMANTS[number % len(APPROXIMANTS)],
+                "reference frequency": 20,
+                "minimum frequency": {
+                    ifo: int(rng.choice(MINIMUM_FREQUENCIES))
+                    for ifo in interferometers
+                },
+            },
+            "fake samples": {
+                "number": int(round(counts[number])),
+                "seed": int(rng.integers(2**31)),
+                **fake_samples,
+            },
+        })
+    documents.append({
+        "kind": "analysis",
+        "event": event,
+        "name": subject,
+        "pipeline": "pesummary",
+        "analyses": [{"pipeline": "fakecbcpipeline"}],
+        "refreshable": True,
+        "status": "ready",
+    })
+    return documents
+
+
+#: The kinds of PESummary production :func:`ledger_blueprints` can give
+#: each event.
+LEDGER_KINDS = ("single", "subject")
+
+
+def ledger_blueprints(n_events, kind="subject", analyses=2, seed=0,
+                      prefix="FAKE_PE_LEDGER", **options):
+    """
+    Blueprints for a ledger of ``n_events`` events with PESummary
+    productions.
+
+    Each event has ``analyses`` fake upstream analyses, varied as in
+    :func:`subject_blueprints`. With ``kind="subject"``, a refreshable
+    ``SubjectAnalysis`` combines them; with ``kind="single"``, each has its
+    own PESummary production which ``needs:`` it.
+
+    Parameters
+    ----------
+    n_events : int
+        The number of events.
+    kind : str, optional
+        One of :data:`LEDGER_KINDS`.
+    analyses : int, optional
+        The number of fake analyses per event.
+    seed : int, optional
+        The random seed; each event is drawn with its own.
+    prefix : str, optional
+        The events are named ``<prefix>_00000``, ``<prefix>_00001``, ...
+    **options
+        Further keyword arguments for :func:`subject_blueprints`.
+
+    Returns
+    -------
+    list
+        Every event's blueprints, each followed by its analyses'.
+
+    Raises
+    ------
+    ValueError
+        If ``kind`` is not one of :data:`LEDGER_KINDS`.
+    """
+    if kind not in LEDGER_KINDS:
+        raise ValueError(f"Unknown ledger kind {kind!r}; use one of {LEDGER_KINDS}")
+    documents = []
+    for number in range(n_events):
+        event = subject_blueprints(
+            analyses, event=f"{prefix}_{number:05d}", seed=seed + number, **options
+        )
+        if kind == "single":
+            upstream = event[1:-1]
+            event = event[:-1] + [
+                {
+                    "kind": "analysis",
+                    "event": analysis["event"],
+                    "name": f"pesummary-{index}",
+                    "pipeline": "pesummary",
+                    "needs": [analysis["name"]],
+                    "waveform": analysis["waveform"],
+                    "status": "ready",
+                }
+                for index, analysis in enumerate(upstream, 1)
+            ]
+        documents += event
+    return documents
+
+
+def write_blueprints(path, documents):
+    """Write blueprints as one multi-document YAML file for ``asimov apply``."""
+    import yaml
+
+    with open(path, "w") as blueprint_file:
+        yaml.safe_dump_all(documents, blueprint_file, sort_keys=False)
+    return path
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Write blueprints for an event with many fake analyses "
+        "and a PESummary SubjectAnalysis combining them, or for a ledger of "
+        "many such events."
+    )
+    parser.add_argument("analyses", type=int, nargs="?",
+                        help="The number of fake analyses")
+    parser.add_argument("--events", type=int,
+                        help="Write a ledger of this many such events instead")
+    parser.add_argument("--kind", choices=LEDGER_KINDS, default="subject",
+                        help="The ledger's PESummary productions")
+    parser.add_argument("--output", default="blueprints.yaml")
+    parser.add_argument("--event", default="FAKE_PE_SCALE_EVENT")
+    parser.add_argument("--samples", type=int, nargs=2, default=(1000, 10000),
+                        metavar=("FEWEST", "MOST"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=SAMPLE_FORMATS)
+    parser.add_argument("--structured", action="store_true")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Remove every cached fixture (see cached_fixture)")
+    args = parser.parse_args(argv)
+
+    if args.clear_cache:
+        clear_fixture_cache()
+        print("Cleared the fixture cache")
+        if args.analyses is None:
+            return
+    if args.analyses is None:
+        parser.error("the number of fake analyses is required")
+
+    fake_samples = {}
+    if args.format:
+        fake_samples["format"] = args.format
+    if args.structured:
+        fake_samples["structured"] = True
+    if args.events:
+        documents = ledger_blueprints(
+            args.events, kind=args.kind, analyses=args.analyses,
+            samples=args.samples, seed=args.seed, **fake_samples,
+        )
+    else:
+        documents = subject_blueprints(
+            args.analyses, event=args.event, samples=args.samples,
+            seed=args.seed, **fake_samples,
+        )
+    write_blueprints(args.output, documents)
+    print(f"Wrote {len(documents)} blueprints to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+A cap on how many summary page jobs a project runs at once.
+
+A campaign-wide refresh can make every PESummary production in a project
+ready at the same moment, and submitting all of them together saturates
+the shared webroot filesystem that every one of those jobs writes to. A
+:class:`JobThrottle` records which PESummary jobs this project has in the
+scheduler, and holds any submission beyond the configured limits in a
+local queue (a small JSON file in the project's ``.asimov`` directory)
+until earlier jobs have left the scheduler.
+
+A queued production is reported to asimov with a placeholder job id.
+Every submission and release reads, changes and rewrites the state while
+holding a lock on it (see :meth:`JobThrottle.locked`), as several asimov
+processes may be submitting and monitoring the same project at once.
+Queued jobs are released, highest priority first, whenever a slot is free:
+by any PESummary submission, and on each monitor pass by PESummary's own
+``running`` and ``processing`` states (see :mod:`asimov_pesummary.monitor`),
+which save the released job's id to the ledger. Queued jobs whose
+production has left the ledger, or is no longer in one of
+:data:`LIVE_STATES`, are dropped, so they can't hold up those behind them.
+"""
+
+import contextlib
+import fcntl
+import json
+import os
+import time
+
+from asimov import logger
+
+#: The job id reported to asimov for a submission held in the local queue.
+#: Not ``0``, which ``submit_dag`` returns for a dry run.
+QUEUED_JOB_ID = -1
+
+#: The statuses in which a production's job may be waiting in the queue:
+#: ``running`` or ``processing`` (as ``asimov monitor`` marks a refreshed
+#: ``SubjectAnalysis``), or still ``ready`` if its submission has been
+#: queued but its new status not yet saved.
+LIVE_STATES = frozenset({"ready", "running", "processing"})
+
+
+def _cluster(job_id):
+    """Normalise a scheduler job id (e.g. ``"1234.0"``) to its cluster."""
+    return str(job_id).split(".")[0]
+
+
+class JobThrottle:
+    """
+    The PESummary jobs a project has submitted, and those waiting to be.
+
+    Parameters
+    ----------
+    path : str
+        The JSON file holding the throttle's state.
+    max_jobs : int, optional
+        The maximum number of PESummary jobs in the scheduler at once for
+        the whole project. Unset means no limit.
+    max_jobs_per_event : int, optional
+        The maximum number of PESummary jobs in the scheduler at once for
+        any one event. Unset means no limit.
+    """
+
+    #: Seconds for which a list of jobs fetched from the scheduler is
+    #: reused, so that releasing several queued jobs in one monitor pass
+    #: doesn't query the whole queue once per job.
+    prune_interval = 30
+
+    _pruned = {}
+
+    def __init__(self, path, max_jobs=None, max_jobs_per_event=None):
+        self.path = path
+        self.max_jobs = max_jobs
+        self.max_jobs_per_event = max_jobs_per_event
+        self._load()
+
+    @staticmethod
+    def key(event, production):
+        return f"{event}/{production}"
+
+    def _load(self):
+        self.active = {}
+        self.queued = {}
+        try:
+            with open(self.path) as state_file:
+                state = json.load(state_file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as error:
+            logger.warning(f"Ignoring unreadable PESummary job state {self.path}: {error}")
+            return
+        self.active = state.get("active", {})
+        self.queued = state.get("queued", {})
+
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Hold an exclusive lock on the throttle's state, reloading it on
+        entry, for the whole of a read, change and :meth:`save`.
+
+        The lock is taken on a ``.lock`` file beside the state, since
+        :meth:`save` replaces the state file itself.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._load()
+                yield self
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self):
+        """Write the throttle's state, atomically."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as state_file:
+            json.dump({"active": self.active, "queued": self.queued}, state_file)
+        os.replace(temporary, self.path)
+
+    def prune(self, scheduler, force=False):
+        """
+        Forget active jobs which are no longer in the scheduler.
+
+        Parameters
+        ----------
+        scheduler : :class:`asimov.scheduler.Scheduler`
+            The scheduler to query.
+        force : bool, optional
+            Query the scheduler even if it was queried recently.
+
+        Returns
+        -------
+        bool
+            Whether the scheduler was queried.
+        """
+        if not self.active:
+            return False
+        last = self._pruned.get(self.path)
+        if not force and last and time.time() - last[0] < self.prune_interval:
+            in_scheduler = last[1]
+            queried = False
+        else:
+            try:
+                jobs = scheduler.query_all_jobs()
+            except Exception as error:
+                # Keep every job as active: over-counting only delays a
+                # release, whereas under-counting would breach the limit.
+                logger.warning(f"Could not query the scheduler for PESummary jobs: {error}")
+                return True
+            in_scheduler = {_cluster(job.get("id")) for job in jobs}
+            self._pruned[self.path] = (time.time(), in_scheduler)
+            queried = True
+        self.active = {
+            key: entry
+            for key, entry in self.active.items()
+            if _cluster(entry["job id"]) in in_scheduler
+        }
+        return queried
+
+    def has_slot(self, event):
+        """Whether another job for ``event`` fits within the limits."""
+        if self.max_jobs and len(self.active) >= self.max_jobs:
+            return False
+        if self.max_jobs_per_event:
+            for_event = sum(1 for entry in self.active.values() if entry["event"] == event)
+            if for_event >= self.max_jobs_per_event:
+                return False
+        return True
+
+    def record(self, event, production, job_id):
+        """Record a job which has been submitted to the scheduler."""
+        key = self.key(event, production)
+        self.queued.pop(key, None)
+        self.active[key] = {"event": event, "job id": job_id}
+        cached = self._pruned.get(self.path)
+        if cached:
+            cached[1].add(_cluster(job_id))
+
+    def enqueue(self, event, production, submit_description):
+        """Hold a submission in the local queue."""
+        # A production has one job at a time, so any job recorded for it
+        # earlier has been superseded.
+        key = self.key(event, production)
+        self.active.pop(key, None)
+        # Resubmitting a job which is already waiting keeps its place.
+        queued_at = self.queued.get(key, {}).get("queued at", time.time())
+        self.queued[key] = {
+            "event": event,
+            "queued at": queued_at,
+            "submit description": submit_description,
+        }
+
+    def discard(self, key):
+        """Drop a queued job, e.g. one whose production has gone."""
+        self.queued.pop(key, None)
+
+    def next_release(self):
+        """
+        Return the key of the queued job which should be submitted next.
+
+        Higher priority jobs are released first and, at equal priority,
+        the longest-waiting; a job whose event is at its own limit is
+        passed over for one which fits. Returns ``None`` if nothing fits.
+        """
+        ordered = sorted(
+            self.queued.items(),
+            key=lambda item: (
+                -item[1]["submit description"].get("priority", 0),
+                item[1]["queued at"],
+            ),
+        )
+        for key, entry in ordered:
+            if self.has_slot(entry["event"]):
+                return key
+        return None
@@ -0,0 +1,170 @@
+"""
+Opt-in timing of the PESummary submission path.
+
+Submitting a summary page job looks up the upstream analyses' assets and
+configs, builds the command, writes a job script and calls the scheduler;
+on a ledger of a thousand events, any of these can be where ``asimov manage
+submit`` spends its time. Setting ``timing: true`` in a production's (or
+the project's) ``postprocessing.pesummary`` block makes each
+``submit_dag`` call time those phases and count the lookups and scheduler
+calls it makes, and log the result as one structured record::
+
+    PESummary timing {"event": "GW150914", "production": "Prod0",
+                      "total": 0.41, "phases": {"assets": 0.02, ...},
+                      "counts": {"config lookups": 1, ...}}
+
+The record is also attached to the log record as ``pesummary_timing``,
+for handlers which ship structured fields. If ``timing report`` is set to
+a path (relative to the project root), each record is appended to it as a
+line of JSON, and :func:`summarise` totals a report across a whole run::
+
+    python -m asimov_pesummary.timing .asimov/pesummary_timing.jsonl
+"""
+
+import contextlib
+import json
+import os
+import time
+
+
+class NullTimer:
+    """A timer which records nothing, used when timing is off."""
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        yield
+
+    def count(self, name, number=1):
+        pass
+
+    def record(self):
+        return None
+
+
+class SubmitTimer:
+    """
+    The phase timings and call counts of one ``submit_dag`` call.
+
+    Time spent in a phase entered more than once (e.g. ``assets``, once per
+    source analysis) is summed. Time outside any phase is reported as
+    ``other``; phases don't nest.
+
+    Parameters
+    ----------
+    event : str
+        The event being submitted.
+    production : str
+        The production being submitted.
+    """
+
+    def __init__(self, event, production):
+        self.event = event
+        self.production = production
+        self.phases = {}
+        self.counts = {}
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the enclosed block as part of phase ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - start
+
+    def count(self, name, number=1):
+        """Count ``number`` more calls of kind ``name``."""
+        self.counts[name] = self.counts.get(name, 0) + number
+
+    def record(self):
+        """Return the timings so far as a JSON-serialisable dictionary."""
+        total = time.perf_counter() - self._start
+        phases = {name: round(seconds, 6) for name, seconds in self.phases.items()}
+        phases["other"] = round(max(total - sum(self.phases.values()), 0), 6)
+        return {
+            "event": self.event,
+            "production": self.production,
+            "time": time.time(),
+            "total": round(total, 6),
+            "phases": phases,
+            "counts": dict(self.counts),
+        }
+
+
+def append(path, record):
+    """Append a timing record to a JSON-lines report."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as report:
+        report.write(json.dumps(record) + "\n")
+
+
+def summarise(path):
+    """
+    Total a JSON-lines timing report.
+
+    Parameters
+    ----------
+    path : str
+        The report, as written by ``timing report``.
+
+    Returns
+    -------
+    dict
+        The number of submissions and their total time, and for each phase
+        its total, mean and maximum time and its share of the total, with
+        the summed counts.
+    """
+    submissions, total, phases, counts = 0, 0.0, {}, {}
+    with open(path) as report:
+        for line in report:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            submissions += 1
+            total += record["total"]
+            for name, seconds in record["phases"].items():
+                phases.setdefault(name, []).append(seconds)
+            for name, number in record["counts"].items():
+                counts[name] = counts.get(name, 0) + number
+    return {
+        "submissions": submissions,
+        "total": total,
+        "phases": {
+            name: {
+                "total": sum(times),
+                "mean": sum(times) / len(times),
+                "max": max(times),
+                "share": sum(times) / total if total else 0,
+            }
+            for name, times in sorted(
+                phases.items(), key=lambda item: -sum(item[1])
+            )
+        },
+        "counts": counts,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Summarise a PESummary submission timing report."
+    )
+    parser.add_argument("report")
+    args = parser.parse_args(argv)
+
+    summary = summarise(args.report)
+    print(f"{summary['submissions']} submissions, {summary['total']:.2f} s in total")
+    for name, phase in summary["phases"].items():
+        print(
+            f"  {name:<16} {phase['total']:9.3f} s  {phase['share']:6.1%}  "
+            f"mean {phase['mean'] * 1e3:8.2f} ms  max {phase['max'] * 1e3:8.2f} ms"
+        )
+    for name, number in summary["counts"].items():
+        print(f"  {name:<16} {number}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
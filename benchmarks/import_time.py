@@ -0,0 +1,97 @@
+"""
+Measure how much importing this plugin adds to every asimov command.
+
+asimov imports every registered ``asimov.pipelines`` entry point whenever
+its CLI starts, so anything this package does at import time is paid on
+every ``asimov`` invocation -- including each run of ``asimov monitor``
+from cron. This times fresh interpreters importing asimov's own pipeline
+machinery, then times importing this package's entry points on top of
+it, so the numbers exclude asimov's own (much larger) start-up cost.
+
+Usage::
+
+    python benchmarks/import_time.py [--repeat 20] [--output results.json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+BASELINE = "import asimov.pipeline"
+PLUGIN = "import asimov_pesummary; import asimov_pesummary.testing"
+
+_SCRIPT = """
+import sys, time
+{baseline}
+before = set(sys.modules)
+start = time.perf_counter()
+{plugin}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(" ".join(sorted(set(sys.modules) - before)))
+"""
+
+
+def _run(plugin):
+    """Import the plugin in a fresh interpreter; return (seconds, modules)."""
+    output = subprocess.run(
+        [sys.executable, "-c", _SCRIPT.format(baseline=BASELINE, plugin=plugin)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.splitlines()
+    return float(output[0]), output[1].split() if len(output) > 1 else []
+
+
+def measure(repeat=20):
+    """
+    Time the plugin's import overhead.
+
+    Parameters
+    ----------
+    repeat : int, optional
+        The number of fresh interpreters to time.
+
+    Returns
+    -------
+    dict
+        The median and minimum import times (in seconds) of the plugin on
+        top of ``asimov.pipeline``, and the modules that import loads.
+    """
+    timings, modules = [], []
+    for _ in range(repeat):
+        elapsed, modules = _run(PLUGIN)
+        timings.append(elapsed)
+    return {
+        "benchmark": "import_time",
+        "repeat": repeat,
+        "median": statistics.median(timings),
+        "minimum": min(timings),
+        "modules": modules,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = measure(repeat=args.repeat)
+    print(
+        f"asimov_pesummary import on top of asimov.pipeline: "
+        f"median {results['median'] * 1e3:.1f} ms, "
+        f"minimum {results['minimum'] * 1e3:.1f} ms"
+    )
+    print(f"Modules imported by the plugin ({len(results['modules'])}):")
+    print("  " + ", ".join(results["modules"]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
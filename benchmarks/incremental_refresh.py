@@ -0,0 +1,149 @@
+"""
+Measure what adding one analysis to an existing summary page costs.
+
+A ``SubjectAnalysis`` refresh which can use ``--add_to_existing`` runs
+``summarypages`` only on the newly-added labels; the existing labels'
+samples and derived products are carried over from the page's metafile.
+One which can't rebuilds the whole page, rerunning every label. This
+creates a local asimov project with an event of ``--labels``
+``FakeCBCPipeline`` analyses and a PESummary ``SubjectAnalysis`` combining
+them (see ``subject_scaling.py``), and builds its page with the real
+``summarypages``. It then adds one more analysis to the event and times
+both ways of adding it: the incremental refresh PESummary plans for the
+existing page, and the full build it plans for a second
+``SubjectAnalysis`` of the same analyses with no page yet.
+
+The jobs use the ``minimal`` preset by default, which keeps each label's
+cost down to conversion and plotting; expensive stages can be added with
+``--preset`` or extra arguments.
+
+Running it needs asimov and PESummary; each label takes around a minute.
+
+Usage::
+
+    python benchmarks/incremental_refresh.py [--labels 4] [--samples 200]
+        [--preset minimal] [--output results.json]
+        [-- extra summarypages flags]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from asimov_pesummary.testing import subject_blueprints
+
+sys.path.insert(0, os.path.dirname(__file__))
+from subject_scaling import EVENT, SUBJECT, apply, plan  # noqa: E402
+
+#: The SubjectAnalysis which rebuilds the page from scratch.
+REBUILD = "pesummary-rebuild"
+
+
+def _time(command, log):
+    start = time.perf_counter()
+    with open(log, "w") as stderr:
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=stderr)
+    return time.perf_counter() - start
+
+
+def measure(labels=4, n_samples=200, preset="minimal", extra=(), directory=None):
+    """
+    Time a full rebuild and an incremental refresh which each add one
+    label to a page of ``labels`` labels.
+
+    Parameters
+    ----------
+    labels : int, optional
+        The number of labels already on the page.
+    n_samples : int, optional
+        The number of samples in each fake analysis' posterior.
+    preset : str, optional
+        The PESummary ``preset`` the jobs use.
+    extra : list, optional
+        Further ``summarypages`` flags, e.g. to switch on an expensive
+        stage.
+    directory : str, optional
+        Where to create the project; a temporary directory by default.
+
+    Returns
+    -------
+    dict
+        The wall-clock seconds for each way of adding the label.
+
+    Raises
+    ------
+    RuntimeError
+        If PESummary doesn't plan the refresh as incremental.
+    """
+    documents = subject_blueprints(
+        labels + 1, event=EVENT, samples=(n_samples, n_samples), subject=SUBJECT
+    )
+    if preset:
+        documents[-1]["postprocessing"] = {"pesummary": {"preset": preset}}
+    rebuild = dict(documents[-1], name=REBUILD)
+    with tempfile.TemporaryDirectory(dir=directory) as project:
+        apply(project, documents[:-2] + documents[-1:])
+        build = _time(
+            plan(project)["command"] + list(extra),
+            os.path.join(project, "build.log"),
+        )
+
+        apply(project, [documents[-2], rebuild])
+        refresh = plan(project)
+        if not refresh["incremental"]:
+            raise RuntimeError(
+                f"PESummary planned a full rebuild of {SUBJECT}, not an "
+                "incremental refresh"
+            )
+        full = _time(
+            plan(project, subject=REBUILD)["command"] + list(extra),
+            os.path.join(project, "full.log"),
+        )
+        incremental = _time(
+            refresh["command"] + list(extra),
+            os.path.join(project, "incremental.log"),
+        )
+    return {
+        "benchmark": "incremental_refresh",
+        "labels": labels,
+        "samples": n_samples,
+        "preset": preset,
+        "extra": list(extra),
+        "initial build": build,
+        "full rebuild": full,
+        "incremental": incremental,
+        "saving": 1 - incremental / full,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--labels", type=int, default=4)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--preset", default="minimal")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("extra", nargs="*", help="Extra summarypages flags")
+    args = parser.parse_args(argv)
+
+    results = measure(
+        labels=args.labels, n_samples=args.samples, preset=args.preset,
+        extra=args.extra,
+    )
+    print(
+        f"Adding one label to a {args.labels}-label page: "
+        f"full rebuild {results['full rebuild']:.0f} s, "
+        f"incremental {results['incremental']:.0f} s "
+        f"({results['saving']:.0%} saved)"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
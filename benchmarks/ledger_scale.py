@@ -0,0 +1,342 @@
+"""
+Measure the PESummary plugin's overhead across ledgers of many events.
+
+asimov's monitor loads every event and production in the ledger on each
+pass, and asks each PESummary production for its assets and, once it is
+ready, its job, so whatever the plugin costs per production is paid many
+thousands of times over on a large ledger. For each number of events, this
+creates a local asimov project whose ledger holds that many events (from
+``asimov_pesummary.testing.ledger_blueprints``), each with fake upstream
+analyses and either one PESummary production per analysis (``single``) or
+a ``SubjectAnalysis`` combining them (``subject``). In a fresh process, it
+then times loading the ledger, gathering each PESummary production's
+assets and ``submit_dag(dryrun=True)``, and measures the memory each
+production takes; it also times importing the plugin (see
+``import_time.py``).
+
+The events share one event repository, as creating thousands of git
+repositories would dominate the set-up, and the fake analyses' fixtures
+are not built: neither is needed to assemble a job.
+
+Results are written with the commit and package versions they were
+measured at, and ``--compare`` reports the change in each timing from an
+earlier results file, so regressions show up across commits.
+
+Running it needs asimov.
+
+Usage::
+
+    python benchmarks/ledger_scale.py [--events 10 100 1000 5000]
+        [--kind single subject] [--analyses 2] [--output results.json]
+        [--compare baseline.json] [--tolerance 0.1]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from asimov_pesummary.testing import LEDGER_KINDS, ledger_blueprints
+
+sys.path.insert(0, os.path.dirname(__file__))
+import import_time  # noqa: E402
+from subject_scaling import CONFIGURATION, GIT, _asimov  # noqa: E402
+
+#: The shared event repository, relative to the project.
+REPOSITORY = os.path.join("checkouts", "shared")
+
+#: The timings compared between results files, per cell.
+TIMINGS = ("ledger load", "assets", "submit dryrun")
+
+
+def _populate(n_events, kind, analyses):
+    """
+    Run inside a project: write the ledger's events and productions
+    straight into it, and their configs into the shared repository.
+    """
+    from asimov import current_ledger
+    from asimov.event import Event, Production
+
+    repository = os.path.abspath(REPOSITORY)
+    category = os.path.join(repository, "analyses")
+    os.makedirs(category)
+    subprocess.run(["git", "init", "-q", repository], check=True)
+    subprocess.run(
+        ["git", "-C", repository, "commit", "-q", "--allow-empty", "-m", "Shared"],
+        check=True,
+    )
+
+    events = {}
+    for document in ledger_blueprints(n_events, kind=kind, analyses=analyses):
+        document = dict(document)
+        if document.pop("kind") == "event":
+            event = Event(
+                **document,
+                repository=repository,
+                working_directory=os.path.abspath(
+                    os.path.join("working", document["name"])
+                ),
+                ledger=current_ledger,
+            )
+            events[event.name] = event
+            continue
+        event = events[document.pop("event")]
+        event.add_production(
+            Production.from_dict(parameters=document, subject=event, ledger=current_ledger)
+        )
+        config = os.path.join(category, f"{document['name']}.ini")
+        if not os.path.exists(config):
+            open(config, "w").close()
+    for event in events.values():
+        current_ledger.update_event(event)
+
+
+def _rss():
+    """This process's peak resident memory, in bytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _summary(times):
+    ordered = sorted(times)
+    return {
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "total": sum(ordered),
+    }
+
+
+def _assets(production):
+    """Gather a PESummary production's assets as its job does."""
+    from asimov.analysis import SubjectAnalysis
+
+    if isinstance(production, SubjectAnalysis):
+        return [analysis.pipeline.collect_assets() for analysis in production.analyses]
+    return production._previous_assets()
+
+
+def _measure():
+    """
+    Run inside a project: time loading its ledger, then each PESummary
+    production's asset gathering and dry-run submission.
+    """
+    before = _rss()
+    start = time.perf_counter()
+    from asimov import current_ledger
+
+    events = current_ledger.events
+    load = time.perf_counter() - start
+    productions = [p for event in events for p in event.productions]
+    memory = (_rss() - before) / len(productions)
+
+    from asimov_pesummary.pesummary import PESummary
+
+    summaries = [p for p in productions if isinstance(p.pipeline, PESummary)]
+    tracemalloc.start()
+    pipelines = [PESummary(production) for production in summaries]
+    pipeline_memory = tracemalloc.get_traced_memory()[0] / len(pipelines)
+    tracemalloc.stop()
+    del pipelines
+
+    assets, submits = [], []
+    for production in summaries:
+        start = time.perf_counter()
+        _assets(production)
+        assets.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            production.pipeline.submit_dag(dryrun=True)
+        submits.append(time.perf_counter() - start)
+    return {
+        "productions": len(productions),
+        "pesummary productions": len(summaries),
+        "ledger load": load,
+        "memory per production": memory,
+        "memory per pipeline": pipeline_memory,
+        "assets": _summary(assets),
+        "submit dryrun": _summary(submits),
+    }
+
+
+def _child(project, *arguments):
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *arguments],
+        cwd=project, capture_output=True, text=True, env={**os.environ, **GIT},
+    )
+    if process.returncode:
+        tail = "".join(process.stderr.splitlines(keepends=True)[-20:])
+        raise RuntimeError(f"{' '.join(arguments)} failed; its output ends:\n{tail}")
+    output = process.stdout.strip()
+    return json.loads(output.splitlines()[-1]) if output else None
+
+
+def measure(n_events, kind="subject", analyses=2, directory=None):
+    """
+    Measure the plugin's overhead on a ledger of ``n_events`` events.
+
+    Parameters
+    ----------
+    n_events : int
+        The number of events in the ledger.
+    kind : str, optional
+        The events' PESummary productions: ``single`` or ``subject``.
+    analyses : int, optional
+        The number of fake upstream analyses per event.
+    directory : str, optional
+        Where to create the project; a temporary directory by default.
+
+    Returns
+    -------
+    dict
+        The seconds taken to load the ledger; the median, 95th percentile
+        and total seconds to gather a PESummary production's assets and to
+        dry-run its submission; and the bytes of memory each production
+        (from the growth in peak RSS while loading, so only meaningful for
+        larger ledgers) and each PESummary pipeline takes.
+    """
+    with tempfile.TemporaryDirectory(dir=directory) as project:
+        _asimov(project, "init", "ledger benchmark")
+        _asimov(project, "apply", "-f", os.path.abspath(CONFIGURATION))
+        start = time.perf_counter()
+        _child(project, "--populate", str(n_events), "--kind", kind,
+               "--analyses", str(analyses))
+        populate = time.perf_counter() - start
+        result = _child(project, "--measure")
+    return {
+        "events": n_events,
+        "kind": kind,
+        "analyses": analyses,
+        "populate": populate,
+        **result,
+    }
+
+
+def _provenance():
+    """The commit and versions results were measured at."""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    versions = {}
+    for package in ("asimov", "asimov-pesummary", "pesummary"):
+        try:
+            versions[package] = version(package)
+        except PackageNotFoundError:
+            versions[package] = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "versions": versions,
+    }
+
+
+def compare(results, baseline, tolerance=0.1):
+    """
+    Compare each cell's timings with those of an earlier run.
+
+    Parameters
+    ----------
+    results, baseline : dict
+        Results from :func:`main`.
+    tolerance : float, optional
+        The fractional slow-down reported as a regression.
+
+    Returns
+    -------
+    list
+        ``(events, kind, timing, before, after, regressed)`` for each
+        timing of each cell in both runs.
+    """
+    def seconds(cell, timing):
+        value = cell[timing]
+        return value["median"] if isinstance(value, dict) else value
+
+    earlier = {(c["events"], c["kind"]): c for c in baseline["cells"]}
+    changes = []
+    for cell in results["cells"]:
+        old = earlier.get((cell["events"], cell["kind"]))
+        if old is None:
+            continue
+        for timing in TIMINGS:
+            before, after = seconds(old, timing), seconds(cell, timing)
+            changes.append((
+                cell["events"], cell["kind"], timing, before, after,
+                after > before * (1 + tolerance),
+            ))
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--kind", nargs="+", choices=LEDGER_KINDS, default=list(LEDGER_KINDS))
+    parser.add_argument("--analyses", type=int, default=2)
+    parser.add_argument("--import-repeat", type=int, default=10)
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--compare", help="An earlier results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--populate", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.populate:
+        _populate(args.populate, args.kind[0], args.analyses)
+        return
+    if args.measure:
+        print(json.dumps(_measure()))
+        return
+
+    importing = import_time.measure(repeat=args.import_repeat)
+    results = {
+        "benchmark": "ledger_scale",
+        **_provenance(),
+        "import": {"median": importing["median"], "minimum": importing["minimum"]},
+        "cells": [],
+    }
+    print(f"Plugin import: {importing['median'] * 1e3:.1f} ms")
+    for kind in args.kind:
+        for n_events in args.events:
+            cell = measure(n_events, kind, args.analyses)
+            results["cells"].append(cell)
+            print(
+                f"{n_events:5d} events, {kind:7s}: load {cell['ledger load']:7.2f} s, "
+                f"assets {cell['assets']['median'] * 1e3:6.2f} ms, "
+                f"dry-run submit {cell['submit dryrun']['median'] * 1e3:6.2f} ms "
+                f"(p95 {cell['submit dryrun']['p95'] * 1e3:6.2f} ms), "
+                f"{cell['memory per production'] / 1024:6.1f} KiB/production"
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Compared with {baseline.get('commit') or args.compare}:")
+        for n_events, kind, timing, before, after, regressed in compare(
+            results, baseline, args.tolerance
+        ):
+            flag = "  REGRESSION" if regressed else ""
+            print(
+                f"{n_events:5d} events, {kind:7s} {timing:14s} "
+                f"{before * 1e3:9.2f} ms -> {after * 1e3:9.2f} ms "
+                f"({after / before - 1:+.0%}){flag}"
+            )
+    return results
+
+
+if __name__ == "__main__":
+    main()
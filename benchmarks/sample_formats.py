@@ -0,0 +1,104 @@
+"""
+Measure how long PESummary takes to read samples in each upstream format.
+
+``summarypages`` begins by reading every label's samples file, and how
+long that takes depends heavily on the format the upstream pipeline wrote.
+This writes the same synthetic posterior in each of
+``asimov_pesummary.testing.SAMPLE_FORMATS`` and times PESummary's own
+reader (``pesummary.io.read``, as ``summarypages`` uses) on each.
+
+Running it needs PESummary installed; bilby result files are read with
+bilby if it is installed, or PESummary's default reader if not.
+
+Usage::
+
+    python benchmarks/sample_formats.py [--samples 100000] [--repeat 3]
+        [--output results.json] [format ...]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from asimov_pesummary.testing import SAMPLE_FORMATS, write_samples
+
+
+def _read(path):
+    from pesummary.io import read
+
+    start = time.perf_counter()
+    result = read(path, package="gw")
+    result.samples_dict
+    return time.perf_counter() - start
+
+
+def measure(formats=None, n_samples=100_000, repeat=3, directory=None):
+    """
+    Time writing, and PESummary reading, a posterior in each format.
+
+    Parameters
+    ----------
+    formats : list, optional
+        The formats to measure; all of them by default.
+    n_samples : int, optional
+        The number of samples in the posterior.
+    repeat : int, optional
+        How many times to read each file; the fastest read is reported.
+    directory : str, optional
+        Where to write the files; a temporary directory by default.
+
+    Returns
+    -------
+    dict
+        Per format, the seconds taken to write and to read the file, and
+        its size in bytes.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        for file_format in formats or SAMPLE_FORMATS:
+            path = os.path.join(
+                scratch, f"{file_format}-{SAMPLE_FORMATS[file_format]}"
+            )
+            start = time.perf_counter()
+            write_samples(path, n_samples, file_format=file_format)
+            write = time.perf_counter() - start
+            results[file_format] = {
+                "write": write,
+                "read": min(_read(path) for _ in range(repeat)),
+                "size": os.path.getsize(path),
+            }
+    return {
+        "benchmark": "sample_formats",
+        "samples": n_samples,
+        "formats": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("formats", nargs="*", help="Formats to measure (default: all)")
+    args = parser.parse_args(argv)
+    unknown = set(args.formats) - set(SAMPLE_FORMATS)
+    if unknown:
+        parser.error(f"unknown formats {sorted(unknown)}; use {list(SAMPLE_FORMATS)}")
+
+    results = measure(args.formats, n_samples=args.samples, repeat=args.repeat)
+    print(f"{'format':<12} {'read (s)':>9} {'write (s)':>10} {'size (MB)':>10}")
+    for name, result in sorted(results["formats"].items(), key=lambda i: i[1]["read"]):
+        print(
+            f"{name:<12} {result['read']:9.3f} {result['write']:10.3f} "
+            f"{result['size'] / 1e6:10.1f}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Measure how a PESummary SubjectAnalysis scales with its number of labels.
+
+For each number of labels, this creates a local asimov project holding an
+event with that many ``FakeCBCPipeline`` analyses (generated by
+``asimov_pesummary.testing.subject_blueprints``) and a refreshable PESummary
+``SubjectAnalysis`` combining them, renders their configs with ``asimov
+manage build`` and builds the fake fixtures, and times assembling the ``summarypages`` job (what
+``_submit_subject_analysis`` does before it reaches the scheduler). With
+``--summarypages``, it also times running the assembled command; that takes
+around a minute per label.
+
+Running it needs asimov, and for ``--summarypages``, PESummary.
+
+Usage::
+
+    python benchmarks/subject_scaling.py [--labels 2 5 10 20 50]
+        [--samples 1000 10000] [--summarypages] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from asimov_pesummary.testing import subject_blueprints, write_blueprints
+
+EVENT = "FAKE_PE_SCALE_EVENT"
+SUBJECT = "pesummary-subject"
+
+#: The project configuration, as in the end-to-end test.
+CONFIGURATION = os.path.join(
+    os.path.dirname(__file__), os.pardir, "tests", "test_blueprints",
+    "testing_config.yaml",
+)
+
+#: asimov commits to the event repositories it creates, on ``master``.
+GIT = {
+    "GIT_CONFIG_COUNT": "3",
+    "GIT_CONFIG_KEY_0": "init.defaultBranch", "GIT_CONFIG_VALUE_0": "master",
+    "GIT_CONFIG_KEY_1": "user.name", "GIT_CONFIG_VALUE_1": "benchmark",
+    "GIT_CONFIG_KEY_2": "user.email", "GIT_CONFIG_VALUE_2": "benchmark@localhost",
+}
+
+
+def _asimov(project, *arguments):
+    subprocess.run(
+        ["asimov", *arguments], cwd=project, check=True,
+        env={**os.environ, **GIT}, stdout=subprocess.DEVNULL,
+    )
+
+
+def apply(project, documents, configuration=CONFIGURATION):
+    """
+    Apply blueprint ``documents`` to the asimov project in ``project`` and
+    render the new analyses' configs, first creating the project with
+    the ``configuration`` blueprint if there isn't one there yet.
+    """
+    if not os.path.exists(os.path.join(project, ".asimov")):
+        _asimov(project, "init", "benchmark")
+        _asimov(project, "apply", "-f", os.path.abspath(configuration))
+    blueprints = write_blueprints(os.path.join(project, "blueprints.yaml"), documents)
+    _asimov(project, "apply", "-f", blueprints)
+    _asimov(project, "manage", "build")
+
+
+def _plan(event, subject):
+    """
+    Run inside a project: build the fake analyses' fixtures, then plan
+    the subject analysis' job.
+    """
+    from asimov import current_ledger
+
+    [event] = current_ledger.get_event(event)
+    for production in event.productions:
+        if production.name != subject:
+            production.pipeline.build_dag()
+    [production] = [p for p in event.productions if p.name == subject]
+    plan = production.pipeline.plan()
+    return {
+        "command": plan.command,
+        "labels": plan.labels,
+        "incremental": plan.incremental,
+    }
+
+
+def plan(project, event=EVENT, subject=SUBJECT):
+    """
+    Plan the job PESummary would submit now for the subject analysis
+    ``subject`` of ``event``, in the asimov project in ``project``, once
+    the event's fake analyses' fixtures are built.
+
+    Returns
+    -------
+    dict
+        The planned ``command`` (see :meth:`PESummary.plan`), its
+        ``labels`` and whether it is ``incremental``.
+    """
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--plan", event, subject],
+        cwd=project, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def _assemble(repeat):
+    """
+    Run inside a project: build the fake analyses' fixtures (which their
+    ``submit_dag`` would otherwise do), then time assembling the subject
+    analysis' job.
+    """
+    from asimov import current_ledger
+
+    [event] = current_ledger.get_event(EVENT)
+    start = time.perf_counter()
+    for production in event.productions:
+        if production.name != SUBJECT:
+            production.pipeline.build_dag()
+    fixtures = time.perf_counter() - start
+
+    [production] = [p for p in event.productions if p.name == SUBJECT]
+    pipeline = production.pipeline
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        job = pipeline._job()
+        times.append(time.perf_counter() - start)
+    plan = pipeline.plan()
+    return {
+        "labels": len(job["labels"]),
+        "fixtures": fixtures,
+        "assemble first": times[0],
+        "assemble": min(times),
+        "command": plan.command,
+    }
+
+
+def measure(labels, n_samples=(1000, 10000), repeat=5, summarypages=False,
+            directory=None):
+    """
+    Time a SubjectAnalysis of ``labels`` fake analyses.
+
+    Parameters
+    ----------
+    labels : int
+        The number of fake upstream analyses.
+    n_samples : tuple, optional
+        The fewest and most samples an analysis has.
+    repeat : int, optional
+        How many times to assemble the job; the first (with cold caches)
+        and the fastest are reported.
+    summarypages : bool, optional
+        Whether to also run the assembled ``summarypages`` command.
+    directory : str, optional
+        Where to create the project; a temporary directory by default.
+
+    Returns
+    -------
+    dict
+        The seconds taken to render the analyses' configs, to build their
+        fixtures, to assemble the job and, if run, for ``summarypages``.
+    """
+    with tempfile.TemporaryDirectory(dir=directory) as project:
+        _asimov(project, "init", "scaling benchmark")
+        _asimov(project, "apply", "-f", os.path.abspath(CONFIGURATION))
+        blueprints = write_blueprints(
+            os.path.join(project, "blueprints.yaml"),
+            subject_blueprints(labels, event=EVENT, samples=n_samples, subject=SUBJECT),
+        )
+        _asimov(project, "apply", "-f", blueprints)
+        start = time.perf_counter()
+        _asimov(project, "manage", "build")
+        configs = time.perf_counter() - start
+
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--assemble", str(repeat)],
+            cwd=project, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        result.update(benchmark="subject_scaling", samples=list(n_samples),
+                      configs=configs)
+        if summarypages:
+            log = os.path.join(project, "summarypages.log")
+            start = time.perf_counter()
+            with open(log, "w") as stderr:
+                returncode = subprocess.call(
+                    result["command"], cwd=project,
+                    stdout=subprocess.DEVNULL, stderr=stderr,
+                )
+            result["summarypages"] = time.perf_counter() - start
+            if returncode:
+                with open(log) as stderr:
+                    tail = "".join(stderr.readlines()[-20:])
+                raise RuntimeError(f"summarypages failed; its log ends:\n{tail}")
+        del result["command"]
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--labels", type=int, nargs="+", default=[2, 5, 10, 20, 50])
+    parser.add_argument("--samples", type=int, nargs=2, default=(1000, 10000),
+                        metavar=("FEWEST", "MOST"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--summarypages", action="store_true")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--assemble", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--plan", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.assemble:
+        print(json.dumps(_assemble(args.assemble)))
+        return
+    if args.plan:
+        print(json.dumps(_plan(*args.plan)))
+        return
+
+    results = []
+    for labels in args.labels:
+        result = measure(labels, args.samples, args.repeat, args.summarypages)
+        results.append(result)
+        line = (
+            f"{labels:3d} labels: fixtures {result['fixtures']:6.1f} s, "
+            f"job assembly {result['assemble first'] * 1e3:8.1f} ms cold, "
+            f"{result['assemble'] * 1e3:8.1f} ms warm"
+        )
+        if "summarypages" in result:
+            line += f", summarypages {result['summarypages']:6.0f} s"
+        print(line)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Measure ``summarypages`` across a matrix of job shapes and settings.
+
+The ``multiprocess`` and ``skymap samples`` defaults, and whether a refresh
+is worth making incremental, depend on how ``summarypages`` actually scales.
+For every combination of samples per label, number of labels, skymap on or
+off, ``multiprocess`` setting and full or incremental build, this creates
+a local asimov project with an event of ``FakeCBCPipeline`` analyses and a
+PESummary ``SubjectAnalysis`` combining them (see ``subject_scaling.py``),
+plans the subject analysis' job with ``PESummary.plan`` and runs the
+planned ``summarypages`` command locally, recording its wall time, the
+peak resident memory of its largest process and the size of the web
+directory it wrote. An incremental cell times adding the last analysis to
+a page already holding the others (which is built first, but not timed),
+as a ``SubjectAnalysis`` refresh does.
+
+With the skymap on, ``summarypages`` only makes one if ``ligo.skymap`` is
+installed; whether it was is recorded with the results. Without it, the
+labels on the page lack the skymap they were asked for, so PESummary
+rebuilds the page rather than adding to it; each cell records whether its
+job was planned as incremental. Results are written with the commit and
+package versions measured at, and rewritten after every cell, so an
+interrupted run keeps what it measured.
+
+Running it needs asimov and PESummary; each label takes a minute or more.
+
+Usage::
+
+    python benchmarks/summarypages_matrix.py [--samples 1000 10000]
+        [--labels 1 3] [--skymap off on] [--multiprocess 1 4]
+        [--mode full incremental] [--skymap-samples 500]
+        [--preset minimal] [--structured] [--output results.json]
+        [-- extra summarypages flags]
+"""
+
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from asimov_pesummary.testing import subject_blueprints, write_blueprints
+
+sys.path.insert(0, os.path.dirname(__file__))
+from ledger_scale import _provenance  # noqa: E402
+from subject_scaling import EVENT, SUBJECT, apply, plan  # noqa: E402
+
+#: The project configuration: the end-to-end test's, less its skymap, which
+#: each cell switches on or off for itself.
+CONFIGURATION = {
+    "kind": "configuration",
+    "postprocessing": {
+        "pesummary": {"accounting group": "ligo.dev.o4.cbc.pe.lalinference"},
+    },
+}
+
+
+def _blueprints(labels, n_samples, skymap, skymap_samples, cpus, preset,
+                structured):
+    """
+    The event's ``FakeCBCPipeline`` analyses and the PESummary
+    ``SubjectAnalysis`` combining them, with this cell's settings.
+    """
+    documents = subject_blueprints(
+        labels, event=EVENT, samples=(n_samples, n_samples), subject=SUBJECT,
+        structured=structured,
+    )
+    settings = {"multiprocess": cpus}
+    if skymap:
+        settings["skymap samples"] = skymap_samples
+    if preset:
+        settings["preset"] = preset
+    documents[-1]["postprocessing"] = {"pesummary": settings}
+    return documents
+
+
+def _command(job, skymap, extra):
+    """The planned ``summarypages`` command, with any ``extra`` flags."""
+    command = job["command"] + list(extra)
+    if not skymap and "--no_ligo_skymap" not in command:
+        command.append("--no_ligo_skymap")
+    return command
+
+
+def _run(command, log):
+    """
+    Run ``command``, returning its wall time and the peak resident memory
+    (in bytes) of its largest process.
+    """
+    start = time.perf_counter()
+    with open(log, "w") as stderr:
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=stderr)
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - start
+    if process.returncode:
+        with open(log) as stderr:
+            tail = "".join(stderr.readlines()[-20:])
+        raise RuntimeError(f"summarypages failed; its log ends:\n{tail}")
+    return wall, usage.ru_maxrss * 1024
+
+
+def _size(directory):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(directory)
+        for name in names
+    )
+
+
+def measure(n_samples, labels, skymap=False, cpus=1, mode="full",
+            skymap_samples=500, preset=None, extra=(), structured=False,
+            directory=None):
+    """
+    Time one cell of the matrix.
+
+    Parameters
+    ----------
+    n_samples : int
+        The number of samples per label.
+    labels : int
+        The number of labels on the page.
+    skymap : bool, optional
+        Whether to make the skymap.
+    cpus : int, optional
+        The ``multiprocess`` setting.
+    mode : str, optional
+        ``full`` to build the page from scratch; ``incremental`` to add the
+        last label to a page of the others.
+    skymap_samples : int, optional
+        The ``skymap samples`` setting, with the skymap on.
+    preset : str, optional
+        The ``preset`` setting.
+    extra : list, optional
+        Further ``summarypages`` flags.
+    structured : bool, optional
+        Whether the fake posteriors are shaped like real ones.
+    directory : str, optional
+        Where to create the project; a temporary directory by default.
+
+    Returns
+    -------
+    dict
+        The cell's settings, whether PESummary planned the timed job as an
+        incremental refresh, its wall-clock seconds, peak resident memory
+        and web directory size in bytes.
+    """
+    if mode == "incremental" and labels < 2:
+        raise ValueError("An incremental build adds a label to a page of at least one")
+    with tempfile.TemporaryDirectory(dir=directory) as project:
+        configuration = write_blueprints(
+            os.path.join(project, "configuration.yaml"), [CONFIGURATION]
+        )
+        documents = _blueprints(
+            labels, n_samples, skymap, skymap_samples, cpus, preset, structured
+        )
+        if mode == "incremental":
+            # The page is first built from all but the last analysis, which
+            # then joins the event, as it would between two refreshes.
+            apply(project, documents[:-2] + documents[-1:], configuration)
+            _run(
+                _command(plan(project), skymap, extra),
+                os.path.join(project, "initial.log"),
+            )
+            apply(project, documents[-2:-1])
+        else:
+            apply(project, documents, configuration)
+        job = plan(project)
+        command = _command(job, skymap, extra)
+        wall, rss = _run(command, os.path.join(project, "summarypages.log"))
+        size = _size(command[command.index("--webdir") + 1])
+    return {
+        "samples": n_samples,
+        "labels": labels,
+        "skymap": skymap,
+        "multiprocess": cpus,
+        "mode": mode,
+        "incremental": job["incremental"],
+        "wall": wall,
+        "peak rss": rss,
+        "webdir size": size,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--labels", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--skymap", nargs="+", choices=("off", "on"), default=["off", "on"])
+    parser.add_argument("--multiprocess", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--mode", nargs="+", choices=("full", "incremental"),
+                        default=["full", "incremental"])
+    parser.add_argument("--skymap-samples", type=int, default=500)
+    parser.add_argument("--preset", help="The PESummary preset to use")
+    parser.add_argument("--structured", action="store_true")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("extra", nargs="*", help="Extra summarypages flags")
+    args = parser.parse_args(argv)
+
+    extra = list(args.extra)
+    if args.preset:
+        from asimov_pesummary.pesummary import PESummary
+
+        if args.preset not in PESummary.PRESETS:
+            parser.error(f"unknown preset {args.preset!r}; use {list(PESummary.PRESETS)}")
+
+    results = {
+        "benchmark": "summarypages_matrix",
+        **_provenance(),
+        "ligo.skymap": importlib.util.find_spec("ligo.skymap") is not None,
+        "skymap samples": args.skymap_samples,
+        "preset": args.preset,
+        "extra": extra,
+        "structured": args.structured,
+        "cells": [],
+    }
+    for n_samples, labels, skymap, cpus, mode in itertools.product(
+        args.samples, args.labels, args.skymap, args.multiprocess, args.mode
+    ):
+        if mode == "incremental" and labels < 2:
+            continue
+        cell = measure(
+            n_samples, labels, skymap == "on", cpus, mode,
+            skymap_samples=args.skymap_samples, preset=args.preset,
+            extra=extra, structured=args.structured,
+        )
+        results["cells"].append(cell)
+        print(
+            f"{n_samples:7d} samples, {labels:2d} labels, skymap {skymap:3s}, "
+            f"{cpus:2d} cpus, {mode:11s}: {cell['wall']:6.0f} s, "
+            f"{cell['peak rss'] / 2**20:6.0f} MiB, "
+            f"{cell['webdir size'] / 2**20:6.1f} MiB written"
+        )
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
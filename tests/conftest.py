@@ -0,0 +1,20 @@
+"""Suite-wide test configuration."""
+
+import os
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fixture_cache(tmp_path_factory, monkeypatch):
+    """
+    Keep every test's ``FakeCBCPipeline`` fixtures in a cache of the test
+    session's own, never the user's, so no result depends on what earlier
+    runs left behind. Tests which need a cache to themselves still point
+    ``ASIMOV_FAKE_CACHE`` elsewhere.
+    """
+    from asimov_pesummary.testing import CACHE_ENV
+
+    cache = tmp_path_factory.getbasetemp() / "fixture-cache"
+    monkeypatch.setenv(CACHE_ENV, os.fspath(cache))
+    return cache
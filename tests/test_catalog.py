@@ -0,0 +1,160 @@
+"""Tests for asimov_pesummary.catalog."""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from asimov.pipeline import PipelineException
+
+from tests.test_pesummary import PESummary, _CONFIG, make_production
+from tests.test_results import make_metafile
+
+from asimov_pesummary import catalog
+
+
+def touch(path):
+    """Advance a file's mtime, as a rewrite within the same tick might not."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+class TestCatalogIndex(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.catalog = catalog.CatalogIndex(os.path.join(self._tmp.name, "catalog.sqlite"))
+        self.addCleanup(self.catalog.close)
+
+    def _metafile(self, event, labels, **kwargs):
+        path = os.path.join(self._tmp.name, event, "samples", "posterior_samples.h5")
+        make_metafile(path, labels, **kwargs)
+        return path
+
+    def test_update_and_query(self):
+        # make_metafile centres mass_1 on 10 + the label's position.
+        self.catalog.update("GW1", "Summary", self._metafile("GW1", ["A", "B"]))
+        self.catalog.update("GW2", "Summary", self._metafile("GW2", ["A"]))
+        heavy = self.catalog.query("mass_1", minimum=10.5)
+        self.assertEqual([(row["event"], row["label"]) for row in heavy], [("GW1", "B")])
+        everything = self.catalog.query("mass_1")
+        self.assertEqual(len(everything), 3)
+        self.assertLess(everything[0]["lower"], everything[0]["median"])
+        self.assertLess(everything[0]["median"], everything[0]["upper"])
+
+    def test_unchanged_metafile_not_reread(self):
+        path = self._metafile("GW1", ["A"])
+        self.assertTrue(self.catalog.update("GW1", "Summary", path))
+        with patch("asimov_pesummary.catalog.MetafileHandle") as handle:
+            self.assertFalse(self.catalog.update("GW1", "Summary", path))
+        handle.assert_not_called()
+
+    def test_changed_metafile_replaces_entries(self):
+        path = self._metafile("GW1", ["A", "B"])
+        self.catalog.update("GW1", "Summary", path)
+        make_metafile(path, ["C"])
+        touch(path)
+        self.assertTrue(self.catalog.update("GW1", "Summary", path))
+        labels = {row["label"] for row in self.catalog.query("mass_1")}
+        self.assertEqual(labels, {"C"})
+
+    def test_reads_sidecar(self):
+        from asimov_pesummary.results import write_summary_statistics
+
+        path = self._metafile("GW1", ["A", "B"])
+        write_summary_statistics(path)
+        with patch("asimov_pesummary.catalog.MetafileHandle") as handle:
+            self.assertTrue(self.catalog.update("GW1", "Summary", path))
+        handle.assert_not_called()
+        self.assertEqual(len(self.catalog.query("mass_1")), 2)
+
+    def test_stale_sidecar_ignored(self):
+        from asimov_pesummary.results import write_summary_statistics
+
+        path = self._metafile("GW1", ["A", "B"])
+        write_summary_statistics(path)
+        make_metafile(path, ["C"])
+        touch(path)
+        self.catalog.update("GW1", "Summary", path)
+        labels = {row["label"] for row in self.catalog.query("mass_1")}
+        self.assertEqual(labels, {"C"})
+
+    def test_persists(self):
+        self.catalog.update("GW1", "Summary", self._metafile("GW1", ["A"]))
+        with catalog.CatalogIndex(self.catalog.path) as reopened:
+            self.assertEqual(len(reopened.query("ra")), 1)
+
+    def test_remove(self):
+        self.catalog.update("GW1", "Summary", self._metafile("GW1", ["A"]))
+        self.catalog.remove("GW1", "Summary")
+        self.assertEqual(self.catalog.query("ra"), [])
+
+    def test_missing_metafile(self):
+        with self.assertRaises(FileNotFoundError):
+            self.catalog.update("GW1", "Summary", os.path.join(self._tmp.name, "none.h5"))
+
+    def test_unknown_statistic(self):
+        with self.assertRaises(ValueError):
+            self.catalog.query("ra", statistic="mode")
+
+
+class TestPESummaryCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        config = dict(_CONFIG)
+        config[("project", "root")] = self._tmp.name
+        for target in ("asimov_pesummary.pesummary.config", "asimov_pesummary.catalog.config"):
+            mock_config = patch(target).start()
+            mock_config.get.side_effect = lambda s, o, **k: config.get((s, o), "")
+        self.addCleanup(patch.stopall)
+
+    def _pipeline(self, **meta):
+        pipeline = PESummary(make_production(pesummary_meta=meta))
+        make_metafile(pipeline.results()["metafile"], ["Prod0"])
+        return pipeline
+
+    def test_catalog_path(self):
+        self.assertIsNone(catalog.catalog_path(None))
+        self.assertEqual(
+            catalog.catalog_path(True),
+            os.path.join(self._tmp.name, ".asimov", "pesummary_catalog.sqlite"),
+        )
+        self.assertEqual(catalog.catalog_path("/abs/c.sqlite"), "/abs/c.sqlite")
+        with self.assertRaises(PipelineException):
+            catalog.catalog_path(3)
+
+    def test_completion_updates_catalog(self):
+        pipeline = self._pipeline(catalog=True)
+        pipeline.after_completion()
+        self.assertEqual(pipeline.production.status, "finished")
+        with catalog.CatalogIndex(catalog.catalog_path(True)) as index:
+            rows = index.query("mass_1")
+        self.assertEqual([(r["event"], r["production"], r["label"]) for r in rows],
+                         [("GW150914", "Prod0", "Prod0")])
+
+    def test_catalog_off_by_default(self):
+        self._pipeline().after_completion()
+        self.assertFalse(os.path.exists(catalog.catalog_path(True)))
+
+    def test_catalog_failure_does_not_block_completion(self):
+        pipeline = self._pipeline(catalog=True)
+        os.remove(pipeline.results()["metafile"])
+        pipeline.after_completion()
+        self.assertEqual(pipeline.production.status, "finished")
+
+    def test_update_ledger(self):
+        productions = [make_production(), MagicMock()]
+        productions[0].pipeline = PESummary(productions[0])
+        make_metafile(productions[0].pipeline.results()["metafile"], ["Prod0"])
+        ledger = MagicMock()
+        ledger.get_productions.return_value = productions
+        path = os.path.join(self._tmp.name, "nightly.sqlite")
+        self.assertEqual(catalog.update_ledger(ledger, path), 1)
+        self.assertEqual(catalog.update_ledger(ledger, path), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
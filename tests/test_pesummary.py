@@ -2,6 +2,7 @@
 
 import os
 import sys
+import tempfile
 import unittest
 from unittest.mock import MagicMock, mock_open, patch
 
@@ -248,6 +249,29 @@ class TestPESummaryInit(unittest.TestCase):
         pipeline = PESummary(make_subject_analysis())
         self.assertTrue(pipeline.is_subject_analysis)
 
+    def test_executable_resolved_from_config_on_access(self):
+        with patch("asimov_pesummary.pesummary.config") as mock_config:
+            mock_config.get.side_effect = _config_get
+            pipeline = PESummary(self.production)
+            self.assertEqual(
+                pipeline.executable, "/opt/conda/envs/test/bin/summarypages"
+            )
+
+    def test_construction_does_not_need_environment_config(self):
+        """asimov imports every plugin on every command, so neither
+        importing this module nor building a pipeline may require
+        `pipelines/environment` to be configured."""
+        with patch("asimov_pesummary.pesummary.config") as mock_config:
+            mock_config.get.side_effect = KeyError("environment")
+            PESummary(self.production)
+        mock_config.get.assert_not_called()
+
+    def test_scheduler_machinery_not_imported_at_module_level(self):
+        import asimov_pesummary.pesummary as module
+
+        self.assertFalse(hasattr(module, "create_job_from_dict"))
+        self.assertFalse(hasattr(module, "otter"))
+
 
 # ---------------------------------------------------------------------------
 # TestPESummaryResults
@@ -404,6 +428,10 @@ class TestPESummarySubmitDagCommand(unittest.TestCase):
         with self.assertRaises(PipelineException):
             self._run(production)
 
+    def test_verbose_for_progress(self):
+        """The per-label plot markers ProgressLog follows are DEBUG-only."""
+        self.assertTrue(self._has("--verbose"))
+
     # --- Multiprocess ---
 
     def test_multiprocess_flag_present(self):
@@ -412,14 +440,29 @@ class TestPESummarySubmitDagCommand(unittest.TestCase):
     def test_multiprocess_value(self):
         self.assertEqual(self._value("--multi_process"), "4")
 
-    def test_multiprocess_required_in_meta(self):
-        """submit_dag raises KeyError if multiprocess is absent: it is read
-        unconditionally when building the HTCondor submit description."""
+    def test_multiprocess_defaults_to_auto(self):
+        """Without multiprocess the job is sized automatically; a single
+        label with no skymap needs only one CPU."""
         prod = make_production()
         del prod.meta["postprocessing"]["pesummary"]["multiprocess"]
-        pipeline = PESummary(prod)
-        with self.assertRaises(KeyError):
-            pipeline.submit_dag(dryrun=True)
+        self.assertEqual(self._value("--multi_process", prod), "1")
+
+    def test_multiprocess_auto_scales_with_skymap_samples(self):
+        prod = make_production(pesummary_meta={
+            "multiprocess": "auto", "skymap samples": 5000,
+        })
+        self.assertEqual(self._value("--multi_process", prod), "3")
+
+    def test_multiprocess_auto_limited_by_max_cpus(self):
+        prod = make_production(pesummary_meta={
+            "multiprocess": "auto", "skymap samples": 50000, "max cpus": 4,
+        })
+        self.assertEqual(self._value("--multi_process", prod), "4")
+
+    def test_multiprocess_invalid(self):
+        prod = make_production(pesummary_meta={"multiprocess": "lots"})
+        with self.assertRaises(PipelineException):
+            PESummary(prod).submit_dag(dryrun=True)
 
     # --- Optional: cosmology ---
 
@@ -552,6 +595,60 @@ class TestPESummarySubmitDagCommand(unittest.TestCase):
         prod = make_production(pesummary_meta={"calculate": ["something_else"]})
         self.assertFalse(self._has("--calculate_precessing_snr", prod))
 
+    # --- Optional: performance preset ---
+
+    def test_no_preset_by_default(self):
+        parts = self._parts()
+        self.assertFalse(any(p.startswith(("--disable_", "--enable_")) for p in parts))
+
+    def test_minimal_preset_flags(self):
+        prod = make_production(pesummary_meta={"preset": "minimal"})
+        with patch("asimov_pesummary.pesummary._summarypages_options", return_value=None):
+            parts = self._parts(prod)
+        for flag in PESummary.PRESETS["minimal"]:
+            self.assertIn(flag, parts)
+
+    def test_full_preset_enables_expert_plots(self):
+        prod = make_production(pesummary_meta={"preset": "full"})
+        with patch("asimov_pesummary.pesummary._summarypages_options", return_value=None):
+            self.assertTrue(self._has("--enable_expert", prod))
+
+    def test_unknown_preset_raises(self):
+        prod = make_production(pesummary_meta={"preset": "cheap"})
+        with self.assertRaises(PipelineException):
+            PESummary(prod).submit_dag(dryrun=True)
+
+    def test_preset_flags_unknown_to_summarypages_are_dropped(self):
+        prod = make_production(pesummary_meta={"preset": "standard"})
+        with patch(
+            "asimov_pesummary.pesummary._summarypages_options",
+            return_value=frozenset({"--disable_interactive"}),
+        ):
+            parts = self._parts(prod)
+        self.assertIn("--disable_interactive", parts)
+        self.assertNotIn("--disable_expert", parts)
+
+    def test_preset_checked_against_the_environments_summarypages(self):
+        prod = make_production(pesummary_meta={"preset": "standard"})
+        with patch(
+            "asimov_pesummary.pesummary._summarypages_options",
+            return_value=None,
+        ) as options:
+            self._parts(prod)
+        options.assert_called_with(PESummary(prod).executable)
+
+    def test_presets_valid_for_installed_summarypages(self):
+        import shutil
+
+        from asimov_pesummary.pesummary import _summarypages_options
+
+        executable = shutil.which("summarypages")
+        supported = executable and _summarypages_options(executable)
+        if not supported:
+            self.skipTest("PESummary is not installed")
+        for preset, flags in PESummary.PRESETS.items():
+            self.assertLessEqual(set(flags), supported, preset)
+
     # --- PSDs ---
 
     def test_psds_flag_present_when_psds_exist(self):
@@ -728,6 +825,65 @@ class TestPESummaryHTCondorSubmit(unittest.TestCase):
         desc = self._submitted_job()
         self.assertIn("Prod0", desc["batch_name"])
 
+    # --- Priority ---
+
+    def _submit_with(self, production):
+        pipeline = PESummary(production)
+        pipeline._scheduler = self.mock_scheduler
+        pipeline.submit_dag(dryrun=False)
+        return self._submitted_job()
+
+    def test_default_priority_is_normal(self):
+        self.pipeline.submit_dag(dryrun=False)
+        self.assertEqual(self._submitted_job()["priority"], 0)
+
+    def test_named_priority_from_meta(self):
+        desc = self._submit_with(make_production(pesummary_meta={"priority": "low"}))
+        self.assertEqual(desc["priority"], PESummary.PRIORITIES["low"])
+
+    def test_numeric_priority_from_meta(self):
+        desc = self._submit_with(make_production(pesummary_meta={"priority": 7}))
+        self.assertEqual(desc["priority"], 7)
+
+    def test_unknown_priority_raises(self):
+        pipeline = PESummary(make_production(pesummary_meta={"priority": "asap"}))
+        with self.assertRaises(PipelineException):
+            pipeline.submit_dag(dryrun=True)
+
+    def test_significant_event_defaults_to_high_priority(self):
+        production = make_production()
+        production.event.meta = {"significant": True}
+        desc = self._submit_with(production)
+        self.assertEqual(desc["priority"], PESummary.PRIORITIES["high"])
+
+    def test_event_priority_used_when_meta_has_none(self):
+        production = make_production()
+        production.event.meta = {"priority": "urgent"}
+        desc = self._submit_with(production)
+        self.assertEqual(desc["priority"], PESummary.PRIORITIES["urgent"])
+
+    def test_meta_priority_overrides_event(self):
+        production = make_production(pesummary_meta={"priority": "low"})
+        production.event.meta = {"significant": True}
+        desc = self._submit_with(production)
+        self.assertEqual(desc["priority"], PESummary.PRIORITIES["low"])
+
+    def test_priority_accounting_group_overrides_default(self):
+        desc = self._submit_with(make_production(pesummary_meta={
+            "priority": "urgent",
+            "priority accounting groups": {"urgent": "ligo.prod.o4.cbc.pe.urgent"},
+        }))
+        self.assertEqual(desc["accounting_group"], "ligo.prod.o4.cbc.pe.urgent")
+        self.assertEqual(desc["accounting_group_user"], "testuser")
+
+    def test_priority_accounting_group_falls_back_to_default(self):
+        desc = self._submit_with(make_production(pesummary_meta={
+            "priority accounting groups": {"urgent": "ligo.prod.o4.cbc.pe.urgent"},
+        }))
+        self.assertEqual(
+            desc["accounting_group"], "ligo.dev.o4.cbc.pe.lalinference"
+        )
+
 
 # ---------------------------------------------------------------------------
 # TestPESummarySubjectAnalysis
@@ -919,6 +1075,37 @@ class TestPESummarySubjectAnalysis(unittest.TestCase):
 
     # --- Removal fallback ---
 
+    def test_incremental_refresh_ranked_above_full_rebuild(self):
+        self.mock_exists.return_value = True
+        refresh = PESummary(make_subject_analysis(
+            analyses=[make_dependency("Bilby1"), make_dependency("Bilby2")],
+            resolved_dependencies=["Bilby1"],
+        )).plan()
+        rebuild = PESummary(make_subject_analysis()).plan()
+        self.assertGreater(
+            refresh.resources["priority"], rebuild.resources["priority"]
+        )
+
+    def test_auto_multiprocess_scales_with_labels(self):
+        few = make_subject_analysis(pesummary_meta={"multiprocess": "auto"})
+        many = make_subject_analysis(
+            pesummary_meta={"multiprocess": "auto"},
+            analyses=[make_dependency(f"Bilby{i}") for i in range(20)],
+        )
+        self.assertEqual(PESummary(few).plan().resources["request_cpus"], 2)
+        self.assertEqual(
+            PESummary(many).plan().resources["request_cpus"], PESummary.AUTO_MAX_CPUS
+        )
+
+    def test_auto_multiprocess_sized_for_new_labels_only(self):
+        self.mock_exists.return_value = True
+        refresh = make_subject_analysis(
+            pesummary_meta={"multiprocess": "auto"},
+            analyses=[make_dependency(f"Bilby{i}") for i in range(20)],
+            resolved_dependencies=[f"Bilby{i}" for i in range(19)],
+        )
+        self.assertEqual(PESummary(refresh).plan().resources["request_cpus"], 1)
+
     def test_removed_analysis_falls_back_to_full_rebuild(self):
         self.mock_exists.return_value = True
         parts = self._parts(make_subject_analysis(
@@ -930,5 +1117,35 @@ class TestPESummarySubjectAnalysis(unittest.TestCase):
         self.assertEqual(labels, ["Bilby1"])
 
 
+class TestSummarypagesOptions(unittest.TestCase):
+    """The options are read from the environment's summarypages --help."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_options_from_help(self):
+        from asimov_pesummary.pesummary import _summarypages_options
+
+        executable = os.path.join(self._tmp.name, "summarypages")
+        with open(executable, "w") as f:
+            f.write(
+                "#!/bin/sh\n"
+                "echo 'usage: summarypages [-h] [--webdir DIR]'\n"
+                "echo '  --disable_expert, --no_expert  no expert plots'\n"
+            )
+        os.chmod(executable, 0o755)
+        self.assertEqual(
+            _summarypages_options(executable),
+            {"--webdir", "--disable_expert", "--no_expert"},
+        )
+
+    def test_missing_summarypages(self):
+        from asimov_pesummary.pesummary import _summarypages_options
+
+        missing = os.path.join(self._tmp.name, "summarypages")
+        self.assertIsNone(_summarypages_options(missing))
+
+
 if __name__ == "__main__":
     unittest.main()
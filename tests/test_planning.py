@@ -0,0 +1,173 @@
+"""Tests for asimov_pesummary.planning."""
+
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, mock_open, patch
+
+from tests.test_pesummary import (
+    PESummary,
+    _config_get,
+    make_dependency,
+    make_production,
+    make_subject_analysis,
+)
+
+from asimov_pesummary import planning
+
+
+class TestPESummaryPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_config = patch("asimov_pesummary.pesummary.config").start()
+        self.mock_config.get.side_effect = _config_get
+        self.mock_utils = patch("asimov_pesummary.pesummary.utils").start()
+        self._open = patch("builtins.open", mock_open()).start()
+        self.addCleanup(patch.stopall)
+
+    def test_plan_has_no_side_effects(self):
+        production = make_subject_analysis()
+        pipeline = PESummary(production)
+        pipeline._scheduler = MagicMock()
+        pipeline.plan()
+        self._open.assert_not_called()
+        pipeline._scheduler.submit.assert_not_called()
+        self.assertIsNone(production.resolved_dependencies)
+
+    def test_plan_command_starts_with_executable(self):
+        plan = PESummary(make_production()).plan()
+        self.assertEqual(plan.command[0], "/opt/conda/envs/test/bin/summarypages")
+        self.assertIn("--webdir", plan.command)
+
+    def test_plan_matches_submitted_command(self):
+        pipeline = PESummary(make_production())
+        plan = pipeline.plan()
+        pipeline.submit_dag(dryrun=True)
+        written = self._open.return_value.__enter__.return_value.write.call_args[0][0]
+        self.assertEqual(" ".join(plan.command), written)
+
+    def test_plan_resources(self):
+        plan = PESummary(make_production()).plan()
+        self.assertEqual(plan.resources["request_cpus"], 4)
+        self.assertEqual(
+            plan.resources["accounting_group"], "ligo.dev.o4.cbc.pe.lalinference"
+        )
+
+    def test_plan_inputs_have_sizes(self):
+        with tempfile.NamedTemporaryFile(suffix=".h5") as samples:
+            samples.write(b"x" * 128)
+            samples.flush()
+            plan = PESummary(make_production(assets={"samples": samples.name})).plan()
+        self.assertEqual(plan.inputs["samples"], [{"path": samples.name, "bytes": 128}])
+        # Files which don't exist are reported rather than failing the plan.
+        self.assertIsNone(plan.inputs["psds"]["H1"]["bytes"])
+
+    def test_plan_reports_incremental_refresh(self):
+        production = make_subject_analysis(
+            analyses=[make_dependency("Bilby1"), make_dependency("Bilby2")],
+            resolved_dependencies=["Bilby1"],
+        )
+        with patch("asimov_pesummary.pesummary.os.path.exists", return_value=True):
+            plan = PESummary(production).plan()
+        self.assertTrue(plan.incremental)
+        self.assertEqual(plan.labels, ["Bilby2"])
+
+    def test_plan_has_estimated_cost(self):
+        plan = PESummary(make_production()).plan()
+        self.assertGreater(plan.estimated_cost["cpu_hours"], 0)
+        self.assertAlmostEqual(
+            plan.estimated_cost["wall_hours"], plan.estimated_cost["cpu_hours"] / 4
+        )
+
+
+class TestPlanProductions(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_config = patch("asimov_pesummary.pesummary.config").start()
+        self.mock_config.get.side_effect = _config_get
+        self.addCleanup(patch.stopall)
+
+    def _with_pipeline(self, production):
+        production.pipeline = PESummary(production)
+        return production
+
+    def test_skips_other_pipelines(self):
+        other = MagicMock()
+        plans = planning.plan_productions(
+            [other, self._with_pipeline(make_production())]
+        )
+        self.assertEqual(len(plans), 1)
+
+    def test_unplannable_production_reported_as_error(self):
+        broken = self._with_pipeline(make_production(assets={"samples": None}))
+        plans = planning.plan_productions(
+            [broken, self._with_pipeline(make_production())]
+        )
+        self.assertIsNotNone(plans[0].error)
+        self.assertIsNone(plans[1].error)
+
+    def test_misconfigured_production_reported_as_error(self):
+        import configparser
+
+        broken = self._with_pipeline(make_production())
+        for error in (
+            configparser.NoSectionError("pesummary"),
+            configparser.NoOptionError("executable", "pesummary"),
+            ValueError("invalid literal for int() with base 10: 'many'"),
+        ):
+            with self.subTest(error=type(error).__name__), patch.object(
+                broken.pipeline, "_job", side_effect=error
+            ):
+                plans = planning.plan_productions(
+                    [broken, self._with_pipeline(make_production())]
+                )
+                self.assertEqual(plans[0].error, str(error))
+                self.assertIsNone(plans[1].error)
+
+    def test_plan_ledger_uses_ledger_productions(self):
+        ledger = MagicMock()
+        ledger.get_productions.return_value = [
+            self._with_pipeline(make_production())
+        ]
+        self.assertEqual(len(planning.plan_ledger(ledger)), 1)
+
+    def test_file_sizes_looked_up_once(self):
+        productions = [self._with_pipeline(make_production()) for _ in range(3)]
+        with patch("asimov_pesummary.planning.os.stat", side_effect=OSError) as stat:
+            planning.plan_productions(productions)
+        looked_up = [
+            call.args[0] for call in stat.call_args_list
+            if str(call.args[0]).startswith("/path")
+        ]
+        # One samples file and two PSDs, shared by all three productions.
+        self.assertEqual(len(looked_up), 3)
+
+    def test_to_json_round_trips_with_totals(self):
+        productions = [self._with_pipeline(make_production()) for _ in range(2)]
+        data = json.loads(planning.to_json(planning.plan_productions(productions)))
+        self.assertEqual(data["totals"]["productions"], 2)
+        self.assertEqual(data["totals"]["labels"], 2)
+        self.assertEqual(len(data["plans"]), 2)
+        self.assertIn("command", data["plans"][0])
+
+
+class TestEstimateCost(unittest.TestCase):
+
+    def test_scales_with_labels(self):
+        one = planning.estimate_cost(1, 0)["cpu_hours"]
+        ten = planning.estimate_cost(10, 0)["cpu_hours"]
+        self.assertAlmostEqual(ten, 10 * one)
+
+    def test_skymap_samples_add_cost(self):
+        self.assertGreater(
+            planning.estimate_cost(1, 0, skymap_samples=2000)["cpu_hours"],
+            planning.estimate_cost(1, 0)["cpu_hours"],
+        )
+
+    def test_invalid_cpus_treated_as_one(self):
+        cost = planning.estimate_cost(2, 0, cpus="many")
+        self.assertEqual(cost["cpu_hours"], cost["wall_hours"])
+
+
+if __name__ == "__main__":
+    unittest.main()
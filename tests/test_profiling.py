@@ -0,0 +1,150 @@
+"""Tests for asimov_pesummary.profiling, and profiling PESummary jobs."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, call, patch
+
+from tests.test_pesummary import PESummary, _CONFIG, make_production
+
+from asimov.pipeline import PipelineException
+
+from asimov_pesummary import profiling
+
+#: Stands in for summarypages: echoes its arguments and exits with 3.
+SCRIPT = """
+import json, sys
+def work():
+    return sum(range(10000))
+work()
+with open(sys.argv[1], "w") as f:
+    json.dump(sys.argv[2:], f)
+sys.exit(3)
+"""
+
+
+class TestLauncher(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.script = os.path.join(self._tmp.name, "summarypages")
+        with open(self.script, "w") as f:
+            f.write(SCRIPT)
+        self.echo = os.path.join(self._tmp.name, "arguments.json")
+        self.output = os.path.join(self._tmp.name, "profile")
+
+    def test_cprofile(self):
+        returncode = profiling.main([
+            "--python", sys.executable, "--output-dir", self.output,
+            "--", self.script, self.echo, "--webdir", "w", "--labels", "A",
+        ])
+        self.assertEqual(returncode, 3)
+        with open(self.echo) as f:
+            self.assertEqual(json.load(f), ["--webdir", "w", "--labels", "A"])
+
+        paths = profiling.artifacts(self.output, "cprofile")
+        self.assertTrue(os.path.exists(paths["cprofile"]))
+        with open(paths["summary"]) as f:
+            summary = json.load(f)
+        self.assertEqual(summary["returncode"], 3)
+        self.assertGreater(summary["peak memory"], 0)
+        self.assertTrue(summary["top"])
+        functions = profiling.top_functions(paths["cprofile"], limit=None)
+        self.assertTrue(any("(work)" in row["function"] for row in functions))
+
+    def test_py_spy_must_be_installed_where_the_job_runs(self):
+        with patch("asimov_pesummary.profiling._py_spy", return_value=None):
+            returncode = profiling.main([
+                "--profiler", "py-spy", "--python", sys.executable,
+                "--output-dir", self.output, "--", self.script, self.echo,
+            ])
+        self.assertEqual(returncode, 127)
+        self.assertFalse(os.path.exists(self.echo))
+
+    def test_launcher_arguments_round_trip(self):
+        arguments = profiling.launcher_arguments(
+            "cprofile", sys.executable, self.script, [self.echo, "--gw"], self.output,
+            "pesummary_Prod0",
+        )
+        self.assertEqual(arguments[:2], ["-m", "asimov_pesummary.profiling"])
+        self.assertEqual(profiling.main(arguments[2:]), 3)
+        with open(self.echo) as f:
+            self.assertEqual(json.load(f), ["--gw"])
+        paths = profiling.artifacts(self.output, "cprofile", "pesummary_Prod0")
+        self.assertEqual(
+            os.path.basename(paths["summary"]), "pesummary_Prod0_profile.json"
+        )
+        self.assertTrue(all(os.path.exists(path) for path in paths.values()))
+
+
+class TestPESummaryProfile(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        config = dict(_CONFIG)
+        config[("project", "root")] = self._tmp.name
+        mock_config = patch("asimov_pesummary.pesummary.config").start()
+        mock_config.get.side_effect = lambda s, o, **k: config.get((s, o), "")
+        self.addCleanup(patch.stopall)
+
+    def _pipeline(self, **meta):
+        production = make_production(pesummary_meta=meta)
+        production.event.work_dir = self._tmp.name
+        return PESummary(production)
+
+    def test_off_by_default(self):
+        pipeline = self._pipeline()
+        description = pipeline._submit_description(pipeline._job())
+        self.assertEqual(description["executable"], pipeline.executable)
+        self.assertNotIn("profile", pipeline.collect_assets())
+
+    def test_wraps_summarypages(self):
+        pipeline = self._pipeline(profile=True)
+        description = pipeline._submit_description(pipeline._job())
+        self.assertEqual(description["executable"], "/opt/conda/envs/test/bin/python")
+        arguments = description["arguments"]
+        self.assertTrue(arguments.startswith("-m asimov_pesummary.profiling"))
+        self.assertIn(f"--output-dir {self._tmp.name}", arguments)
+        self.assertIn(f"-- {pipeline.executable} --webdir", arguments)
+
+    def test_job_script_is_wrapped(self):
+        pipeline = self._pipeline(profile="cProfile")
+        pipeline._scheduler = MagicMock()
+        with patch("asimov.scheduler_utils.create_job_from_dict"):
+            pipeline.submit_dag()
+        with open(os.path.join(self._tmp.name, "pesummary.sh")) as script:
+            self.assertIn("asimov_pesummary.profiling", script.read())
+
+    def test_artifacts_advertised(self):
+        pipeline = self._pipeline(profile=True)
+        prefix = f"pesummary_{pipeline.production.name}"
+        description = pipeline._submit_description(pipeline._job())
+        self.assertIn(f"--prefix {prefix}", description["arguments"])
+        self.assertEqual(
+            pipeline.collect_assets()["profile"],
+            profiling.artifacts(self._tmp.name, "cprofile", prefix),
+        )
+
+    def test_unknown_profiler(self):
+        pipeline = self._pipeline(profile="perf")
+        with self.assertRaises(PipelineException):
+            pipeline._submit_description(pipeline._job())
+
+    def test_plan_and_dryrun_show_launcher(self):
+        pipeline = self._pipeline(profile="py-spy")
+        plan = pipeline.plan()
+        self.assertEqual(
+            plan.command[:3],
+            ["/opt/conda/envs/test/bin/python", "-m", "asimov_pesummary.profiling"],
+        )
+        with patch("builtins.print") as printed:
+            pipeline.submit_dag(dryrun=True)
+        self.assertIn(call(" ".join(plan.command)), printed.call_args_list)
+
+
+if __name__ == "__main__":
+    unittest.main()
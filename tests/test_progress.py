@@ -0,0 +1,205 @@
+"""Tests for asimov_pesummary.progress, and following running PESummary jobs."""
+
+import datetime
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tests.test_pesummary import PESummary, _CONFIG, make_production
+
+from asimov_pesummary import progress
+
+START = datetime.datetime(2026, 10, 19, 6, 54, 0)
+
+
+def line(seconds, message, level="INFO"):
+    """A ``summarypages`` log line, ``seconds`` after START."""
+    time = START + datetime.timedelta(seconds=seconds)
+    return f"{time:%Y-%m-%d  %H:%M:%S} PESummary {level:<7} : {message}\n"
+
+
+def at(seconds):
+    return (START + datetime.timedelta(seconds=seconds)).timestamp()
+
+
+#: A two-label ``summarypages --verbose`` run, excerpted from its log.
+RUN = [
+    line(0, "Command line arguments: Namespace(pesummary=None, webdir='/tmp/web', "
+            "baseurl=None, labels=['one', 'two'], samples=['run1/posterior_samples.dat', "
+            "'run2/posterior_samples.dat'], config=None, email=None)"),
+    "/site-packages/pesummary/core/cli/actions.py:72: UserWarning: The option "
+    "'--disable_expert' is out-of-date and may not be supported in future releases.\n",
+    line(3, "Assigning one to run1/posterior_samples.dat"),
+    line(4, "Assigning two to run2/posterior_samples.dat"),
+    line(5, "Starting to generate plots"),
+    line(5, "Starting to generate plots for one", "DEBUG"),
+    line(64, "Starting to generate plots for two", "DEBUG"),
+    line(131, "Starting to generate all derived posteriors", "DEBUG"),
+    line(133, "Starting to generate comparison plots", "DEBUG"),
+    line(184, "Finished generating plots"),
+    line(184, "Starting to generate webpages"),
+    line(186, "Finished generating webpages"),
+    line(186, "Starting to generate the meta file"),
+    line(186, "Finishing generating the meta file. The meta file can be viewed "
+              "here: /tmp/web/samples/posterior_samples.h5"),
+    line(186, "Complete. Webpages can be viewed at the following url "
+              "https:///tmp/web/home.html"),
+]
+
+
+class TestProgressLog(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "pesummary.err")
+
+    def _write(self, lines, mode="a"):
+        with open(self.path, mode) as log:
+            log.write("".join(lines))
+
+    def test_missing_log(self):
+        log = progress.ProgressLog(self.path)
+        self.assertEqual(log.update(), 0)
+        self.assertIsNone(log.progress()["stage"])
+
+    def test_stage_timings_per_label(self):
+        self._write(RUN)
+        log = progress.ProgressLog(self.path)
+        log.update()
+        self.assertTrue(log.complete)
+        self.assertEqual(log.labels, ["one", "two"])
+        timings = log.timings()
+        self.assertEqual(timings["setup"]["seconds"], 3)
+        self.assertEqual(timings["conversion"]["labels"], {"one": 1, "two": 1})
+        self.assertEqual(timings["plots"]["labels"], {"one": 59, "two": 69})
+        self.assertEqual(timings["comparison plots"]["seconds"], 51)
+        self.assertEqual(timings["webpages"]["seconds"], 2)
+        self.assertEqual(timings["metafile"]["seconds"], 0)
+
+    def test_reads_only_what_is_new(self):
+        self._write(RUN[:5])
+        log = progress.ProgressLog(self.path)
+        first = log.update()
+        log.save()
+        self.assertEqual(first, os.path.getsize(self.path))
+
+        self._write(RUN[5:7])
+        again = progress.ProgressLog(self.path)
+        self.assertEqual(again.offset, first)
+        self.assertEqual(again.update(), len("".join(RUN[5:7]).encode()))
+        self.assertEqual(again.update(), 0)
+        self.assertEqual(again.current["stage"], "plots")
+        self.assertEqual(again.current["label"], "two")
+
+    def test_partial_line_kept_until_finished(self):
+        self._write(RUN[:4])
+        self._write([RUN[4][:20]])
+        log = progress.ProgressLog(self.path)
+        log.update()
+        self.assertEqual(log.current["stage"], "conversion")
+        self._write([RUN[4][20:]])
+        log.update()
+        self.assertEqual(log.current["stage"], "plots")
+
+    def test_truncated_log_starts_again(self):
+        self._write(RUN)
+        log = progress.ProgressLog(self.path)
+        log.update()
+        self._write(RUN[:1], mode="w")
+        log.update()
+        self.assertFalse(log.complete)
+        self.assertEqual(log.current["stage"], "setup")
+
+    def test_forget(self):
+        self._write(RUN)
+        log = progress.ProgressLog(self.path)
+        log.update()
+        log.save()
+        log.forget()
+        self.assertFalse(os.path.exists(log.state_path))
+        self.assertEqual(progress.ProgressLog(self.path).offset, 0)
+
+    def test_progress_and_eta(self):
+        self._write(RUN[:7])
+        log = progress.ProgressLog(self.path)
+        log.update()
+        estimate = log.progress(now=at(94))
+        self.assertEqual((estimate["stage"], estimate["label"]), ("plots", "two"))
+        # setup and conversion, and half of the plots.
+        self.assertAlmostEqual(estimate["fraction"], 0.5)
+        self.assertEqual(estimate["elapsed"], 94)
+        self.assertAlmostEqual(estimate["eta"], 94)
+
+    def test_complete(self):
+        self._write(RUN)
+        log = progress.ProgressLog(self.path)
+        log.update()
+        estimate = log.progress(now=at(1000))
+        self.assertEqual(estimate["fraction"], 1.0)
+        self.assertEqual(estimate["elapsed"], 186)
+        self.assertEqual(estimate["eta"], 0)
+
+
+class TestPESummaryProgress(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        config = dict(_CONFIG)
+        config[("project", "root")] = self._tmp.name
+        mock_config = patch("asimov_pesummary.pesummary.config").start()
+        mock_config.get.side_effect = lambda s, o, **k: config.get((s, o), "")
+        self.addCleanup(patch.stopall)
+        production = make_production()
+        production.event.work_dir = self._tmp.name
+        self.pipeline = PESummary(production)
+        self.log = os.path.join(self._tmp.name, "pesummary.err")
+
+    def _write(self, lines):
+        with open(self.log, "a") as log:
+            log.write("".join(lines))
+
+    def test_while_running_logs_stage(self):
+        self._write(RUN[:7])
+        with self.assertLogs("asimov", level="INFO") as logs:
+            self.pipeline.while_running()
+        self.assertIn("plots (two)", logs.output[-1])
+        self.assertTrue(os.path.exists(f"{self.log}.progress.json"))
+
+    def test_while_running_before_log_is_quiet(self):
+        with self.assertNoLogs("asimov", level="INFO"):
+            self.pipeline.while_running()
+
+    def test_stage_timings_stored_on_completion(self):
+        self._write(RUN)
+        with patch("asimov_pesummary.pesummary.write_summary_statistics"), \
+                patch("asimov.pipeline.Pipeline.after_completion"):
+            self.pipeline.after_completion()
+        path = self.pipeline._stage_timings_file()
+        self.assertEqual(
+            os.path.basename(path),
+            f"pesummary_{self.pipeline.production.name}_stages.json",
+        )
+        with open(path) as f:
+            timings = json.load(f)
+        self.assertEqual(timings["plots"]["labels"], {"one": 59, "two": 69})
+
+    def test_stage_timings_written_once(self):
+        self._write(RUN)
+        path = self.pipeline._stage_timings_file()
+        with patch("asimov_pesummary.pesummary.write_summary_statistics"), \
+                patch("asimov.pipeline.Pipeline.after_completion"):
+            with self.assertLogs("asimov", level="INFO"):
+                self.pipeline.after_completion()
+            written = os.stat(path).st_mtime_ns
+            os.utime(path, ns=(written - 10**9, written - 10**9))
+            with self.assertNoLogs("asimov", level="INFO"):
+                self.pipeline.after_completion()
+        self.assertEqual(os.stat(path).st_mtime_ns, written - 10**9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,325 @@
+"""Tests for asimov_pesummary.results, and PESummary's completion checks."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import h5py
+import numpy as np
+
+from tests.test_pesummary import (
+    PESummary,
+    _CONFIG,
+    make_dependency,
+    make_production,
+    make_subject_analysis,
+)
+
+from asimov_pesummary import results
+
+
+def make_metafile(path, labels, parameters=("mass_1", "mass_2", "ra"),
+                  n_samples=100, complete=True, chunked=False, seed=1):
+    """Write a small metafile laid out the way PESummary writes one: a
+    group per label holding a compound ``posterior_samples`` dataset, PSDs
+    and the config it was run with, plus top-level ``history`` and
+    ``version`` groups."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dtype = [(parameter, "<f8") for parameter in parameters]
+    with h5py.File(path, "w") as metafile:
+        for number, label in enumerate(labels):
+            group = metafile.create_group(label)
+            samples = np.zeros(n_samples, dtype=dtype)
+            for column, parameter in enumerate(parameters):
+                samples[parameter] = rng.normal(10 * (column + 1) + number, 1, n_samples)
+            group.create_dataset("posterior_samples", data=samples, chunks=chunked or None)
+            psds = group.create_group("psds")
+            frequencies = np.linspace(20, 1024, 64)
+            psds.create_dataset("H1", data=np.vstack([frequencies, frequencies ** -2]).T)
+            config = group.create_group("config_file").create_group("engine")
+            config.create_dataset("run", data=[label.encode()])
+            group.create_dataset("approximant", data=[b"IMRPhenomD"])
+        metafile.create_group("version").create_dataset("pesummary", data=[b"1.8.1"])
+        if complete:
+            metafile.create_group("history").create_dataset("creator", data=[b"test"])
+
+
+class TestMetafileGroups(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "samples", "posterior_samples.h5")
+        results._GROUPS.clear()
+
+    def test_missing_file(self):
+        self.assertIsNone(results.metafile_groups(self.path))
+
+    def test_unreadable_file(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write("still being written")
+        self.assertIsNone(results.metafile_groups(self.path))
+
+    def test_groups(self):
+        make_metafile(self.path, ["one", "two"])
+        self.assertEqual(
+            results.metafile_groups(self.path),
+            {"one", "two", "history", "version"},
+        )
+
+    def test_cached_while_file_unchanged(self):
+        make_metafile(self.path, ["one"])
+        results.metafile_groups(self.path)
+        with patch("h5py.File") as h5file:
+            results.metafile_groups(self.path)
+        h5file.assert_not_called()
+
+    def test_reread_when_file_changes(self):
+        make_metafile(self.path, ["one"])
+        results.metafile_groups(self.path)
+        make_metafile(self.path, ["one", "two"])
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIn("two", results.metafile_groups(self.path))
+
+
+class TestMetafileHandle(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "samples", "posterior_samples.h5")
+        make_metafile(self.path, ["one", "two"])
+
+    def test_opening_reads_nothing(self):
+        with patch("h5py.File") as h5file:
+            handle = results.MetafileHandle(self.path)
+        h5file.assert_not_called()
+        handle.close()
+
+    def test_labels_and_parameters(self):
+        with results.MetafileHandle(self.path) as metafile:
+            self.assertEqual(metafile.labels, ["one", "two"])
+            self.assertEqual(metafile.parameters("one"), ["mass_1", "mass_2", "ra"])
+            self.assertEqual(metafile.num_samples("two"), 100)
+
+    def test_samples_match_full_read(self):
+        with h5py.File(self.path, "r") as f:
+            expected = f["two"]["posterior_samples"][()]["mass_2"]
+        with results.MetafileHandle(self.path) as metafile:
+            np.testing.assert_array_equal(metafile.samples("two", "mass_2"), expected)
+            np.testing.assert_array_equal(
+                metafile.samples("two", "mass_2", rows=slice(10, 20)), expected[10:20]
+            )
+
+    def test_contiguous_samples_are_memory_mapped(self):
+        with results.MetafileHandle(self.path) as metafile:
+            metafile.samples("one", "ra")
+            self.assertIsInstance(metafile._maps["one"], np.memmap)
+
+    def test_chunked_samples_read_one_field(self):
+        make_metafile(self.path, ["one"], chunked=True)
+        with h5py.File(self.path, "r") as f:
+            expected = f["one"]["posterior_samples"][()]["ra"]
+        with results.MetafileHandle(self.path) as metafile:
+            np.testing.assert_array_equal(metafile.samples("one", "ra"), expected)
+            self.assertIsNone(metafile._maps["one"])
+
+    def test_unknown_label_or_parameter(self):
+        with results.MetafileHandle(self.path) as metafile:
+            with self.assertRaises(KeyError):
+                metafile.samples("three", "ra")
+            with self.assertRaises(KeyError):
+                metafile.samples("one", "dec")
+
+    def test_psds_and_config(self):
+        with results.MetafileHandle(self.path) as metafile:
+            psds = metafile.psds("one")
+            self.assertEqual(list(psds), ["H1"])
+            self.assertEqual(psds["H1"].shape, (64, 2))
+            self.assertEqual(metafile.config("two"), {"engine": {"run": "two"}})
+
+    def test_statistics(self):
+        with h5py.File(self.path, "r") as f:
+            expected = f["one"]["posterior_samples"][()]["mass_1"]
+        with results.MetafileHandle(self.path) as metafile:
+            statistics = metafile.statistics("one")
+        self.assertEqual(set(statistics), {"mass_1", "mass_2", "ra"})
+        np.testing.assert_allclose(
+            statistics["mass_1"]["quantiles"], np.quantile(expected, [0.05, 0.5, 0.95])
+        )
+        self.assertAlmostEqual(statistics["mass_1"]["mean"], expected.mean())
+
+    def test_statistics_of_chunked_samples(self):
+        make_metafile(self.path, ["one"], chunked=True)
+        with results.MetafileHandle(self.path) as metafile:
+            self.assertAlmostEqual(
+                metafile.statistics("one", quantiles=(0.5,))["mass_2"]["quantiles"][0],
+                20, delta=1,
+            )
+
+    def test_close_is_idempotent(self):
+        metafile = results.MetafileHandle(self.path)
+        metafile.labels
+        metafile.close()
+        metafile.close()
+        self.assertIsNone(metafile._file)
+
+
+class TestSummaryStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "samples", "posterior_samples.h5")
+        make_metafile(self.path, ["one", "two"])
+
+    def _read(self, path):
+        with open(path) as f:
+            return json.load(f)
+
+    def test_written_beside_metafile(self):
+        path = results.write_summary_statistics(self.path)
+        self.assertEqual(
+            path, os.path.join(self._tmp.name, "samples", "summary_statistics.json")
+        )
+        sidecar = self._read(path)
+        self.assertEqual(set(sidecar["labels"]), {"one", "two"})
+        self.assertEqual(
+            set(sidecar["labels"]["one"]["mass_1"]),
+            {"median", "lower", "upper", "mean", "std"},
+        )
+
+    def test_much_smaller_than_metafile(self):
+        make_metafile(self.path, ["one", "two"], n_samples=5000)
+        path = results.write_summary_statistics(self.path)
+        self.assertLess(os.path.getsize(path) * 50, os.path.getsize(self.path))
+
+    def test_not_rewritten_while_metafile_unchanged(self):
+        results.write_summary_statistics(self.path)
+        with patch("asimov_pesummary.results.MetafileHandle") as handle:
+            results.write_summary_statistics(self.path)
+        handle.assert_not_called()
+
+    def test_rewritten_when_metafile_changes(self):
+        path = results.write_summary_statistics(self.path)
+        make_metafile(self.path, ["three"])
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        results.write_summary_statistics(self.path)
+        self.assertEqual(list(self._read(path)["labels"]), ["three"])
+
+    def test_missing_metafile(self):
+        with self.assertRaises(FileNotFoundError):
+            results.write_summary_statistics(os.path.join(self._tmp.name, "none.h5"))
+
+
+class TestPESummaryDetectCompletion(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        config = dict(_CONFIG)
+        config[("project", "root")] = self._tmp.name
+        mock_config = patch("asimov_pesummary.pesummary.config").start()
+        mock_config.get.side_effect = lambda s, o, **k: config.get((s, o), "")
+        self.addCleanup(patch.stopall)
+        results._GROUPS.clear()
+
+    def _complete(self, pipeline, labels, home=True, complete=True):
+        webdir = pipeline._webdir()
+        make_metafile(pipeline.results()["metafile"], labels, complete=complete)
+        if home:
+            with open(os.path.join(webdir, "home.html"), "w") as f:
+                f.write("<html></html>")
+
+    def test_nothing_written(self):
+        self.assertFalse(PESummary(make_production()).detect_completion())
+
+    def test_complete_single_analysis(self):
+        pipeline = PESummary(make_production())
+        self._complete(pipeline, ["Prod0"])
+        self.assertTrue(pipeline.detect_completion())
+        self.assertTrue(pipeline.detect_completion_processing())
+
+    def test_requires_home_page(self):
+        pipeline = PESummary(make_production())
+        self._complete(pipeline, ["Prod0"], home=False)
+        self.assertFalse(pipeline.detect_completion())
+
+    def test_requires_completion_marker(self):
+        pipeline = PESummary(make_production())
+        self._complete(pipeline, ["Prod0"], complete=False)
+        self.assertFalse(pipeline.detect_completion())
+
+    def test_subject_analysis_waits_for_every_resolved_label(self):
+        production = make_subject_analysis(
+            analyses=[make_dependency("Bilby1"), make_dependency("Bilby2")],
+            resolved_dependencies=["Bilby1", "Bilby2"],
+        )
+        pipeline = PESummary(production)
+        self._complete(pipeline, ["Bilby1"])
+        self.assertFalse(pipeline.detect_completion())
+        make_metafile(pipeline.results()["metafile"], ["Bilby1", "Bilby2"])
+        path = pipeline.results()["metafile"]
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(pipeline.detect_completion())
+
+    def test_page_from_before_resubmission_is_stale(self):
+        production = make_production()
+        production.event.work_dir = self._tmp.name
+        pipeline = PESummary(production)
+        self._complete(pipeline, ["Prod0"])
+        record = pipeline._submission_record()
+        with open(record, "w") as f:
+            f.write("{}")
+        metafile = pipeline.results()["metafile"]
+        stat = os.stat(metafile)
+        os.utime(record, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertFalse(pipeline.detect_completion())
+        os.utime(metafile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+        self.assertTrue(pipeline.detect_completion())
+
+    def test_open_results(self):
+        pipeline = PESummary(make_production())
+        self._complete(pipeline, ["Prod0"])
+        with pipeline.open_results() as metafile:
+            self.assertEqual(metafile.path, pipeline.results()["metafile"])
+            self.assertEqual(metafile.labels, ["Prod0"])
+
+    def test_collect_assets_advertises_sidecar(self):
+        pipeline = PESummary(make_production())
+        assets = pipeline.collect_assets()
+        self.assertEqual(assets["samples"], pipeline.results()["metafile"])
+        self.assertEqual(
+            assets["summary statistics"],
+            os.path.join(pipeline._webdir(), "samples", "summary_statistics.json"),
+        )
+
+    def test_completion_writes_sidecar(self):
+        pipeline = PESummary(make_production())
+        self._complete(pipeline, ["Prod0"])
+        pipeline.after_completion()
+        with open(pipeline.collect_assets()["summary statistics"]) as f:
+            self.assertIn("Prod0", json.load(f)["labels"])
+
+    def test_sidecar_failure_does_not_block_completion(self):
+        pipeline = PESummary(make_production())
+        pipeline.after_completion()
+        self.assertEqual(pipeline.production.status, "finished")
+
+    def test_samples_are_not_read(self):
+        pipeline = PESummary(make_production())
+        self._complete(pipeline, ["Prod0"])
+        with patch.object(h5py.Dataset, "__getitem__") as read:
+            pipeline.detect_completion()
+        read.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
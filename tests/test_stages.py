@@ -0,0 +1,163 @@
+"""Tests for asimov_pesummary.stages, and its use in incremental refreshes."""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tests.test_pesummary import (
+    PESummary,
+    _CONFIG,
+    make_dependency,
+    make_subject_analysis,
+)
+from tests.test_results import make_metafile
+
+from asimov_pesummary import results, stages
+
+
+class TestRequestedStages(unittest.TestCase):
+
+    def test_nothing_requested(self):
+        self.assertEqual(stages.requested_stages({"multiprocess": 4}), {})
+
+    def test_every_stage(self):
+        requested = stages.requested_stages({
+            "evolve spins": ["forwards", "backwards"],
+            "calculate": ["precessing snr"],
+            "regenerate": True,
+            "regenerate posteriors": ["redshift"],
+            "skymap samples": 2000,
+        })
+        self.assertEqual(
+            set(requested),
+            {"evolve spins forwards", "evolve spins backwards", "precessing snr",
+             "regenerate", "skymap"},
+        )
+        self.assertEqual(requested["regenerate"], {"redshift"})
+
+
+    def test_no_skymap_without_ligo_skymap(self):
+        requested = stages.requested_stages(
+            {"skymap samples": 2000}, ["--disable_corner", "--no_ligo_skymap"]
+        )
+        self.assertEqual(requested, {})
+
+
+class TestInventory(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.webdir = self._tmp.name
+        self.metafile = os.path.join(self.webdir, "samples", "posterior_samples.h5")
+        results._GROUPS.clear()
+
+    def test_no_metafile(self):
+        self.assertIsNone(stages.inventory(self.metafile, self.webdir, {}))
+
+    def test_labels_without_stages(self):
+        make_metafile(self.metafile, ["A", "B"])
+        self.assertEqual(
+            stages.inventory(self.metafile, self.webdir, {}), {"A": [], "B": []}
+        )
+
+    def test_completed_stages_per_label(self):
+        make_metafile(
+            self.metafile, ["A"],
+            parameters=("mass_1", "network_precessing_snr"),
+        )
+        with open(stages.skymap_path(self.webdir, "A"), "w"):
+            pass
+        meta = {"calculate": ["precessing snr"], "skymap samples": 100,
+                "evolve spins": ["forwards"]}
+        self.assertEqual(
+            stages.inventory(self.metafile, self.webdir, meta),
+            {"A": ["precessing snr", "skymap"]},
+        )
+
+
+class TestIncrementalRefreshFromPage(unittest.TestCase):
+    """
+    The published page's metafile, rather than the ledger's
+    resolved_dependencies, decides which labels a refresh adds.
+    """
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        config = dict(_CONFIG)
+        config[("project", "root")] = self._tmp.name
+        mock_config = patch("asimov_pesummary.pesummary.config").start()
+        mock_config.get.side_effect = lambda s, o, **k: config.get((s, o), "")
+        self.addCleanup(patch.stopall)
+        results._GROUPS.clear()
+
+    def _pipeline(self, published, resolved, current=("Bilby1", "Bilby2"), **meta):
+        production = make_subject_analysis(
+            pesummary_meta=meta,
+            analyses=[make_dependency(name) for name in current],
+            resolved_dependencies=resolved,
+        )
+        pipeline = PESummary(production)
+        if published is not None:
+            make_metafile(
+                pipeline.results()["metafile"], published,
+                parameters=("mass_1", "network_precessing_snr"),
+            )
+            with open(os.path.join(pipeline._webdir(), "home.html"), "w"):
+                pass
+        return pipeline
+
+    def test_lost_resolved_dependencies_still_incremental(self):
+        job = self._pipeline(["Bilby1"], None)._job()
+        self.assertTrue(job["incremental"])
+        self.assertEqual(job["labels"], ["Bilby2"])
+        self.assertEqual(job["resolved"], ["Bilby1", "Bilby2"])
+
+    def test_failed_refresh_labels_are_added(self):
+        # Bilby2 was submitted (and so resolved) but never reached the page.
+        job = self._pipeline(["Bilby1"], ["Bilby1", "Bilby2"])._job()
+        self.assertTrue(job["incremental"])
+        self.assertEqual(job["labels"], ["Bilby2"])
+
+    def test_removed_label_still_rebuilds(self):
+        job = self._pipeline(["Bilby0", "Bilby1"], ["Bilby0", "Bilby1"])._job()
+        self.assertFalse(job["incremental"])
+        self.assertEqual(job["labels"], ["Bilby1", "Bilby2"])
+        self.assertEqual(job["reused"], {})
+
+    def test_no_page_rebuilds(self):
+        job = self._pipeline(None, ["Bilby1"])._job()
+        self.assertFalse(job["incremental"])
+
+    def test_label_missing_new_stage_is_resubmitted(self):
+        # Bilby1 was published before the skymap was requested.
+        job = self._pipeline(
+            ["Bilby1"], ["Bilby1"],
+            calculate=["precessing snr"], **{"skymap samples": 100},
+        )._job()
+        self.assertFalse(job["incremental"])
+        self.assertEqual(job["labels"], ["Bilby1", "Bilby2"])
+        self.assertEqual(job["reused"], {})
+
+    def test_minimal_preset_with_skymap_samples_stays_incremental(self):
+        # The minimal preset makes no skymap, so none is missing.
+        job = self._pipeline(
+            ["Bilby1"], ["Bilby1"], preset="minimal", **{"skymap samples": 100},
+        )._job()
+        self.assertTrue(job["incremental"])
+        self.assertEqual(job["labels"], ["Bilby2"])
+
+    def test_reused_stages_reported(self):
+        pipeline = self._pipeline(
+            ["Bilby1"], ["Bilby1"], calculate=["precessing snr"]
+        )
+        plan = pipeline.plan()
+        self.assertEqual(plan.labels, ["Bilby2"])
+        self.assertEqual(plan.reused, {"Bilby1": ["precessing snr"]})
+        self.assertEqual(plan.to_dict()["reused"], {"Bilby1": ["precessing snr"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
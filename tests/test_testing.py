@@ -0,0 +1,676 @@
+"""Tests for the fake upstream pipeline in asimov_pesummary.testing."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import h5py
+import numpy as np
+import yaml
+
+from asimov_pesummary import testing
+from asimov_pesummary.testing import FakeCBCPipeline
+
+
+def make_fake_production(rundir, **meta):
+    """A MagicMock production for a FakeCBCPipeline, running in ``rundir``."""
+    production = MagicMock()
+    production.name = "fake-pe"
+    production.rundir = rundir
+    production.meta = {"interferometers": ["H1", "L1"], **meta}
+    return production
+
+
+class TestGenerateSamples(unittest.TestCase):
+
+    def test_chunks(self):
+        chunks = list(testing.generate_samples(25, seed=1, chunk_size=10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual(chunks[0].shape[1], len(testing.PARAMETERS))
+
+    def test_seeded(self):
+        first = np.vstack(list(testing.generate_samples(20, seed=1)))
+        again = np.vstack(list(testing.generate_samples(20, seed=1)))
+        other = np.vstack(list(testing.generate_samples(20, seed=2)))
+        np.testing.assert_array_equal(first, again)
+        self.assertFalse(np.array_equal(first, other))
+
+    def test_parameters(self):
+        [chunk] = testing.generate_samples(
+            100, parameters=["mass_2", "mass_1", "chi_p"], seed=1
+        )
+        self.assertEqual(chunk.shape, (100, 3))
+        self.assertTrue(np.all(chunk[:, 0] <= chunk[:, 1]))
+        self.assertTrue(np.all((chunk[:, 2] >= 0) & (chunk[:, 2] < 1)))
+
+    def test_source_frame_masses(self):
+        parameters = ["mass_1", "redshift", "mass_1_source"]
+        [chunk] = testing.generate_samples(10, parameters=parameters)
+        np.testing.assert_allclose(chunk[:, 2], chunk[:, 0] / (1 + chunk[:, 1]))
+
+
+class TestStructuredSamples(unittest.TestCase):
+
+    def setUp(self):
+        [chunk] = testing.generate_samples(5000, seed=2, structured=True)
+        self.samples = dict(zip(testing.PARAMETERS, chunk.T))
+
+    def test_localised_sky(self):
+        ra, dec = self.samples["ra"], self.samples["dec"]
+        centre = np.array([
+            np.cos(testing.SOURCE["dec"]) * np.cos(testing.SOURCE["ra"]),
+            np.cos(testing.SOURCE["dec"]) * np.sin(testing.SOURCE["ra"]),
+            np.sin(testing.SOURCE["dec"]),
+        ])
+        directions = np.column_stack(
+            [np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)]
+        )
+        separation = np.arccos(np.clip(directions @ centre, -1, 1))
+        self.assertLess(np.median(separation), 2 * testing.SOURCE["sky spread"])
+        self.assertTrue(np.all((ra >= 0) & (ra < 2 * np.pi)))
+
+    def test_chirp_mass_is_measured(self):
+        mass_1, mass_2 = self.samples["mass_1"], self.samples["mass_2"]
+        chirp_mass = (mass_1 * mass_2) ** 0.6 / (mass_1 + mass_2) ** 0.2
+        self.assertAlmostEqual(np.median(chirp_mass), testing.SOURCE["chirp mass"], delta=0.5)
+        self.assertTrue(np.all(mass_2 <= mass_1))
+
+    def test_precessing_spins(self):
+        self.assertGreater(np.median(self.samples["a_1"]), 0.1)
+        self.assertGreater(np.std(np.cos(self.samples["tilt_1"])), 0.2)
+
+    def test_consistent_source_frame(self):
+        redshift = self.samples["redshift"]
+        # About z = 0.093 at 440 Mpc in Planck 2015 cosmology.
+        self.assertAlmostEqual(np.median(redshift), 0.093, delta=0.01)
+        np.testing.assert_allclose(
+            self.samples["mass_1_source"], self.samples["mass_1"] / (1 + redshift)
+        )
+
+    def test_source_overrides(self):
+        [chunk] = testing.generate_samples(
+            1000, ["luminosity_distance"], structured=True,
+            source={"luminosity distance": 2000},
+        )
+        self.assertAlmostEqual(np.median(chunk) / 2000, 1, delta=0.1)
+
+
+class TestWriteSamples(unittest.TestCase):
+
+    def test_streams_every_chunk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "samples.dat")
+            testing.write_samples(path, 25, seed=3, chunk_size=7)
+            with open(path) as samples_file:
+                self.assertEqual(samples_file.readline().split(), testing.PARAMETERS)
+            written = np.loadtxt(path, skiprows=1)
+        expected = np.vstack(list(testing.generate_samples(25, seed=3, chunk_size=7)))
+        np.testing.assert_allclose(written, expected, rtol=1e-11)
+
+
+def read_samples(path, file_format):
+    """Read a file written by write_samples back as (parameters, array)."""
+    if file_format in ("dat", "csv"):
+        delimiter = "," if file_format == "csv" else None
+        with open(path) as samples_file:
+            parameters = samples_file.readline().strip().split(delimiter)
+        return parameters, np.loadtxt(path, skiprows=1, delimiter=delimiter, ndmin=2)
+    if "hdf5" in file_format:
+        with h5py.File(path, "r") as samples_file:
+            posterior = samples_file["posterior"]
+            parameters = list(posterior)
+            return parameters, np.column_stack([posterior[p][()] for p in parameters])
+    with open(path) as samples_file:
+        content = json.load(samples_file)["posterior"]["content"]
+    return list(content), np.column_stack(list(content.values()))
+
+
+class TestSampleFormats(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.parameters = ["mass_1", "mass_2", "ra"]
+        self.expected = np.vstack(
+            list(testing.generate_samples(25, self.parameters, seed=5, chunk_size=10))
+        )
+
+    def test_round_trip(self):
+        for file_format, name in testing.SAMPLE_FORMATS.items():
+            with self.subTest(file_format):
+                path = os.path.join(self._tmp.name, f"{file_format}-{name}")
+                testing.write_samples(
+                    path, 25, self.parameters, seed=5, chunk_size=10,
+                    file_format=file_format,
+                )
+                parameters, samples = read_samples(path, file_format)
+                self.assertEqual(sorted(parameters), sorted(self.parameters))
+                order = [parameters.index(p) for p in self.parameters]
+                np.testing.assert_allclose(samples[:, order], self.expected, rtol=1e-11)
+        self.assertEqual(
+            sorted(os.listdir(self._tmp.name)),
+            sorted(f"{f}-{n}" for f, n in testing.SAMPLE_FORMATS.items()),
+        )
+
+    def test_compressed(self):
+        path = os.path.join(self._tmp.name, "samples.h5")
+        testing.write_samples(path, 25, file_format="hdf5-gzip")
+        with h5py.File(path, "r") as samples_file:
+            self.assertEqual(samples_file["posterior/mass_1"].compression, "gzip")
+
+    def test_bilby_version(self):
+        path = os.path.join(self._tmp.name, "fake_result.hdf5")
+        testing.write_samples(path, 5, file_format="bilby-hdf5")
+        with h5py.File(path, "r") as samples_file:
+            self.assertIn(b"bilby=", samples_file["version"][()])
+        path = os.path.join(self._tmp.name, "fake_result.json")
+        testing.write_samples(path, 5, file_format="bilby-json")
+        with open(path) as samples_file:
+            self.assertTrue(json.load(samples_file)["version"].startswith("bilby="))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            testing.write_samples(os.path.join(self._tmp.name, "x"), 5, file_format="npz")
+
+
+class TestFakeCBCPipelineSamples(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _build(self, **meta):
+        pipeline = FakeCBCPipeline(make_fake_production(self._tmp.name, **meta))
+        pipeline.build_dag()
+        with open(pipeline._samples_path()) as samples_file:
+            header = samples_file.readline().split()
+        return header, np.loadtxt(pipeline._samples_path(), skiprows=1, ndmin=2)
+
+    def test_defaults(self):
+        header, samples = self._build()
+        self.assertEqual(header, FakeCBCPipeline.PARAMETERS)
+        self.assertEqual(len(samples), 50)
+
+    def test_options_from_meta(self):
+        header, samples = self._build(
+            **{"fake samples": {"number": 300, "parameters": ["mass_1", "ra"],
+                                "seed": 9}}
+        )
+        self.assertEqual(header, ["mass_1", "ra"])
+        self.assertEqual(samples.shape, (300, 2))
+        [expected] = testing.generate_samples(300, ["mass_1", "ra"], seed=9)
+        np.testing.assert_allclose(samples, expected, rtol=1e-11)
+
+    def test_structured_from_meta(self):
+        _, samples = self._build(
+            **{"fake samples": {"structured": True, "parameters": ["a_1"]}}
+        )
+        self.assertGreater(samples.max(), 0)
+
+    def test_format_from_meta(self):
+        production = make_fake_production(
+            self._tmp.name, **{"fake samples": {"format": "hdf5"}}
+        )
+        pipeline = FakeCBCPipeline(production)
+        pipeline.build_dag()
+        self.assertTrue(pipeline._samples_path().endswith("posterior_samples.h5"))
+        self.assertTrue(pipeline.detect_completion())
+        self.assertEqual(pipeline.collect_assets()["samples"], pipeline._samples_path())
+
+
+class TestFakeNoise(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_psd_resolution_and_shape(self):
+        frequencies, psd = testing.fake_psd("H1")
+        self.assertEqual(len(frequencies), 32609)
+        self.assertEqual(frequencies[1] - frequencies[0], 1 / 16)
+        # Seismic wall, bucket around a couple of hundred Hz, shot noise.
+        bucket = psd[np.searchsorted(frequencies, 200)]
+        self.assertGreater(psd[0], 1000 * bucket)
+        self.assertGreater(psd[-1], 10 * bucket)
+        self.assertTrue((psd > 0).all())
+
+    def test_psd_cached_and_seeded(self):
+        self.assertIs(testing.fake_psd("L1", 3), testing.fake_psd("L1", 3))
+        self.assertFalse(testing.fake_psd("L1", 3)[1].flags.writeable)
+        psd = testing.fake_psd("L1", 3)[1]
+        self.assertFalse(np.array_equal(psd, testing.fake_psd("L1", 4)[1]))
+        self.assertFalse(np.array_equal(psd, testing.fake_psd("H1", 3)[1]))
+
+    def test_calibration_envelope(self):
+        envelope = testing.fake_calibration("V1", points=200)
+        self.assertEqual(envelope.shape, (200, 7))
+        frequency, amplitude, phase, low, low_phase, high, high_phase = envelope.T
+        self.assertTrue((np.diff(frequency) > 0).all())
+        self.assertTrue((low < amplitude).all() and (amplitude < high).all())
+        self.assertTrue((low_phase < phase).all() and (phase < high_phase).all())
+        np.testing.assert_allclose(amplitude, 1, atol=0.1)
+
+    def test_pipeline_advertises_psds_and_calibration(self):
+        production = make_fake_production(
+            self._tmp.name, **{"fake noise": {"resolution": 1}}
+        )
+        pipeline = FakeCBCPipeline(production)
+        pipeline.build_dag()
+        assets = pipeline.collect_assets()
+        self.assertEqual(set(assets["calibration"]), {"H1", "L1"})
+        psd = np.loadtxt(assets["psds"]["H1"])
+        self.assertEqual(psd.shape, (2039, 2))
+        np.testing.assert_allclose(psd[:, 1], testing.fake_psd("H1", 4321, 10, 2048, 1)[1])
+        self.assertEqual(np.loadtxt(assets["calibration"]["L1"]).shape, (1000, 7))
+
+    def test_calibration_disabled(self):
+        production = make_fake_production(
+            self._tmp.name, **{"fake noise": {"calibration": False, "resolution": 1}}
+        )
+        pipeline = FakeCBCPipeline(production)
+        pipeline.build_dag()
+        self.assertNotIn("calibration", pipeline.collect_assets())
+        self.assertFalse(os.path.exists(os.path.join(self._tmp.name, "H1_calibration.dat")))
+
+
+class TestFixtureCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.cache = os.path.join(self._tmp.name, "cache")
+        patcher = patch.dict(os.environ, {testing.CACHE_ENV: self.cache})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _build(self, rundir="run", **samples):
+        production = make_fake_production(
+            os.path.join(self._tmp.name, rundir),
+            **{"fake samples": samples, "fake noise": {"resolution": 1}},
+        )
+        pipeline = FakeCBCPipeline(production)
+        pipeline.build_dag()
+        return pipeline
+
+    def test_generated_once_and_linked(self):
+        first = self._build("one")
+        entries = sorted(os.listdir(self.cache))
+        self.assertEqual(len(entries), 5)
+        with patch.object(testing, "write_samples") as write_samples:
+            second = self._build("two")
+        write_samples.assert_not_called()
+        self.assertEqual(sorted(os.listdir(self.cache)), entries)
+        self.assertTrue(os.path.samefile(first._samples_path(), second._samples_path()))
+        self.assertTrue(
+            os.path.samefile(first._psd_paths()["H1"], second._psd_paths()["H1"])
+        )
+        # Rebuilding in place leaves nothing behind.
+        first.build_dag()
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self._tmp.name, "one"))),
+            sorted(os.listdir(os.path.join(self._tmp.name, "two"))),
+        )
+
+    def test_keyed_by_parameters(self):
+        first = self._build(seed=1)
+        with open(first._samples_path()) as samples_file:
+            before = samples_file.read()
+        second = self._build(seed=2)
+        with open(second._samples_path()) as samples_file:
+            self.assertNotEqual(samples_file.read(), before)
+        self.assertEqual(len(os.listdir(self.cache)), 6)
+        self.assertNotEqual(
+            testing.fixture_key("samples", seed=1), testing.fixture_key("samples", seed=2)
+        )
+
+    def test_rebuild_replaces_rather_than_overwrites(self):
+        pipeline = self._build(number=10)
+        [entry] = [
+            os.path.join(self.cache, name) for name in os.listdir(self.cache)
+            if os.path.samefile(os.path.join(self.cache, name), pipeline._samples_path())
+        ]
+        self._build(number=20)
+        self.assertEqual(len(np.loadtxt(entry, skiprows=1)), 10)
+        self.assertEqual(len(np.loadtxt(pipeline._samples_path(), skiprows=1)), 20)
+
+    def test_disabled(self):
+        with patch.dict(os.environ, {testing.CACHE_ENV: ""}):
+            self.assertIsNone(testing.fixture_cache())
+            pipeline = self._build()
+        self.assertTrue(os.path.exists(pipeline._samples_path()))
+        self.assertFalse(os.path.exists(self.cache))
+
+    def test_keyed_by_fixture_version(self):
+        key = testing.fixture_key("samples", seed=1)
+        with patch.object(testing, "FIXTURE_VERSION", testing.FIXTURE_VERSION + 1):
+            self.assertNotEqual(testing.fixture_key("samples", seed=1), key)
+
+    def test_least_recently_used_evicted(self):
+        def fixture(name):
+            def write(target):
+                with open(target, "w") as f:
+                    f.write(name * 10)
+
+            path = os.path.join(self._tmp.name, f"{name}.txt")
+            return testing.cached_fixture(path, write, "text", name=name)
+
+        with patch.dict(os.environ, {testing.CACHE_SIZE_ENV: "25"}):
+            for name in ("a", "b"):
+                # Linked to its cache entry, so this ages that too.
+                os.utime(fixture(name), (0, 0))
+            # Using "a" again makes "b" the least recently used.
+            fixture("a")
+            fixture("c")
+        kept = {open(os.path.join(self.cache, name)).read()[0]
+                for name in os.listdir(self.cache)}
+        self.assertEqual(kept, {"a", "c"})
+        # The evicted fixture is still linked where it was used.
+        with open(os.path.join(self._tmp.name, "b.txt")) as evicted:
+            self.assertEqual(evicted.read(), "b" * 10)
+
+    def test_clear(self):
+        self._build()
+        testing.clear_fixture_cache()
+        self.assertFalse(os.path.exists(self.cache))
+
+    def test_clear_from_command_line(self):
+        self._build()
+        with patch("builtins.print"):
+            testing.main(["--clear-cache"])
+        self.assertFalse(os.path.exists(self.cache))
+
+
+class TestSimulatedRun(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.clock = testing.SimulatedClock(
+            os.path.join(self._tmp.name, "clock"), start=1000
+        )
+
+    def _submit(self, **run):
+        production = make_fake_production(
+            os.path.join(self._tmp.name, "run"),
+            **{"fake samples": {"number": 40}, "fake run": {"runtime": 100, **run}},
+        )
+        pipeline = FakeCBCPipeline(production)
+        pipeline.clock = self.clock
+        pipeline.submit_dag()
+        return pipeline
+
+    def test_completes_after_runtime(self):
+        pipeline = self._submit()
+        self.assertFalse(pipeline.detect_completion())
+        self.assertTrue(all(os.path.exists(p) for p in pipeline._psd_paths().values()))
+        self.clock.advance(99)
+        self.assertFalse(pipeline.detect_completion())
+        self.clock.advance(1)
+        self.assertTrue(pipeline.detect_completion())
+        self.assertEqual(len(np.loadtxt(pipeline._samples_path(), skiprows=1)), 40)
+
+    def test_checkpoints_before_final_samples(self):
+        pipeline = self._submit(checkpoints=3)
+        self.clock.advance(50)
+        pipeline.while_running()
+        self.assertFalse(os.path.exists(pipeline._samples_path()))
+        checkpoint = np.loadtxt(pipeline._checkpoint_path(), skiprows=1)
+        self.assertEqual(len(checkpoint), 20)
+        self.assertEqual(pipeline._load_run()["checkpoint"], 2)
+
+    def test_zero_runtime_completes_at_once(self):
+        pipeline = self._submit(runtime=0, checkpoints=2)
+        self.assertTrue(pipeline.detect_completion())
+        with self.assertRaises(ValueError):
+            self._submit(runtime=-1)
+
+    def test_runtime_distribution(self):
+        runtimes = {
+            self._submit(runtime={"distribution": "lognormal", "median": 100},
+                         seed=seed)._load_run()["runtime"]
+            for seed in range(5)
+        }
+        self.assertEqual(len(runtimes), 5)
+        with self.assertRaises(ValueError):
+            testing.draw_runtime(np.random.default_rng(), {"distribution": "normal"})
+
+    def test_failure_and_retries(self):
+        pipeline = self._submit(**{"failure probability": 1, "retries": 1})
+        self.clock.advance(100)
+        self.assertFalse(pipeline.detect_completion())
+        self.assertEqual(pipeline._load_run()["status"], "failed")
+        pipeline.resurrect()
+        self.assertEqual(pipeline._load_run()["attempt"], 2)
+        self.clock.advance(100)
+        with self.assertRaises(testing.PipelineException):
+            pipeline.resurrect()
+        with open(os.path.join(pipeline.production.rundir, "fake_run.err")) as log:
+            self.assertEqual(len(log.readlines()), 2)
+
+    def test_clock_from_environment(self):
+        with patch.dict(os.environ, {testing.CLOCK_ENV: self.clock.path}):
+            self.assertEqual(testing.default_clock().now(), 1000)
+        with patch.dict(os.environ, clear=True):
+            self.assertIsInstance(testing.default_clock(), testing.WallClock)
+
+
+
+class TestFakeScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.clock = testing.SimulatedClock(os.path.join(self._tmp.name, "clock"))
+
+    def _description(self, name="job", **extra):
+        return {
+            "executable": "/bin/true",
+            "arguments": "--labels a b",
+            "output": os.path.join(self._tmp.name, f"{name}.out"),
+            "error": os.path.join(self._tmp.name, f"{name}.err"),
+            "log": os.path.join(self._tmp.name, f"{name}.log"),
+            "batch_name": name,
+            **extra,
+        }
+
+    def _statuses(self, scheduler):
+        return {job["id"]: job["status"] for job in scheduler.query_all_jobs()}
+
+    def test_latency_slots_and_priority(self):
+        scheduler = testing.FakeScheduler(slots=1, latency=10, runtime=100,
+                                          clock=self.clock)
+        first = scheduler.submit(self._description("first"))
+        second = scheduler.submit(self._description("second"))
+        urgent = scheduler.submit(self._description("urgent", priority=10))
+        self.assertEqual(set(self._statuses(scheduler).values()), {testing.IDLE})
+        self.clock.advance(10)
+        self.assertEqual(
+            self._statuses(scheduler),
+            {first: testing.IDLE, second: testing.IDLE, urgent: testing.RUNNING},
+        )
+        # Jobs finishing while nobody looks still free their slots on time.
+        self.clock.advance(1000)
+        self.assertEqual(scheduler.query_all_jobs(), [])
+        self.assertEqual(scheduler.jobs[first]["started"], 110)
+        self.assertEqual(scheduler.jobs[second]["started"], 210)
+        self.assertEqual(scheduler.collect_history(second)["runtime"], 100)
+
+    def test_accepts_job_descriptions(self):
+        from asimov.scheduler_utils import create_job_from_dict
+
+        scheduler = testing.FakeScheduler(runtime=100, clock=self.clock)
+        job_id = scheduler.submit(
+            create_job_from_dict(self._description(request_cpus=4))
+        )
+        [job] = scheduler.query(job_id)
+        self.assertEqual(job["command"], "/bin/true --labels a b")
+        self.assertEqual(scheduler.jobs[job_id]["description"]["request_cpus"], 4)
+
+    def test_event_log(self):
+        scheduler = testing.FakeScheduler(runtime=5, failure_probability=1,
+                                          clock=self.clock)
+        job_id = scheduler.submit(self._description())
+        self.clock.advance(5)
+        scheduler.query_all_jobs()
+        with open(self._description()["log"]) as log:
+            events = [line.split()[0] for line in log if line[:3].isdigit()]
+            log.seek(0)
+            self.assertIn("(return value 1)", log.read())
+        self.assertEqual(events, ["000", "001", "005"])
+        self.assertEqual(scheduler.collect_history(job_id)["runtime"], 5)
+
+    def test_delete(self):
+        scheduler = testing.FakeScheduler(latency=10, clock=self.clock)
+        job_id = scheduler.submit(self._description())
+        scheduler.delete(job_id)
+        self.assertEqual(scheduler.query_all_jobs(), [])
+        with self.assertRaises(ValueError):
+            scheduler.collect_history(job_id)
+
+    def _dag(self):
+        for name in ("parent", "child"):
+            with open(os.path.join(self._tmp.name, f"{name}.sub"), "w") as f:
+                f.write(
+                    "executable = /bin/true\n"
+                    "arguments = --labels $(label)\n"
+                    f"log = {name}.log\n"
+                    "queue\n"
+                )
+        path = os.path.join(self._tmp.name, "jobs.dag")
+        with open(path, "w") as f:
+            f.write(
+                "# A two-node DAG\n"
+                "JOB parent parent.sub\n"
+                "JOB child child.sub\n"
+                'VARS child label="B"\n'
+                "PARENT parent CHILD child\n"
+                "RETRY child 2\n"
+            )
+        return path
+
+    def test_dag_nodes_run_in_order(self):
+        scheduler = testing.FakeScheduler(latency=5, runtime=100, clock=self.clock)
+        dag_id = scheduler.submit_dag(self._dag(), batch_name="Summary Pages")
+        records = scheduler.query_all_jobs()
+        self.assertEqual(
+            [(r["id"], r.get("dag id")) for r in records],
+            [(dag_id, None), (dag_id + 1, dag_id), (dag_id + 2, dag_id)],
+        )
+        self.assertEqual(records[2]["command"], "/bin/true --labels B")
+        self.assertEqual(records[2]["name"], "Summary Pages")
+        self.clock.advance(1000)
+        self.assertEqual(scheduler.query_all_jobs(), [])
+        self.assertEqual(scheduler.jobs[dag_id + 2]["started"], 110)
+        self.assertEqual(scheduler.jobs[dag_id]["end"], 210)
+        self.assertEqual(scheduler.jobs[dag_id]["returncode"], 0)
+        self.assertTrue(os.path.exists(os.path.join(self._tmp.name, "child.log")))
+
+    def test_failed_dag_node_cancels_children(self):
+        scheduler = testing.FakeScheduler(runtime=100, failure_probability=1,
+                                          clock=self.clock)
+        dag_id = scheduler.submit_dag(self._dag())
+        self.clock.advance(100)
+        self.assertEqual(scheduler.query_all_jobs(), [])
+        self.assertEqual(scheduler.jobs[dag_id + 2]["status"], testing.REMOVED)
+        self.assertEqual(scheduler.jobs[dag_id]["returncode"], 1)
+
+    def test_delete_dag(self):
+        scheduler = testing.FakeScheduler(runtime=100, clock=self.clock)
+        dag_id = scheduler.submit_dag(self._dag())
+        scheduler.delete(dag_id)
+        self.assertEqual(scheduler.query_all_jobs(), [])
+
+    def test_busy(self):
+        scheduler = testing.FakeScheduler(busy_probability=1, clock=self.clock)
+        with self.assertRaises(TimeoutError):
+            scheduler.submit(self._description())
+
+    def test_execute(self):
+        scheduler = testing.FakeScheduler(execute=True)
+        description = self._description(
+            executable=sys.executable, arguments="-c 'print(42)'"
+        )
+        job_id = scheduler.submit(description)
+        scheduler.jobs[job_id]["process"].wait()
+        self.assertEqual(scheduler.query_all_jobs(), [])
+        self.assertEqual(scheduler.jobs[job_id]["returncode"], 0)
+        with open(description["output"]) as output:
+            self.assertEqual(output.read(), "42\n")
+
+
+class TestSubjectBlueprints(unittest.TestCase):
+
+    def test_event_analyses_and_subject(self):
+        documents = testing.subject_blueprints(5, event="E", samples=(100, 1000))
+        self.assertEqual(documents[0], {
+            "kind": "event", "name": "E", "interferometers": ["H1", "L1"],
+        })
+        analyses, subject = documents[1:-1], documents[-1]
+        self.assertEqual([a["name"] for a in analyses],
+                         [f"fake-pe-{i}" for i in range(1, 6)])
+        self.assertTrue(all(a["event"] == "E" for a in analyses))
+        self.assertEqual(subject["pipeline"], "pesummary")
+        self.assertTrue(subject["refreshable"])
+        self.assertEqual(subject["analyses"], [{"pipeline": "fakecbcpipeline"}])
+
+    def test_analyses_vary(self):
+        analyses = testing.subject_blueprints(8, samples=(100, 1000))[1:-1]
+        approximants = {a["waveform"]["approximant"] for a in analyses}
+        self.assertEqual(approximants, set(testing.APPROXIMANTS))
+        counts = [a["fake samples"]["number"] for a in analyses]
+        self.assertTrue(all(100 <= count <= 1000 for count in counts))
+        self.assertGreater(len(set(counts)), 1)
+        seeds = {a["fake samples"]["seed"] for a in analyses}
+        self.assertEqual(len(seeds), 8)
+        for analysis in analyses:
+            self.assertEqual(
+                set(analysis["waveform"]["minimum frequency"]), {"H1", "L1"}
+            )
+
+    def test_reproducible(self):
+        self.assertEqual(
+            testing.subject_blueprints(3, seed=4), testing.subject_blueprints(3, seed=4)
+        )
+        self.assertNotEqual(
+            testing.subject_blueprints(3, seed=4), testing.subject_blueprints(3, seed=5)
+        )
+
+    def test_fake_samples_options(self):
+        [analysis] = testing.subject_blueprints(1, format="hdf5", structured=True)[1:-1]
+        self.assertEqual(analysis["fake samples"]["format"], "hdf5")
+        self.assertTrue(analysis["fake samples"]["structured"])
+
+    def test_ledger_of_subject_analyses(self):
+        documents = testing.ledger_blueprints(3, analyses=2)
+        events = [d["name"] for d in documents if d["kind"] == "event"]
+        self.assertEqual(events, [f"FAKE_PE_LEDGER_{i:05d}" for i in range(3)])
+        self.assertEqual(len(documents), 3 * 4)
+        summaries = [d for d in documents if d.get("pipeline") == "pesummary"]
+        self.assertEqual([d["name"] for d in summaries], ["pesummary-subject"] * 3)
+        self.assertEqual(summaries[0]["event"], events[0])
+
+    def test_ledger_of_single_analyses(self):
+        documents = testing.ledger_blueprints(2, kind="single", analyses=3)
+        summaries = [d for d in documents if d.get("pipeline") == "pesummary"]
+        self.assertEqual(len(summaries), 6)
+        self.assertEqual(summaries[0]["needs"], ["fake-pe-1"])
+        self.assertIn("approximant", summaries[0]["waveform"])
+        with self.assertRaises(ValueError):
+            testing.ledger_blueprints(1, kind="combined")
+
+    def test_main_writes_multi_document_yaml(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "blueprints.yaml")
+            with patch("builtins.print"):
+                testing.main(["4", "--output", path, "--format", "json"])
+            with open(path) as blueprint_file:
+                documents = list(yaml.safe_load_all(blueprint_file))
+        self.assertEqual(len(documents), 6)
+        self.assertEqual(documents[1]["fake samples"]["format"], "json")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,390 @@
+"""Tests for asimov_pesummary.throttle."""
+
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from tests.test_pesummary import PESummary, _CONFIG, make_production
+
+from asimov.pipeline import PipelineException
+
+from asimov_pesummary.throttle import QUEUED_JOB_ID, JobThrottle
+
+
+class FakeQueue:
+    """A stand-in scheduler which hands out sequential cluster ids and
+    reports every job as queued until ``finish`` is called."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 100
+
+    def submit(self, job):
+        self.next_id += 1
+        self.jobs[self.next_id] = job
+        return self.next_id
+
+    def finish(self, cluster_id):
+        self.jobs.pop(cluster_id)
+
+    def query_all_jobs(self):
+        return [{"id": f"{cluster_id}.0"} for cluster_id in self.jobs]
+
+
+class TestJobThrottle(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "state.json")
+        JobThrottle._pruned.clear()
+        self.addCleanup(JobThrottle._pruned.clear)
+
+    def test_no_limits_always_has_slot(self):
+        throttle = JobThrottle(self.path)
+        for i in range(10):
+            throttle.record("GW1", f"P{i}", i)
+        self.assertTrue(throttle.has_slot("GW1"))
+
+    def test_project_limit(self):
+        throttle = JobThrottle(self.path, max_jobs=2)
+        throttle.record("GW1", "P0", 1)
+        self.assertTrue(throttle.has_slot("GW2"))
+        throttle.record("GW2", "P0", 2)
+        self.assertFalse(throttle.has_slot("GW3"))
+
+    def test_event_limit(self):
+        throttle = JobThrottle(self.path, max_jobs_per_event=1)
+        throttle.record("GW1", "P0", 1)
+        self.assertFalse(throttle.has_slot("GW1"))
+        self.assertTrue(throttle.has_slot("GW2"))
+
+    def test_state_persists(self):
+        throttle = JobThrottle(self.path, max_jobs=1)
+        throttle.record("GW1", "P0", 1)
+        throttle.enqueue("GW1", "P1", {"executable": "x"})
+        throttle.save()
+        reloaded = JobThrottle(self.path, max_jobs=1)
+        self.assertIn("GW1/P0", reloaded.active)
+        self.assertIn("GW1/P1", reloaded.queued)
+
+    def test_locked_reloads_so_concurrent_changes_are_kept(self):
+        first, second = JobThrottle(self.path), JobThrottle(self.path)
+        with first.locked():
+            first.record("GW1", "P0", 1)
+            first.save()
+        with second.locked():
+            second.record("GW1", "P1", 2)
+            second.save()
+        self.assertEqual(set(JobThrottle(self.path).active), {"GW1/P0", "GW1/P1"})
+
+    def test_locked_excludes_other_processes(self):
+        import fcntl
+
+        throttle = JobThrottle(self.path)
+        with throttle.locked():
+            with open(f"{self.path}.lock") as lock:
+                with self.assertRaises(BlockingIOError):
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        with open(f"{self.path}.lock") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def test_unreadable_state_is_ignored(self):
+        with open(self.path, "w") as f:
+            f.write("not json")
+        self.assertEqual(JobThrottle(self.path).active, {})
+
+    def test_prune_forgets_finished_jobs(self):
+        queue = FakeQueue()
+        throttle = JobThrottle(self.path, max_jobs=1)
+        throttle.record("GW1", "P0", queue.submit(None))
+        queue.finish(101)
+        throttle.prune(queue, force=True)
+        self.assertEqual(throttle.active, {})
+
+    def test_prune_keeps_jobs_when_scheduler_unavailable(self):
+        scheduler = MagicMock()
+        scheduler.query_all_jobs.side_effect = RuntimeError("no schedd")
+        throttle = JobThrottle(self.path, max_jobs=1)
+        throttle.record("GW1", "P0", 1)
+        throttle.prune(scheduler)
+        self.assertIn("GW1/P0", throttle.active)
+
+    def test_prune_reuses_recent_query(self):
+        queue = MagicMock(wraps=FakeQueue())
+        throttle = JobThrottle(self.path, max_jobs=5)
+        throttle.record("GW1", "P0", 1)
+        self.assertTrue(throttle.prune(queue))
+        self.assertFalse(throttle.prune(queue))
+        self.assertEqual(queue.query_all_jobs.call_count, 1)
+
+    def test_release_order_by_priority_then_age(self):
+        throttle = JobThrottle(self.path, max_jobs=1)
+        throttle.enqueue("GW1", "Old", {"priority": 0})
+        throttle.enqueue("GW2", "Urgent", {"priority": 20})
+        throttle.enqueue("GW3", "New", {"priority": 0})
+        self.assertEqual(throttle.next_release(), "GW2/Urgent")
+        del throttle.queued["GW2/Urgent"]
+        self.assertEqual(throttle.next_release(), "GW1/Old")
+
+    def test_release_skips_events_at_their_limit(self):
+        throttle = JobThrottle(self.path, max_jobs_per_event=1)
+        throttle.record("GW1", "Running", 1)
+        throttle.enqueue("GW1", "Waiting", {"priority": 10})
+        throttle.enqueue("GW2", "Other", {"priority": 0})
+        self.assertEqual(throttle.next_release(), "GW2/Other")
+
+    def test_requeue_keeps_place(self):
+        throttle = JobThrottle(self.path, max_jobs=1)
+        throttle.enqueue("GW1", "P0", {})
+        first = throttle.queued["GW1/P0"]["queued at"]
+        throttle.enqueue("GW1", "P0", {})
+        self.assertEqual(throttle.queued["GW1/P0"]["queued at"], first)
+
+    def test_discard(self):
+        throttle = JobThrottle(self.path, max_jobs=1)
+        throttle.enqueue("GW1", "P0", {})
+        throttle.discard("GW1/P0")
+        throttle.discard("GW1/Missing")
+        self.assertIsNone(throttle.next_release())
+
+
+class FakeLedger:
+    """A ledger holding the given productions, looked up as asimov's are."""
+
+    def __init__(self, *productions):
+        self.productions = productions
+        self.update_event = MagicMock()
+
+    def get_event(self, name):
+        productions = [p for p in self.productions if p.event.name == name]
+        if not productions:
+            raise KeyError(name)
+        return [SimpleNamespace(name=name, productions=productions)]
+
+
+def with_job_id(production):
+    """Give a mock production asimov's ``job_id``, stored in its meta."""
+
+    def get(self):
+        return self.meta.get("scheduler", {}).get("job id")
+
+    def set(self, job_id):
+        self.meta.setdefault("scheduler", {})["job id"] = job_id
+
+    type(production).job_id = property(get, set)
+    return production
+
+
+class TestPESummaryThrottle(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        config = dict(_CONFIG)
+        config[("project", "root")] = self._tmp.name
+        self.mock_config = patch("asimov_pesummary.pesummary.config").start()
+        self.mock_config.get.side_effect = lambda s, o, **k: config.get((s, o), "")
+        self.addCleanup(patch.stopall)
+        JobThrottle._pruned.clear()
+        self.addCleanup(JobThrottle._pruned.clear)
+        self.queue = FakeQueue()
+
+    def _pipeline(self, name, event="GW150914", **meta):
+        production = make_production(pesummary_meta=meta)
+        production.name = name
+        production.event.name = event
+        production.event.work_dir = self._tmp.name
+        production.event.ledger = None
+        production.status = "ready"
+        pipeline = PESummary(production)
+        pipeline._scheduler = self.queue
+        return pipeline
+
+    def test_submission_is_recorded(self):
+        pipeline = self._pipeline("P0")
+        pipeline.submit_dag()
+        with open(pipeline._submission_record()) as f:
+            self.assertEqual(json.load(f)["production"], "P0")
+
+    def test_unlimited_by_default(self):
+        ids = [self._pipeline(f"P{i}").submit_dag() for i in range(3)]
+        self.assertEqual(len(self.queue.jobs), 3)
+        self.assertNotIn(QUEUED_JOB_ID, ids)
+        self.assertFalse(os.path.exists(os.path.join(self._tmp.name, ".asimov")))
+
+    def test_submissions_beyond_limit_are_queued(self):
+        ids = [self._pipeline(f"P{i}", **{"max jobs": 2}).submit_dag() for i in range(4)]
+        self.assertEqual(len(self.queue.jobs), 2)
+        self.assertEqual(ids[2:], [QUEUED_JOB_ID, QUEUED_JOB_ID])
+
+    def test_per_event_limit(self):
+        self._pipeline("P0", **{"max jobs per event": 1}).submit_dag()
+        self.assertEqual(
+            self._pipeline("P1", **{"max jobs per event": 1}).submit_dag(),
+            QUEUED_JOB_ID,
+        )
+        self.assertNotEqual(
+            self._pipeline("P2", event="GW170817", **{"max jobs per event": 1}).submit_dag(),
+            QUEUED_JOB_ID,
+        )
+
+    def test_resurrect_releases_when_slot_frees(self):
+        first = self._pipeline("P0", **{"max jobs": 1})
+        first_id = first.submit_dag()
+        waiting = self._pipeline("P1", **{"max jobs": 1})
+        waiting.submit_dag()
+
+        waiting.resurrect()
+        self.assertEqual(len(self.queue.jobs), 1)
+
+        self.queue.finish(first_id)
+        JobThrottle._pruned.clear()
+        waiting.resurrect()
+        self.assertEqual(len(self.queue.jobs), 1)
+        self.assertEqual(waiting.production.job_id, max(self.queue.jobs))
+
+    def test_resurrect_does_not_resubmit_released_job(self):
+        pipeline = self._pipeline("P0", **{"max jobs": 1})
+        cluster_id = pipeline.submit_dag()
+        pipeline.resurrect()
+        self.assertEqual(len(self.queue.jobs), 1)
+        self.assertEqual(pipeline.production.job_id, cluster_id)
+
+    def test_batch_through_fake_scheduler(self):
+        from asimov_pesummary.testing import FakeScheduler, SimulatedClock
+
+        clock = SimulatedClock(os.path.join(self._tmp.name, "clock"))
+        self.queue = FakeScheduler(latency=5, runtime=100, clock=clock)
+        pipelines = [self._pipeline(f"P{i}", **{"max jobs": 2}) for i in range(5)]
+        ids = [pipeline.submit_dag() for pipeline in pipelines]
+        self.assertEqual(ids.count(QUEUED_JOB_ID), 3)
+        for _ in range(3):
+            clock.advance(105)
+            JobThrottle._pruned.clear()
+            for pipeline in pipelines:
+                pipeline.resurrect()
+        self.assertEqual(len(self.queue.jobs), 5)
+        started = sorted(job["started"] for job in self.queue.jobs.values())
+        self.assertEqual(started, [5, 5, 110, 110, 215])
+
+    def test_submission_releases_jobs_ahead_of_it(self):
+        first = self._pipeline("P0", **{"max jobs": 1})
+        first_id = first.submit_dag()
+        urgent = self._pipeline("Urgent", **{"max jobs": 1, "priority": 20})
+        self.assertEqual(urgent.submit_dag(), QUEUED_JOB_ID)
+        self.queue.finish(first_id)
+        JobThrottle._pruned.clear()
+
+        # The slot goes to the more urgent job, not the new submission.
+        late = self._pipeline("Late", **{"max jobs": 1})
+        self.assertEqual(late.submit_dag(), QUEUED_JOB_ID)
+        throttle = late._throttle()
+        self.assertIn("GW150914/Urgent", throttle.active)
+        self.assertEqual(list(throttle.queued), ["GW150914/Late"])
+
+    def test_stale_queued_jobs_are_dropped(self):
+        running = self._pipeline("Running", **{"max jobs": 1})
+        running_id = running.submit_dag()
+        stuck = self._pipeline("Stuck", **{"max jobs": 1, "priority": 20})
+        deleted = self._pipeline("Deleted", **{"max jobs": 1, "priority": 20})
+        stuck.submit_dag()
+        deleted.submit_dag()
+        self.queue.finish(running_id)
+        JobThrottle._pruned.clear()
+
+        stuck.production.status = "stuck"
+        waiting = self._pipeline("Waiting", **{"max jobs": 1})
+        ledger = FakeLedger(running.production, stuck.production, waiting.production)
+        waiting.production.event.ledger = ledger
+        self.assertNotEqual(waiting.submit_dag(), QUEUED_JOB_ID)
+        throttle = waiting._throttle()
+        self.assertEqual(list(throttle.active), ["GW150914/Waiting"])
+        self.assertEqual(throttle.queued, {})
+
+    def test_failed_release_of_another_job_does_not_block(self):
+        first = self._pipeline("P0", **{"max jobs": 1})
+        first_id = first.submit_dag()
+        broken = self._pipeline("Broken", **{"max jobs": 1, "priority": 20})
+        broken.submit_dag()
+        self.queue.finish(first_id)
+        JobThrottle._pruned.clear()
+
+        submit = self.queue.submit
+        self.queue.submit = MagicMock(side_effect=[RuntimeError("no schedd"), 200])
+        waiting = self._pipeline("Waiting", **{"max jobs": 1})
+        self.assertEqual(waiting.submit_dag(), 200)
+        self.queue.submit = submit
+        with self.assertRaises(PipelineException):
+            broken.release_queued()
+
+    def test_queued_jobs_drain_after_limit_removed(self):
+        first = self._pipeline("P0", **{"max jobs": 1})
+        first_id = first.submit_dag()
+        waiting = self._pipeline("P1", **{"max jobs": 1})
+        waiting.submit_dag()
+        self.queue.finish(first_id)
+        JobThrottle._pruned.clear()
+        del waiting.meta["max jobs"]
+        waiting.resurrect()
+        self.assertEqual(waiting.production.job_id, max(self.queue.jobs))
+
+    def test_monitor_releases_queued_job(self):
+        from asimov.monitor_helpers import monitor_analysis
+
+        first = self._pipeline("P0", **{"max jobs": 1})
+        first_id = first.submit_dag()
+        for status in ("running", "processing"):
+            with self.subTest(status=status):
+                name = f"Queued-{status}"
+                waiting = self._pipeline(name, **{"max jobs": 1})
+                production = with_job_id(waiting.production)
+                production.pipeline = waiting
+                production.job_id = waiting.submit_dag()
+                # asimov's monitor marks a refreshed SubjectAnalysis as
+                # processing, and any other submitted job as running.
+                production.status = status
+                ledger = FakeLedger(first.production, production)
+                production.event.ledger = ledger
+                job_list = SimpleNamespace(jobs={})
+
+                monitor_analysis(production, job_list, ledger)
+                self.assertEqual(production.job_id, QUEUED_JOB_ID)
+                self.assertEqual(production.status, status)
+                self.assertEqual(len(self.queue.jobs), 1)
+
+                self.queue.finish(max(self.queue.jobs))
+                JobThrottle._pruned.clear()
+                monitor_analysis(production, job_list, ledger)
+                self.assertEqual(production.job_id, max(self.queue.jobs))
+                self.assertEqual(production.status, status)
+                ledger.update_event.assert_called_with(production.event)
+                production.status = "finished"
+
+    def test_monitor_marks_lost_queued_job_stuck(self):
+        from asimov.monitor_helpers import monitor_analysis
+
+        first = self._pipeline("P0", **{"max jobs": 1})
+        first.submit_dag()
+        lost = self._pipeline("Lost", **{"max jobs": 1})
+        production = with_job_id(lost.production)
+        production.pipeline = lost
+        production.job_id = QUEUED_JOB_ID
+        production.status = "running"
+        ledger = FakeLedger(production)
+        monitor_analysis(production, SimpleNamespace(jobs={}), ledger)
+        self.assertEqual(production.status, "stuck")
+        ledger.update_event.assert_called_with(production.event)
+
+    def test_dryrun_ignores_limit(self):
+        for i in range(3):
+            job_id = self._pipeline(f"P{i}", **{"max jobs": 1}).submit_dag(dryrun=True)
+            self.assertNotEqual(job_id, QUEUED_JOB_ID)
+        self.assertFalse(os.path.exists(os.path.join(self._tmp.name, ".asimov")))
+
+
+if __name__ == "__main__":
+    unittest.main()
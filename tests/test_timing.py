@@ -0,0 +1,157 @@
+"""Tests for asimov_pesummary.timing, and timing PESummary submissions."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from tests.test_pesummary import (
+    PESummary,
+    _CONFIG,
+    make_dependency,
+    make_production,
+    make_subject_analysis,
+)
+
+from asimov_pesummary import timing
+
+
+class TestSubmitTimer(unittest.TestCase):
+
+    def test_phases_accumulate(self):
+        with patch("asimov_pesummary.timing.time.perf_counter", side_effect=[0, 1, 2, 4, 6, 10]):
+            timer = timing.SubmitTimer("GW1", "Prod0")
+            with timer.phase("assets"):
+                pass
+            with timer.phase("assets"):
+                pass
+            timer.count("asset lookups")
+            timer.count("asset lookups", 2)
+            record = timer.record()
+        self.assertEqual(record["phases"]["assets"], 3)
+        self.assertEqual(record["phases"]["other"], 7)
+        self.assertEqual(record["counts"], {"asset lookups": 3})
+
+    def test_other_is_time_outside_phases(self):
+        timer = timing.SubmitTimer("GW1", "Prod0")
+        with timer.phase("script"):
+            pass
+        record = timer.record()
+        self.assertAlmostEqual(
+            record["phases"]["script"] + record["phases"]["other"], record["total"],
+            places=5,
+        )
+
+    def test_null_timer_records_nothing(self):
+        timer = timing.NullTimer()
+        with timer.phase("anything"):
+            timer.count("calls")
+        self.assertIsNone(timer.record())
+
+
+class TestReport(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "report", "timing.jsonl")
+
+    def _record(self, assets, scheduler, calls=1):
+        return {
+            "event": "GW1", "production": "P", "time": 0,
+            "total": assets + scheduler,
+            "phases": {"assets": assets, "scheduler": scheduler},
+            "counts": {"scheduler calls": calls},
+        }
+
+    def test_summarise(self):
+        timing.append(self.path, self._record(1.0, 3.0))
+        timing.append(self.path, self._record(1.0, 5.0))
+        summary = timing.summarise(self.path)
+        self.assertEqual(summary["submissions"], 2)
+        self.assertEqual(summary["total"], 10.0)
+        self.assertEqual(list(summary["phases"]), ["scheduler", "assets"])
+        self.assertEqual(summary["phases"]["scheduler"]["max"], 5.0)
+        self.assertAlmostEqual(summary["phases"]["assets"]["share"], 0.2)
+        self.assertEqual(summary["counts"], {"scheduler calls": 2})
+
+    def test_main_prints_summary(self):
+        timing.append(self.path, self._record(1.0, 3.0))
+        with patch("builtins.print") as printed:
+            timing.main([self.path])
+        self.assertIn("1 submissions", printed.call_args_list[0][0][0])
+
+
+class TestPESummaryTiming(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        config = dict(_CONFIG)
+        config[("project", "root")] = self._tmp.name
+        mock_config = patch("asimov_pesummary.pesummary.config").start()
+        mock_config.get.side_effect = lambda s, o, **k: config.get((s, o), "")
+        self.addCleanup(patch.stopall)
+
+    def _submit(self, production):
+        production.event.work_dir = self._tmp.name
+        pipeline = PESummary(production)
+        pipeline._scheduler = MagicMock()
+        pipeline._scheduler.submit.return_value = 1234
+        with patch("asimov.scheduler_utils.create_job_from_dict"):
+            with self.assertLogs("asimov", level="INFO") as logs:
+                pipeline.submit_dag()
+        return [
+            record.pesummary_timing
+            for record in logs.records
+            if hasattr(record, "pesummary_timing")
+        ]
+
+    def test_off_by_default(self):
+        self.assertEqual(self._submit(make_production()), [])
+
+    def test_single_analysis_phases_and_counts(self):
+        [record] = self._submit(make_production(pesummary_meta={"timing": True}))
+        self.assertEqual(record["event"], "GW150914")
+        self.assertTrue(
+            {"config lookup", "assets", "script", "scheduler", "other"}
+            <= set(record["phases"])
+        )
+        self.assertEqual(record["counts"]["scheduler calls"], 1)
+        self.assertEqual(record["counts"]["config lookups"], 1)
+
+    def test_throttle_counts_its_scheduler_query(self):
+        from asimov_pesummary.throttle import JobThrottle
+
+        JobThrottle._pruned.clear()
+        self.addCleanup(JobThrottle._pruned.clear)
+        meta = {"timing": True, "max jobs": 2}
+        [first] = self._submit(make_production(pesummary_meta=meta))
+        self.assertEqual(first["counts"]["scheduler calls"], 1)
+        # The first job is now active, so the second submission asks the
+        # scheduler which jobs are still there before submitting.
+        [second] = self._submit(make_production(pesummary_meta=meta))
+        self.assertEqual(second["counts"]["scheduler calls"], 2)
+
+    def test_subject_analysis_counts_every_source(self):
+        production = make_subject_analysis(
+            pesummary_meta={"timing": True},
+            analyses=[make_dependency(f"Bilby{i}") for i in range(3)],
+        )
+        [record] = self._submit(production)
+        self.assertEqual(record["counts"]["asset lookups"], 3)
+        self.assertEqual(record["counts"]["config lookups"], 3)
+
+    def test_report_appended(self):
+        meta = {"timing": True, "timing report": "timing.jsonl"}
+        self._submit(make_production(pesummary_meta=meta))
+        self._submit(make_production(pesummary_meta=meta))
+        with open(os.path.join(self._tmp.name, "timing.jsonl")) as report:
+            lines = [json.loads(line) for line in report]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(timing.summarise(report.name)["submissions"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()